@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Benchmark of the image pipeline and the stroke planner.
+
+Runs convert_transparency, create_pixmaps, quantize_to_palette, convert_img and calculate_statistics on
+synthetic and real images for every combination of the quality, hidden_colors and brush_opacities settings
+and writes the results as JSON (time, peak memory and stroke counts).
+
+    python benchmark.py --output results.json
+    python benchmark.py --output new.json --compare results.json --tolerance 1.25
+
+With --compare, the exit code is 1 if any case is slower than the baseline by more than the tolerance.
+Peak memory is what tracemalloc traces, i.e. Python & NumPy allocations (not the internal buffers of PIL).
+"""
+
+import argparse
+import datetime
+import glob
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# The pixmaps can be created without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5 import QtCore
+from PyQt5 import QtWidgets
+from PIL import Image
+
+import numpy
+
+from lib.paintConfig import PaintConfig
+from lib.rustDaVinci import rustDaVinci
+
+SETTINGS_COMBINATIONS = list(itertools.product((0, 1), (0, 1), (0, 1))) # quality, hidden_colors, brush_opacities
+DEFAULT_SIZES = ["256x128", "512x256", "700x350"]
+REAL_IMAGES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "screenshots")
+
+
+def synthetic_images(width, height):
+    """ Create synthetic RGBA test images.
+    Returns:    A dict of name: PIL.Image
+    """
+    rng = numpy.random.RandomState(0)
+    x = numpy.linspace(0, 255, width, dtype=numpy.float32)
+    y = numpy.linspace(0, 255, height, dtype=numpy.float32)
+    gradient = numpy.dstack((   numpy.tile(x, (height, 1)),
+                                numpy.tile(y[:, None], (1, width)),
+                                numpy.full((height, width), 128, dtype=numpy.float32),
+                                numpy.full((height, width), 255, dtype=numpy.float32))).astype(numpy.uint8)
+
+    noise = rng.randint(0, 256, (height, width, 4)).astype(numpy.uint8)
+    noise[:, :, 3] = 255
+
+    # Flat areas like logos & cartoons, with a transparent border
+    blocks = rng.randint(0, 256, ((height + 31) // 32, (width + 31) // 32, 4)).astype(numpy.uint8)
+    blocks = numpy.repeat(numpy.repeat(blocks, 32, axis=0), 32, axis=1)[:height, :width]
+    blocks[:, :, 3] = 255
+    blocks[:height // 10, :, 3] = 0
+
+    return {"gradient": Image.fromarray(gradient, "RGBA"),
+            "noise": Image.fromarray(noise, "RGBA"),
+            "blocks": Image.fromarray(blocks, "RGBA")}
+
+
+def real_images(folder):
+    """ Load the real test images of folder.
+    Returns:    A dict of name: PIL.Image
+    """
+    images = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.jpg")) + glob.glob(os.path.join(folder, "*.png"))):
+        images[os.path.splitext(os.path.basename(path))[0]] = Image.open(path).convert("RGBA")
+    return images
+
+
+def measure(function, setup, repeat):
+    """ Time function, setup is called before every run and is not timed. The runs are timed without tracing,
+    tracemalloc slows down Python code a lot, the peak memory is traced in one more run that is not timed.
+    Returns:    time_min, time_median, peak_memory, the result of the last timed run
+    """
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    function()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), statistics.median(times), peak_memory, result
+
+
+def run_case(rdv, config, image, canvas_size, repeat):
+    """ Benchmark every stage of the pipeline for one image, canvas size and settings combination.
+    Returns:    A list of results, one per stage
+    """
+    canvas_w, canvas_h = canvas_size
+    results = []
+
+    def template():
+        rdv.org_img_template = image
+
+    def canvas():
+        rdv.org_img = transparent_img
+        rdv.canvas_x, rdv.canvas_y, rdv.canvas_w, rdv.canvas_h = 0, 0, canvas_w, canvas_h
+
+    def quantized():
+        rdv.quantized_img = quantized_img
+
+    def stage(name, function, setup):
+        time_min, time_median, peak_memory, result = measure(function, setup, repeat)
+        results.append({"stage": name, "time_min": time_min, "time_median": time_median, "peak_memory": peak_memory})
+        return result
+
+    stage("convert_transparency", lambda: rdv.convert_transparency(config), template)
+    transparent_img = rdv.org_img
+
+    def previews():
+        rdv.org_img = transparent_img
+        rdv.previews.clear()
+
+    def create_previews():
+        rdv.create_pixmaps(config)
+        rdv.preview_pixmap(1)
+        rdv.preview_pixmap(2)
+
+    stage("create_pixmaps", create_previews, previews)
+    stage("quantize_to_palette", lambda: rdv.quantize_to_palette(transparent_img, config), lambda: None)
+    stage("convert_img", lambda: rdv.convert_img(config), canvas)
+    quantized_img = rdv.quantized_img
+
+    stage("calculate_statistics", lambda: rdv.calculate_statistics(config), quantized)
+    results[-1].update({"colors": len(rdv.img_colors),
+                        "tot_pixels": rdv.tot_pixels,
+                        "clicks": rdv.stroke_plan.clicks,
+                        "lines": rdv.stroke_plan.lines,
+                        "color_order_time_saved": rdv.color_order_time_saved,
+                        "travel_distance_before": rdv.travel_distance_before,
+                        "travel_distance": rdv.travel_distance})
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """ Compare results against a baseline.
+    Returns:    A list of (key, baseline time, new time) of the cases that regressed
+    """
+    def key(result):
+        return (result["stage"], result["image"], result["size"], result["quality"], result["hidden_colors"], result["brush_opacities"])
+
+    baseline_times = {key(result): result["time_min"] for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        old_time = baseline_times.get(key(result))
+        if old_time is not None and result["time_min"] > old_time * tolerance:
+            regressions.append((key(result), old_time, result["time_min"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RustDaVinci image pipeline and stroke planner.")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="Canvas sizes as WIDTHxHEIGHT")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per case, the fastest is reported")
+    parser.add_argument("--images", default=REAL_IMAGES_FOLDER, help="Folder with real test images")
+    parser.add_argument("--no-real", action="store_true", help="Only use the synthetic images")
+    parser.add_argument("--output", default=None, help="Write the results to this JSON file instead of stdout")
+    parser.add_argument("--compare", default=None, help="A previous results JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Allowed slowdown factor when comparing")
+    args = parser.parse_args()
+
+    # Use a separate settings scope so that the user's settings are left untouched
+    QtCore.QCoreApplication.setOrganizationName("RustDaVinci")
+    QtCore.QCoreApplication.setApplicationName("RustDaVinciBenchmark")
+    app = QtWidgets.QApplication(sys.argv)
+    settings = QtCore.QSettings()
+    settings.clear()
+
+    rdv = rustDaVinci(None)
+    real = {} if args.no_real else real_images(args.images)
+
+    results = []
+    for size in args.sizes:
+        canvas_size = tuple(int(value) for value in size.lower().split("x"))
+        images = synthetic_images(*canvas_size)
+        images.update(real)
+
+        for (name, image), (quality, hidden_colors, brush_opacities) in itertools.product(images.items(), SETTINGS_COMBINATIONS):
+            config = PaintConfig(quality=quality, hidden_colors=bool(hidden_colors), brush_opacities=bool(brush_opacities))
+
+            for result in run_case(rdv, config, image, canvas_size, args.repeat):
+                result.update({ "image": name, "image_size": list(image.size), "size": size, "quality": quality,
+                                "hidden_colors": hidden_colors, "brush_opacities": brush_opacities})
+                results.append(result)
+                print("%-22s %-16s %-8s q=%d h=%d o=%d %9.4f s" % (result["stage"], name, size, quality,
+                        hidden_colors, brush_opacities, result["time_min"]), file=sys.stderr)
+
+    settings.clear()
+
+    report = {  "created": datetime.datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "numpy": numpy.__version__,
+                "repeat": args.repeat,
+                "results": results}
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=1)
+    else:
+        json.dump(report, sys.stdout, indent=1)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for key, old_time, new_time in regressions:
+            print("REGRESSION %s: %.4f s -> %.4f s" % (" ".join(str(part) for part in key), old_time, new_time), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
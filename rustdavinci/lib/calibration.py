@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import math
+
+from lib.strokePlan import StrokePlan, CLICK, LINE
+
+# The delays that are calibrated, in the order of Painter.set_delays
+CLICK_DELAY = 0
+LINE_DELAY = 1
+CTRL_AREA_DELAY = 2
+
+# The test pattern, in canvas pixels from the top left corner of the canvas. Every delay has its own rows,
+# the strokes are PATTERN_SPACING apart so that they do not touch
+PATTERN_SPACING = 4
+PATTERN_CLICKS = 12
+PATTERN_LINES = 3
+PATTERN_LINE_LENGTH = 24
+PATTERN_COLOR_CHANGES = 6
+
+# The calibrated delays are the smallest delays that worked times this margin, the game does not always
+# respond equally fast
+SAFETY_MARGIN = 1.2
+
+
+class CalibrationError(Exception):
+    """ The calibration could not be completed """
+
+
+def test_pattern(delay, colors, parity):
+    """ The strokes that test delay. The click and line patterns are painted in colors[parity], the control
+    area pattern alternates between the two colors (starting with colors[parity]) so that every stroke needs
+    a change of color.
+    Returns:    The StrokePlan
+    """
+    if delay == CLICK_DELAY:
+        x = numpy.arange(PATTERN_CLICKS) * PATTERN_SPACING
+        return StrokePlan(numpy.full(len(x), colors[parity]), numpy.full(len(x), CLICK), x, numpy.zeros(len(x)), x, numpy.zeros(len(x)))
+    elif delay == LINE_DELAY:
+        y = (numpy.arange(PATTERN_LINES) + 1) * PATTERN_SPACING
+        return StrokePlan(  numpy.full(len(y), colors[parity]), numpy.full(len(y), LINE),
+                            numpy.zeros(len(y)), y, numpy.full(len(y), PATTERN_LINE_LENGTH - 1), y)
+
+    x = numpy.arange(PATTERN_COLOR_CHANGES) * PATTERN_SPACING
+    y = numpy.full(len(x), (PATTERN_LINES + 1) * PATTERN_SPACING)
+    color = numpy.array(colors)[(numpy.arange(len(x)) + parity) % 2]
+    return StrokePlan(color, numpy.full(len(x), CLICK), x, y, x, y)
+
+
+class DelayCalibration():
+
+    def __init__(self, painter, screenshot, canvas_area, palette, colors, brush_type, delays, use_double_click = False):
+        """ DelayCalibration class init. Finds the smallest click, line and control area delays at which every
+        stroke still registers, by painting a small test pattern in the top left corner of the canvas and reading
+        it back from a screenshot. The delays are binary searched one after the other, the current delays must
+        work.
+            painter:            The Painter
+            screenshot:         A function (x, y, w, h) -> the rgb pixels of that area of the screen (h x w x 3)
+            canvas_area:        (x, y, w, h) of the canvas on the screen, the pattern needs about 25 x 20 pixels
+            palette:            The rgb colors of the palette indices
+            colors:             Two palette indices that are easy to tell apart
+            brush_type:         The brush type used for the strokes
+            delays:             The current click, line and control area delays in milliseconds
+            use_double_click:   If every click is a double click
+        """
+        self.painter = painter
+        self.screenshot = screenshot
+        self.canvas_area = canvas_area
+        self.palette = palette
+        self.colors = colors
+        self.brush_type = brush_type
+        self.delays = [int(delay) for delay in delays]
+        self.use_double_click = use_double_click
+
+        # The parity of the pattern of every delay that was painted last, None if it is not painted yet
+        self.parities = [None, None, None]
+        self.log = lambda text: None
+
+
+    def paint_pattern(self, delay, delays):
+        """ Paint the test pattern of delay with delays (milliseconds), in the other parity than last time so
+        that every stroke changes the color of its pixels.
+        Returns:    True if every stroke registered
+        """
+        parity = 1 if self.parities[delay] == 0 else 0
+        self.parities[delay] = parity
+        plan = test_pattern(delay, self.colors, parity)
+
+        click_delay, line_delay, ctrl_area_delay = (value / 1000 for value in delays)
+        self.painter.set_delays(click_delay, line_delay, ctrl_area_delay, self.use_double_click)
+        if not self.painter.paint(plan, self.canvas_area, self.palette, self.brush_type, None, False, True):
+            raise CalibrationError("Aborted...")
+
+        return self.is_painted(plan)
+
+
+    def is_painted(self, plan):
+        """ Returns:    True if every pixel of the strokes of plan has the color of its stroke on the screen """
+        pixels = plan.as_clicks()
+        canvas_x, canvas_y = self.canvas_area[:2]
+        width, height = int(pixels.x0.max()) + 1, int(pixels.y0.max()) + 1
+        shot = numpy.asarray(self.screenshot(canvas_x, canvas_y, width, height), dtype=numpy.int32)[pixels.y0, pixels.x0]
+
+        # Which of the two colors every pixel is closest to
+        distances = [((shot - numpy.array(self.palette[color])) ** 2).sum(axis=1) for color in self.colors]
+        closest = numpy.array(self.colors)[numpy.argmin(distances, axis=0)]
+        return bool((closest == pixels.color).all())
+
+
+    def search(self, delay, delays):
+        """ Binary search the smallest value of delay (whole milliseconds) at which the pattern registers, from
+        delays[delay] down, the other delays are kept at delays. The pattern is repainted with delays after every
+        failed attempt.
+        Returns:    The smallest delay
+        """
+        low, high = 0, delays[delay]
+        while low < high:
+            attempt = list(delays)
+            attempt[delay] = (low + high) // 2
+            if self.paint_pattern(delay, attempt):
+                self.log("  " + str(attempt[delay]) + " ms: ok")
+                high = attempt[delay]
+            else:
+                self.log("  " + str(attempt[delay]) + " ms: strokes were lost")
+                low = attempt[delay] + 1
+                if not self.paint_pattern(delay, delays):
+                    raise CalibrationError("The pattern did not register with the current delays")
+        return high
+
+
+    def calibrate(self):
+        """ Calibrate the delays, the current delays are used to paint the first patterns and must work. The delays
+        are searched in order and every search uses the delays that are already calibrated, the pause of the click
+        on the painting controls is part of the time the controls get to update.
+        Returns:    The calibrated click, line and control area delays in milliseconds
+        """
+        # Every pattern is painted in both parities first, the pixels of the canvas may already have the color
+        # of the first one
+        for delay in (CLICK_DELAY, LINE_DELAY, CTRL_AREA_DELAY):
+            self.paint_pattern(delay, self.delays)
+            if not self.paint_pattern(delay, self.delays):
+                raise CalibrationError("The pattern did not register with the current delays")
+
+        calibrated = list(self.delays)
+        for delay, name in ((CLICK_DELAY, "Click delay"), (LINE_DELAY, "Line delay"), (CTRL_AREA_DELAY, "Control area delay")):
+            self.log(name + ":")
+            smallest = self.search(delay, calibrated)
+            calibrated[delay] = min(int(math.ceil(smallest * SAFETY_MARGIN)), self.delays[delay])
+
+        # Check that the calibrated delays work together
+        for delay in (CLICK_DELAY, LINE_DELAY, CTRL_AREA_DELAY):
+            if not self.paint_pattern(delay, calibrated):
+                raise CalibrationError("The calibrated delays did not work together")
+        return calibrated
@@ -2,13 +2,20 @@
 # -*- coding: utf-8 -*-
 
 from pynput import keyboard
+from pynput.mouse import Button, Listener as MouseListener
 
 import tkinter
 import pyautogui
-import win32api
 import time
 
+# win32api is only available on Windows, the left mouse button is followed with a pynput listener elsewhere
+try:
+    import win32api
+except ImportError:
+    win32api = None
+
 abort_capturing_mode = False
+left_button_pressed = False
 
 
 def key_event(key):
@@ -17,6 +24,20 @@ def key_event(key):
     abort_capturing_mode = True
 
 
+def mouse_event(x, y, button, pressed):
+    """ Follow the left mouse button """
+    global left_button_pressed
+    if button == Button.left:
+        left_button_pressed = pressed
+
+
+def left_button_state():
+    """ Returns:    The state of the left mouse button, negative while it is pressed (like win32api.GetKeyState) """
+    if win32api != None:
+        return win32api.GetKeyState(0x01)
+    return -1 if left_button_pressed else 0
+
+
 def capture_area():
     """ Capture an area on the screen by clicking and dragging the mouse to the bottom right corner.
     Returns:    area_x,
@@ -27,6 +48,10 @@ def capture_area():
     global abort_capturing_mode
     listener = keyboard.Listener(on_press=key_event)
     listener.start()
+    mouse_listener = None
+    if win32api == None:
+        mouse_listener = MouseListener(on_click=mouse_event)
+        mouse_listener.start()
 
     root = tkinter.Tk().withdraw()
     area = tkinter.Toplevel(root)
@@ -34,16 +59,17 @@ def capture_area():
     area.wm_attributes('-alpha',0.5)
     area.geometry("0x0")
 
-    prev_state = win32api.GetKeyState(0x01)
+    prev_state = left_button_state()
     pressed, active = False, False
 
     while True:
         if abort_capturing_mode:
             abort_capturing_mode = False
             listener.stop()
+            if mouse_listener != None: mouse_listener.stop()
             return False
 
-        current_state = win32api.GetKeyState(0x01)
+        current_state = left_button_state()
         mouse = pyautogui.position()
 
         if current_state != prev_state:
@@ -59,10 +85,10 @@ def capture_area():
             elif not pressed:
                 if active:
                     area.destroy()
+                    listener.stop()
+                    if mouse_listener != None: mouse_listener.stop()
                     if area_TL[0] >= mouse[0] or area_TL[1] >= mouse[1]:
-                        listener.stop()
                         return 0, 0, 0, 0
-                    listener.stop()
                     return area_TL[0], area_TL[1], mouse[0] - area_TL[0], mouse[1] - area_TL[1]
                 area.geometry("+" + str(mouse[0])+ "+" + str(mouse[1]))
 
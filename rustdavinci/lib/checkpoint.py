@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import json
+import os
+
+from lib.strokePlan import StrokePlan
+
+# The arrays of a StrokePlan that are saved
+PLAN_ARRAYS = ("color", "kind", "x0", "y0", "x1", "y1", "size")
+
+
+class Checkpoint():
+
+    def __init__(self, folder):
+        """ Checkpoint class init. The last painting is saved to folder, so that it can be resumed after it was
+        aborted or the program was closed. The stroke plan and its painting arguments are saved once when the
+        painting starts, the cursor (the color and the first stroke that is not painted yet) while it is painted.
+            folder:     The folder of the checkpoint files
+        """
+        self.folder = folder
+        self.painting_path = os.path.join(folder, "painting.npz")
+        self.cursor_path = os.path.join(folder, "cursor.json")
+
+
+    def exists(self):
+        """ Returns:    True if there is a painting to resume """
+        return os.path.isfile(self.painting_path) and os.path.isfile(self.cursor_path)
+
+
+    def start(self, plan, canvas_area, palette, brush_type, update_canvas, update_canvas_end, colors_per_opacity):
+        """ Save a new painting, its cursor is at the first stroke. The arguments are those of Painter.paint and
+        the colors per opacity that split the palette indices of the plan into the opacity & the color swatch.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        arrays = {"plan_" + name: getattr(plan, name) for name in PLAN_ARRAYS}
+        with open(self.painting_path + ".tmp", "wb") as f:
+            numpy.savez(f,  canvas_area=numpy.array(canvas_area, dtype=numpy.int32),
+                            palette=numpy.array(palette, dtype=numpy.uint8),
+                            options=numpy.array([brush_type, update_canvas, update_canvas_end, colors_per_opacity], dtype=numpy.int32),
+                            **arrays)
+        os.replace(self.painting_path + ".tmp", self.painting_path)
+        self.save_cursor(0, 0)
+
+
+    def save_cursor(self, color_index, stroke_index):
+        """ Save the cursor of the painting, the file is replaced atomically so a crash never leaves half of it.
+            color_index:    The index of the current color (in the colors of the plan)
+            stroke_index:   The index of the first stroke that is not painted yet
+        """
+        with open(self.cursor_path + ".tmp", "w") as f:
+            json.dump({"color_index": int(color_index), "stroke_index": int(stroke_index)}, f)
+        os.replace(self.cursor_path + ".tmp", self.cursor_path)
+
+
+    def load(self):
+        """ Load the saved painting.
+        Returns:    A dict of plan, canvas_area, palette, brush_type, update_canvas, update_canvas_end,
+                    colors_per_opacity (None if the checkpoint does not have it), color_index and stroke_index,
+                    or None if there is no (readable) checkpoint
+        """
+        if not self.exists(): return None
+        try:
+            with numpy.load(self.painting_path) as data:
+                plan = StrokePlan(*[data["plan_" + name] for name in PLAN_ARRAYS])
+                canvas_area = tuple(data["canvas_area"].tolist())
+                palette = [tuple(color) for color in data["palette"].tolist()]
+                options = data["options"].tolist()
+            brush_type, update_canvas, update_canvas_end = options[:3]
+            colors_per_opacity = options[3] if len(options) > 3 else None
+            with open(self.cursor_path) as f:
+                cursor = json.load(f)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return {"plan": plan,
+                "canvas_area": canvas_area,
+                "palette": palette,
+                "brush_type": brush_type,
+                "update_canvas": bool(update_canvas),
+                "update_canvas_end": bool(update_canvas_end),
+                "colors_per_opacity": colors_per_opacity,
+                "color_index": cursor["color_index"],
+                "stroke_index": min(cursor["stroke_index"], len(plan))}
+
+
+    def clear(self):
+        """ Remove the saved painting, when it is completed """
+        for path in (self.painting_path, self.cursor_path):
+            try: os.remove(path)
+            except OSError: None
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from lib.strokePlan import find_runs
+
+
+def transition_times(colors, colors_per_opacity, cost_model):
+    """ Returns:    A matrix where [i, j] is the time of changing the opacity and color from colors[i] to colors[j] """
+    colors = numpy.asarray(colors)
+    opacity = colors // colors_per_opacity
+    swatch = colors % colors_per_opacity
+    changes = (opacity[:, None] != opacity[None, :]).astype(float) + (swatch[:, None] != swatch[None, :])
+    return changes * cost_model.ctrl_click_time
+
+
+def overpaint_savings(pixel_arr, colors, opaque_colors, minimum_line_width, cost_model):
+    """ Estimate the time saved by painting a color before another color. Wherever two runs of color A are
+    separated by a run of an opaque color B (in a row or in a column), painting A before B lets one line of A
+    pass over B: a line is saved if both runs are lines, else (roughly) a click.
+    Returns:    A matrix where [i, j] is the time saved if colors[i] is painted before colors[j]
+    """
+    index = numpy.full(256, -1, dtype=numpy.int32)
+    index[numpy.asarray(colors, dtype=numpy.uint8)] = numpy.arange(len(colors))
+    is_opaque = numpy.zeros(256, dtype=bool)
+    is_opaque[numpy.asarray(list(opaque_colors), dtype=numpy.uint8)] = True
+    minimum_line = max(minimum_line_width, 2)
+
+    savings = numpy.zeros((len(colors), len(colors)))
+    for arr in (pixel_arr, pixel_arr.T):
+        x0, x1, y, color = find_runs(arr)
+        is_line = (x1 - x0 + 1) >= minimum_line
+
+        # A run of color A, a run of color B and a run of color A again, on the same row
+        is_gap = (y[:-2] == y[2:]) & (color[:-2] == color[2:]) & is_opaque[color[1:-1]]
+        a, b = index[color[:-2][is_gap]], index[color[1:-1][is_gap]]
+        both_lines = (is_line[:-2] & is_line[2:])[is_gap]
+        is_painted = (a >= 0) & (b >= 0)
+        saving = numpy.where(both_lines[is_painted], cost_model.line_time, cost_model.click_time)
+        numpy.add.at(savings, (a[is_painted], b[is_painted]), saving)
+    return savings
+
+
+def insertion_costs(color, rest, savings, transitions):
+    """ Returns:    The change of the estimated time for inserting color at every position of the order rest """
+    before = numpy.concatenate(([0], numpy.cumsum(savings[rest, color])))
+    after = numpy.concatenate(([0], numpy.cumsum(savings[color, rest])))
+    pair_savings = before + (after[-1] - after)
+
+    changes = numpy.empty(len(rest) + 1)
+    changes[0] = transitions[color, rest[0]]
+    changes[-1] = transitions[rest[-1], color]
+    changes[1:-1] = transitions[rest[:-1], color] + transitions[color, rest[1:]] - transitions[rest[:-1], rest[1:]]
+    return changes - pair_savings
+
+
+def optimize_color_order(pixel_arr, colors, opaque_colors, colors_per_opacity, minimum_line_width, cost_model, passes = 10):
+    """ Find a painting order of colors with a short estimated painting time. The colors that save the most
+    when painted before the others (large, background-like colors) go first, after that every color is moved
+    to its best position until no move improves the order any more (or for a number of passes).
+    Returns:    The colors in the new order
+    """
+    if len(colors) < 2: return list(colors)
+    savings = overpaint_savings(numpy.asarray(pixel_arr), colors, opaque_colors, minimum_line_width, cost_model)
+    transitions = transition_times(colors, colors_per_opacity, cost_model)
+
+    order = numpy.argsort(savings.sum(axis=0) - savings.sum(axis=1), kind="mergesort").tolist()
+    for _ in range(passes):
+        is_improved = False
+        for color in list(order):
+            position = order.index(color)
+            rest = order[:position] + order[position + 1:]
+            costs = insertion_costs(color, numpy.array(rest), savings, transitions)
+            best = int(numpy.argmin(costs))
+            if costs[best] < costs[position] - 1e-9:
+                order = rest[:best] + [color] + rest[best:]
+                is_improved = True
+        if not is_improved: break
+
+    return [colors[i] for i in order]
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+
+class CostModel():
+
+    def __init__(self, click_delay = 0, line_delay = 0, ctrl_area_delay = 0, use_double_click = False, times = None):
+        """ CostModel class init. The estimated time (in seconds) of each painting operation, given the delays.
+            click_time:         One click on the canvas
+            line_time:          One line on the canvas
+            ctrl_click_time:    One click on the painting controls
+        times replaces the estimates by (click_time, line_time, ctrl_click_time), the times fitted from the
+        timed paintings (see TimingHistory).
+        """
+        self.click_time = click_delay + 0.001
+        self.click_time = self.click_time * 2 if use_double_click else self.click_time
+        self.line_time = (line_delay * 5) + 0.0035
+        self.ctrl_click_time = self.click_time + ctrl_area_delay
+        if times != None:
+            self.click_time, self.line_time, self.ctrl_click_time = times
+
+
+    def strokes_time(self, clicks, lines):
+        """ Returns:    The estimated time of painting clicks and lines """
+        return (clicks * self.click_time) + (lines * self.line_time)
+
+
+    def operations_time(self, counts):
+        """ Returns:    The estimated time of a dict of the number of clicks, lines and ctrl_clicks """
+        return  ((counts["clicks"] * self.click_time) + (counts["lines"] * self.line_time) +
+                 (counts["ctrl_clicks"] * self.ctrl_click_time))
+
+
+    def controls_clicks(self, colors, colors_per_opacity, size_changes = 0):
+        """ Count the clicks on the painting controls when the colors are painted in order. The brush size & type
+        and the first opacity & color are always clicked, after that only the controls that change.
+        Returns:    The number of clicks
+        """
+        if len(colors) == 0: return 0
+        colors = numpy.asarray(colors)
+        opacity_changes = numpy.count_nonzero(numpy.diff(colors // colors_per_opacity))
+        color_changes = numpy.count_nonzero(numpy.diff(colors % colors_per_opacity))
+        return int(4 + opacity_changes + color_changes + size_changes)
+
+
+    def canvas_operations(self, colors, canvas_h, paint_background, update_canvas, update_canvas_end):
+        """ Count the operations of a painting that are not strokes of its plan: the lines of the background and
+        its clicks on the painting controls (see Painter.paint_background), and the clicks on the update button. The
+        first color may share a control with the background, which is counted anyway.
+            colors:             The colors that are painted
+            canvas_h:           The height of the canvas
+        Returns:    A dict of the number of clicks, lines and ctrl_clicks
+        """
+        clicks = (len(colors) if update_canvas else 0) + (1 if update_canvas_end else 0)
+        lines = int((canvas_h - 10) / 10) if paint_background else 0
+        return {"clicks": clicks, "lines": max(lines, 0), "ctrl_clicks": 4 if paint_background else 0}
+
+
+    def controls_time(self, colors, colors_per_opacity, size_changes = 0):
+        """ Returns:    The estimated time of choosing the painting controls (see controls_clicks) """
+        return self.controls_clicks(colors, colors_per_opacity, size_changes) * self.ctrl_click_time
+
+
+    def plan_time(self, plan, colors, colors_per_opacity):
+        """ Returns:    The estimated time of painting the StrokePlan, where colors is the painting order """
+        return  (self.strokes_time(plan.clicks, plan.lines) +
+                 self.controls_time(colors, colors_per_opacity, plan.size_changes))
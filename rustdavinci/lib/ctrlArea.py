@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# The approximate width in canvas pixels of a stroke for each brush size of the painting controls, the large brush
+# strokes keep a margin to the other colors (see strokePlan.FOOTPRINT_MARGIN)
+ctrl_size_footprints = [1, 2, 4, 6, 8, 10]
+
+
+def ctrl_tools_positioning(ctrl_x, ctrl_y, ctrl_w, ctrl_h, use_hidden_colors):
+    """ Calculates the positioning of the different controls in the painting control area.
+    The brush size, type and opacity along with all the different colors.
+    Returns:    ctrl_remove,
+                ctrl_update,
+                ctrl_size,
+                ctrl_brush,
+                ctrl_opacity,
+                ctrl_color
+    """
+    ctrl_size = []
+    ctrl_brush = []
+    ctrl_opacity = []
+    ctrl_color = []
+
+    # Calculate the distance between two items on a row of six items (Size)
+    first_x_coord_of_six_v1 = ctrl_x + (ctrl_w/6.5454)
+    second_x_coord_of_six_v1 = ctrl_x + (ctrl_w/3.4285)
+    dist_btwn_x_coords_of_six_v1 = second_x_coord_of_six_v1 - first_x_coord_of_six_v1
+
+    # Calculate the distance between two items on a row of six items (Opacity)
+    first_x_coord_of_six_v2 = ctrl_x + (ctrl_w/7.5789)
+    second_x_coord_of_six_v2 = ctrl_x + (ctrl_w/3.5555)
+    dist_btwn_x_coords_of_six_v2 = second_x_coord_of_six_v2 - first_x_coord_of_six_v2
+
+    # Calculate the distance between two items on a row of four items (Colors width)
+    first_x_coord_of_four = ctrl_x + (ctrl_w/6)
+    second_x_coord_of_four = ctrl_x + (ctrl_w/2.5714)
+    dist_btwn_x_coords_of_four = second_x_coord_of_four - first_x_coord_of_four
+
+    # Calculate the distance between two items on a column of eight items (Colors height)
+    first_y_coord_of_eight = ctrl_y + (ctrl_h/2.3220)
+    second_y_coord_of_eight = ctrl_y + (ctrl_h/1.9855)
+    dist_btwn_y_coords_of_eight = second_y_coord_of_eight - first_y_coord_of_eight
+
+    # Set the point location of the remove & update buttons
+    ctrl_remove = ((ctrl_x + (ctrl_w/2.7692)), (ctrl_y + (ctrl_h/19.5714)))
+    ctrl_update = ((ctrl_x + (ctrl_w/1.5652)), (ctrl_y + (ctrl_h/19.5714)))
+
+
+    for size in range(6):
+        ctrl_size.append((  first_x_coord_of_six_v1 +
+                            (size * dist_btwn_x_coords_of_six_v1),
+                            (ctrl_y + (ctrl_h/6.9661))))
+
+    for brush in range(4):
+        ctrl_brush.append(( first_x_coord_of_four +
+                            (brush * dist_btwn_x_coords_of_four),
+                            (ctrl_y + (ctrl_h/4.2371))))
+
+    for opacity in range(6):
+        ctrl_opacity.append((   first_x_coord_of_six_v2 +
+                                (opacity * dist_btwn_x_coords_of_six_v2),
+                                (ctrl_y + (ctrl_h/3.0332))))
+
+    for row in range(8):
+        for column in range(4):
+            if (row == 0 or row == 4) and column == 3: continue
+            if (row == 1 or row == 5) and (column == 2 or column == 3): continue
+            if row == 2 and column == 0: continue
+            if row == 3 and (column == 0 or column == 1): continue
+            if row == 6 and column == 2: continue
+            if row == 7 and (column == 1 or column == 2): continue
+            ctrl_color.append(  (first_x_coord_of_four + (column * dist_btwn_x_coords_of_four),
+                                (first_y_coord_of_eight + (row * dist_btwn_y_coords_of_eight))))
+
+    # Hidden colors location
+    if use_hidden_colors:
+        ctrl_color.append((ctrl_x + (ctrl_w/18.0000), ctrl_y + (ctrl_h/2.1518)))
+        ctrl_color.append((ctrl_x + (ctrl_w/4.2353), ctrl_y + (ctrl_h/2.1406)))
+        ctrl_color.append((ctrl_x + (ctrl_w/13.0909), ctrl_y + (ctrl_h/1.8430)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.6923), ctrl_y + (ctrl_h/1.9116)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.8228), ctrl_y + (ctrl_h/1.8853)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3714), ctrl_y + (ctrl_h/1.8348)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0746), ctrl_y + (ctrl_h/1.9116)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0667), ctrl_y + (ctrl_h/1.8430)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.8947), ctrl_y + (ctrl_h/1.6440)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3333), ctrl_y + (ctrl_h/1.6181)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.2857), ctrl_y + (ctrl_h/1.6440)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0827), ctrl_y + (ctrl_h/1.6506)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0588), ctrl_y + (ctrl_h/1.6310)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0588), ctrl_y + (ctrl_h/1.6118)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.8462), ctrl_y + (ctrl_h/1.4472)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.4545), ctrl_y + (ctrl_h/1.4784)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3846), ctrl_y + (ctrl_h/1.4838)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3333), ctrl_y + (ctrl_h/1.4784)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.1803), ctrl_y + (ctrl_h/1.4523)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.1077), ctrl_y + (ctrl_h/1.4421)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0746), ctrl_y + (ctrl_h/1.4731)))
+        ctrl_color.append((ctrl_x + (ctrl_w/18.0000), ctrl_y + (ctrl_h/1.4679)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.7895), ctrl_y + (ctrl_h/1.4371)))
+        ctrl_color.append((ctrl_x + (ctrl_w/16.0000), ctrl_y + (ctrl_h/1.3258)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.8919), ctrl_y + (ctrl_h/1.3258)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.4286), ctrl_y + (ctrl_h/1.3301)))
+        ctrl_color.append((ctrl_x + (ctrl_w/16.0000), ctrl_y + (ctrl_h/1.2088)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.6923), ctrl_y + (ctrl_h/1.2342)))
+        ctrl_color.append((ctrl_x + (ctrl_w/4.0000), ctrl_y + (ctrl_h/1.2018)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.2000), ctrl_y + (ctrl_h/1.1983)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.9200), ctrl_y + (ctrl_h/1.2342)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.4845), ctrl_y + (ctrl_h/1.1844)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3714), ctrl_y + (ctrl_h/1.1844)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0746), ctrl_y + (ctrl_h/1.2053)))
+        ctrl_color.append((ctrl_x + (ctrl_w/16.0000), ctrl_y + (ctrl_h/1.1048)))
+        ctrl_color.append((ctrl_x + (ctrl_w/4.2353), ctrl_y + (ctrl_h/1.1078)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3333), ctrl_y + (ctrl_h/1.1078)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.0667), ctrl_y + (ctrl_h/1.1048)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.3488), ctrl_y + (ctrl_h/1.0327)))
+        ctrl_color.append((ctrl_x + (ctrl_w/3.4286), ctrl_y + (ctrl_h/1.0512)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.4694), ctrl_y + (ctrl_h/1.0327)))
+        ctrl_color.append((ctrl_x + (ctrl_w/2.7692), ctrl_y + (ctrl_h/1.1982)))
+        ctrl_color.append((ctrl_x + (ctrl_w/2.0571), ctrl_y + (ctrl_h/1.2160)))
+        ctrl_color.append((ctrl_x + (ctrl_w/1.3211), ctrl_y + (ctrl_h/1.4784)))
+
+    return ctrl_remove, ctrl_update, ctrl_size, ctrl_brush, ctrl_opacity, ctrl_color
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+import math
+import time
+import cv2
+
+# The template of the painting control area, relative to the working directory (like in the executable folder)
+TEMPLATE_PATH = "opencv_template/rust_palette_template.png"
+
+# The scales of the template that are searched, the template grows by 3.5% per scale
+TEMPLATE_SCALES = [1.035 ** step for step in range(50)]
+
+# The least normalized correlation coefficient of a match
+MATCH_THRESHOLD = 0.8
+
+# The screenshot is downsampled to at most this width for the coarse search, the templates by the same factor
+COARSE_WIDTH = 960
+
+# The smallest width or height of a downsampled template, smaller templates are not matched reliably
+COARSE_MIN_SIZE = 12
+
+# The best candidates of the coarse search that are refined at full resolution
+REFINED_CANDIDATES = 3
+
+# The margin around a cached control area that is searched to confirm it, in pixels
+CONFIRM_MARGIN = 8
+
+# Template pyramids that are already built, by template path
+loaded_pyramids = {}
+
+
+class TemplatePyramid():
+
+    def __init__(self, template, scales = TEMPLATE_SCALES):
+        """ TemplatePyramid class init. The template resized to every scale, and the downsampled templates of the
+        coarse search (built once per downsampling factor).
+            template:   The grayscale template
+            scales:     The scales of the template
+        """
+        self.scales = scales
+        self.templates = []
+        for scale in scales:
+            size = (int(round(template.shape[1] * scale)), int(round(template.shape[0] * scale)))
+            self.templates.append(cv2.resize(template, size, interpolation=cv2.INTER_LINEAR))
+        self.coarse_templates = {}
+
+
+    def coarse(self, factor):
+        """ Returns:    The templates downsampled by factor, None for the templates that get too small """
+        if factor not in self.coarse_templates:
+            coarse_templates = []
+            for template in self.templates:
+                size = (template.shape[1] // factor, template.shape[0] // factor)
+                if min(size) < COARSE_MIN_SIZE:
+                    coarse_templates.append(None)
+                else:
+                    coarse_templates.append(cv2.resize(template, size, interpolation=cv2.INTER_AREA))
+            self.coarse_templates[factor] = coarse_templates
+        return self.coarse_templates[factor]
+
+
+def template_pyramid(path = TEMPLATE_PATH):
+    """ Returns:    The TemplatePyramid of the template at path, built only once. None if it can't be read """
+    if path not in loaded_pyramids:
+        template = cv2.imread(path, 0)
+        if template is None: return None
+        loaded_pyramids[path] = TemplatePyramid(template)
+    return loaded_pyramids[path]
+
+
+def best_match(image, template):
+    """ Returns:    The highest normalized correlation coefficient of template in image and its (x, y) """
+    if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+        return -1.0, (0, 0)
+    _, score, _, location = cv2.minMaxLoc(cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED))
+    return score, location
+
+
+def locate_template(screen_gray, pyramid, threshold = MATCH_THRESHOLD):
+    """ Find the template in a grayscale screenshot, coarse-to-fine. Every scale is matched against the
+    downsampled screenshot in parallel, then the best candidates are matched at full resolution only in the area
+    around their coarse match. The scales that are too small to downsample are matched at full resolution.
+    Returns:    (x, y, w, h) of the match or False if there is none, the index of the scale of the match (None
+                if there is none) and the timings as a list of (scale, seconds) of the coarse search of every
+                scale followed by ("refine", seconds)
+    """
+    screen_h, screen_w = screen_gray.shape
+    factor = max(1, int(math.ceil(screen_w / COARSE_WIDTH)))
+    coarse_screen = cv2.resize(screen_gray, (screen_w // factor, screen_h // factor), interpolation=cv2.INTER_AREA)
+    coarse_templates = pyramid.coarse(factor)
+
+    def coarse_match(index):
+        start = time.perf_counter()
+        if coarse_templates[index] is None:
+            score, location = best_match(screen_gray, pyramid.templates[index])
+            location = (location[0] // factor, location[1] // factor)
+        else:
+            score, location = best_match(coarse_screen, coarse_templates[index])
+        return score, location, time.perf_counter() - start
+
+    with ThreadPoolExecutor() as pool:
+        coarse_results = list(pool.map(coarse_match, range(len(pyramid.templates))))
+    timings = [(scale, seconds) for scale, (_, _, seconds) in zip(pyramid.scales, coarse_results)]
+
+    # Refine the best candidates in the area of their coarse match, a coarse pixel is factor pixels
+    start = time.perf_counter()
+    candidates = sorted(range(len(coarse_results)), key=lambda index: coarse_results[index][0], reverse=True)
+    best = (threshold, None, None)
+    for index in candidates[:REFINED_CANDIDATES]:
+        template = pyramid.templates[index]
+        x, y = coarse_results[index][1][0] * factor, coarse_results[index][1][1] * factor
+        left, top = max(x - (2 * factor), 0), max(y - (2 * factor), 0)
+        right = min(x + template.shape[1] + (2 * factor), screen_w)
+        bottom = min(y + template.shape[0] + (2 * factor), screen_h)
+
+        score, location = best_match(screen_gray[top:bottom, left:right], template)
+        if score >= best[0]:
+            best = (score, (left + location[0], top + location[1], template.shape[1], template.shape[0]), index)
+    timings.append(("refine", time.perf_counter() - start))
+
+    if best[1] is None: return False, None, timings
+    return best[1], best[2], timings
+
+
+def confirm_region(area, screen_size, margin = CONFIRM_MARGIN):
+    """ Returns:    (x, y, w, h) of the region of the screen around area that is captured to confirm it """
+    x, y, w, h = area
+    left, top = max(x - margin, 0), max(y - margin, 0)
+    right, bottom = min(x + w + margin, screen_size[0]), min(y + h + margin, screen_size[1])
+    return left, top, right - left, bottom - top
+
+
+def confirm_template(region_gray, region, template, threshold = MATCH_THRESHOLD):
+    """ Match a single scale of the template only in a small region of the screen (see confirm_region), which
+    takes a few milliseconds instead of a full search.
+        region_gray:    The grayscale pixels of the region
+        region:         (x, y, w, h) of the region on the screen
+        template:       The template of the cached scale
+    Returns:    (x, y, w, h) of the match on the screen or False if the template is not in the region
+    """
+    score, location = best_match(region_gray, template)
+    if score < threshold: return False
+    return region[0] + location[0], region[1] + location[1], template.shape[1], template.shape[0]
+
+
+class CtrlAreaCache():
+
+    def __init__(self, settings):
+        """ CtrlAreaCache class init. The control areas that were found, per screen size and template scale. The
+        painting controls stay at the same place for a given resolution and UI scale, so a cached area only has
+        to be confirmed.
+            settings:   The QSettings (or anything with the same value(key, default) & setValue(key, value))
+        """
+        self.settings = settings
+
+
+    def key(self, screen_size, scale_index):
+        """ Returns:    The settings key of the area of screen_size (w, h) and scale_index """
+        return "ctrl_area_cache/" + str(screen_size[0]) + "x" + str(screen_size[1]) + "/" + str(scale_index)
+
+
+    def areas(self, screen_size):
+        """ Returns:    A list of (scale_index, (x, y, w, h)) of the areas that were found on screen_size """
+        areas = []
+        for scale_index in range(len(TEMPLATE_SCALES)):
+            value = self.settings.value(self.key(screen_size, scale_index), "")
+            if value:
+                areas.append((scale_index, tuple(int(number) for number in value.split(","))))
+        return areas
+
+
+    def store(self, screen_size, scale_index, area):
+        """ Save the area that was found on screen_size at scale_index """
+        self.settings.setValue(self.key(screen_size, scale_index), ",".join(str(int(number)) for number in area))
+
+
+    def scale_of(self, screen_size, area):
+        """ Returns:    The scale_index of area if it is a cached area of screen_size, else None """
+        for scale_index, cached_area in self.areas(screen_size):
+            if cached_area == tuple(area):
+                return scale_index
+        return None
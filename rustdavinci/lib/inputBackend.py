@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+import sys
+
+from lib.inputPacer import InputPacer
+from lib.ctrlArea import ctrl_tools_positioning, ctrl_size_footprints
+from lib.rustPaletteData import rust_palette
+
+
+class InputBackend():
+
+    def __init__(self):
+        """ The mouse & keyboard input used by the painting engine. A backend implements click, mouse_down,
+        mouse_up, move_to, key_down and key_up. Every input event is followed by a pause of self.pause seconds,
+        the input events of a line by self.line_pause. The events are paced by self.pacer.
+        """
+        self.pause = 0
+        self.line_pause = 0
+        self.pacer = InputPacer()
+
+
+    def set_pause(self, seconds, line_seconds = None):
+        """ Set the pause after every input event, and after the input events of a line (the same if None) """
+        self.pause = seconds
+        self.line_pause = seconds if line_seconds == None else line_seconds
+
+
+    def sleep(self, seconds):
+        """ Wait for seconds before the next input event """
+        self.pacer.delay(seconds)
+
+
+    def click(self, x, y):
+        """ Click the left mouse button at x, y """
+        raise NotImplementedError
+
+
+    def mouse_down(self, x, y):
+        """ Press the left mouse button at x, y """
+        raise NotImplementedError
+
+
+    def mouse_up(self):
+        """ Release the left mouse button """
+        raise NotImplementedError
+
+
+    def move_to(self, x, y):
+        """ Move the mouse to x, y """
+        raise NotImplementedError
+
+
+    def key_down(self, key):
+        """ Press key """
+        raise NotImplementedError
+
+
+    def key_up(self, key):
+        """ Release key """
+        raise NotImplementedError
+
+
+    def screenshot(self, x, y, w, h):
+        """ Returns:    The rgb pixels of the area of the screen (h x w x 3) """
+        raise NotImplementedError
+
+
+    def shift_drag(self, point_A, point_B):
+        """ Drag the mouse from point_A to point_B while shift is held, which draws a straight line. Its input
+        events are followed by self.line_pause. """
+        click_pause, self.pause = self.pause, self.line_pause
+        try:
+            self.mouse_down(point_A[0], point_A[1])
+            self.key_down("shift")
+            self.move_to(point_B[0], point_B[1])
+            self.key_up("shift")
+            self.mouse_up()
+        finally:
+            self.pause = click_pause
+
+
+class PyAutoGUIBackend(InputBackend):
+
+    def __init__(self):
+        """ Input through pyautogui, the pauses are kept by the pacer instead of pyautogui.PAUSE """
+        super(PyAutoGUIBackend, self).__init__()
+        # Imported here so that the other backends can be used on machines without a display
+        import pyautogui
+        self.pyautogui = pyautogui
+        self.pyautogui.PAUSE = 0
+
+        # The sleep of windows has a resolution of 15.6 ms by default, 1 ms is enough for the pacer
+        if sys.platform == "win32":
+            import ctypes
+            ctypes.windll.winmm.timeBeginPeriod(1)
+
+
+    def click(self, x, y):
+        self.pacer.issue(self.pause)
+        self.pyautogui.click(x, y)
+
+
+    def mouse_down(self, x, y):
+        self.pacer.issue(self.pause)
+        self.pyautogui.mouseDown(button="left", x=x, y=y)
+
+
+    def mouse_up(self):
+        self.pacer.issue(self.pause)
+        self.pyautogui.mouseUp(button="left")
+
+
+    def move_to(self, x, y):
+        self.pacer.issue(self.pause)
+        self.pyautogui.moveTo(x, y)
+
+
+    def key_down(self, key):
+        self.pacer.issue(self.pause)
+        self.pyautogui.keyDown(key)
+
+
+    def key_up(self, key):
+        self.pacer.issue(self.pause)
+        self.pyautogui.keyUp(key)
+
+
+    def screenshot(self, x, y, w, h):
+        """ The screenshot waits for the pause after the last input event, so that the game had time to draw it """
+        self.pacer.wait()
+        return numpy.asarray(self.pyautogui.screenshot(region=(x, y, w, h)).convert("RGB"))
+
+
+class SimulatedCanvasBackend(InputBackend):
+
+    def __init__(self, canvas_area, ctrl_area, use_hidden_colors, background = 255):
+        """ Input that is rasterized into an in-memory canvas instead of being sent to the game.
+        Clicks on the painting controls (located like calculate_ctrl_tools_positioning does) change the
+        simulated brush and clicks, drags & lines on the canvas area paint self.canvas with the palette index
+        of the current color. Pauses and sleeps are not waited for, they are added to self.elapsed.
+            canvas_area:        (x, y, w, h) of the canvas on the screen
+            ctrl_area:          (x, y, w, h) of the painting control area on the screen
+            use_hidden_colors:  If the hidden colors are part of the palette
+            background:         The initial palette index of every canvas pixel
+        """
+        super(SimulatedCanvasBackend, self).__init__()
+        self.canvas_x, self.canvas_y, canvas_w, canvas_h = canvas_area
+        self.canvas = numpy.full((canvas_h, canvas_w), background, dtype=numpy.uint8)
+        self.colors_per_opacity = 64 if use_hidden_colors else 20
+
+        # The rgb colors of the palette indices (the palette without a skipped background color), for screenshots
+        palette = [color for i, color in enumerate(rust_palette) if (i % 64) < self.colors_per_opacity]
+        self.palette = numpy.array(palette + [(255, 255, 255)] * (256 - len(palette)), dtype=numpy.uint8)
+
+        # Every control as (x, y, type, index)
+        ctrl_remove, ctrl_update, ctrl_size, ctrl_brush, ctrl_opacity, ctrl_color = ctrl_tools_positioning(
+            ctrl_area[0], ctrl_area[1], ctrl_area[2], ctrl_area[3], use_hidden_colors)
+        self.controls = [(ctrl_remove[0], ctrl_remove[1], "remove", 0), (ctrl_update[0], ctrl_update[1], "update", 0)]
+        for ctrl_type, positions in (("size", ctrl_size), ("brush", ctrl_brush), ("opacity", ctrl_opacity), ("color", ctrl_color)):
+            self.controls += [(x, y, ctrl_type, index) for index, (x, y) in enumerate(positions)]
+        self.ctrl_area = ctrl_area
+
+        # The simulated brush
+        self.size = 0
+        self.brush = 0
+        self.opacity = 5
+        self.color = 0
+
+        self.mouse = (0, 0)
+        self.is_mouse_down = False
+        self.keys_down = set()
+
+        # Statistics
+        self.events = 0
+        self.ctrl_clicks = 0
+        self.canvas_updates = 0
+        self.elapsed = 0
+
+
+    def sleep(self, seconds):
+        self.elapsed += seconds
+
+
+    def click(self, x, y):
+        self.mouse = (x, y)
+        if not self.click_control(x, y):
+            self.paint(x, y, x, y)
+        self.event()
+
+
+    def mouse_down(self, x, y):
+        self.mouse = (x, y)
+        self.is_mouse_down = True
+        self.paint(x, y, x, y)
+        self.event()
+
+
+    def mouse_up(self):
+        self.is_mouse_down = False
+        self.event()
+
+
+    def move_to(self, x, y):
+        if self.is_mouse_down:
+            self.paint(self.mouse[0], self.mouse[1], x, y)
+        self.mouse = (x, y)
+        self.event()
+
+
+    def key_down(self, key):
+        self.keys_down.add(key)
+        self.event()
+
+
+    def key_up(self, key):
+        self.keys_down.discard(key)
+        self.event()
+
+
+    def screenshot(self, x, y, w, h):
+        """ The canvas in the colors of the palette, the rest of the screen is black """
+        screen = numpy.zeros((h, w, 3), dtype=numpy.uint8)
+        canvas_h, canvas_w = self.canvas.shape
+        left, top = max(x, self.canvas_x), max(y, self.canvas_y)
+        right, bottom = min(x + w, self.canvas_x + canvas_w), min(y + h, self.canvas_y + canvas_h)
+        if left < right and top < bottom:
+            screen[top - y:bottom - y, left - x:right - x] = self.palette[self.canvas[  top - self.canvas_y:bottom - self.canvas_y,
+                                                                                        left - self.canvas_x:right - self.canvas_x]]
+        return screen
+
+
+    def event(self):
+        """ Count an input event and the pause that follows it """
+        self.events += 1
+        self.elapsed += self.pause
+
+
+    def click_control(self, x, y):
+        """ Apply a click on the painting control area.
+        Returns:    True, if x, y is on one of the painting controls
+        """
+        ctrl_x, ctrl_y, ctrl_w, ctrl_h = self.ctrl_area
+        if not (ctrl_x <= x <= ctrl_x + ctrl_w and ctrl_y <= y <= ctrl_y + ctrl_h):
+            return False
+
+        distance, ctrl_type, index = min(((ctrl[0] - x)**2 + (ctrl[1] - y)**2, ctrl[2], ctrl[3]) for ctrl in self.controls)
+        if distance > 1: return False
+
+        self.ctrl_clicks += 1
+        if ctrl_type == "size": self.size = index
+        elif ctrl_type == "brush": self.brush = index
+        elif ctrl_type == "opacity": self.opacity = index
+        elif ctrl_type == "color": self.color = index
+        elif ctrl_type == "update": self.canvas_updates += 1
+        return True
+
+
+    def current_color(self):
+        """ Returns:    The palette index of the selected color and opacity (see choose_painting_controls) """
+        return ((5 - self.opacity) * self.colors_per_opacity) + self.color
+
+
+    def paint(self, x0, y0, x1, y1):
+        """ Paint a stroke from screen coordinate x0, y0 to x1, y1 with the current brush """
+        x0, y0 = int(round(x0 - self.canvas_x)), int(round(y0 - self.canvas_y))
+        x1, y1 = int(round(x1 - self.canvas_x)), int(round(y1 - self.canvas_y))
+        footprint = ctrl_size_footprints[self.size]
+        offset = footprint // 2
+        color = self.current_color()
+        height, width = self.canvas.shape
+
+        # Horizontal and vertical strokes cover a rectangle
+        if x0 == x1 or y0 == y1:
+            right, bottom = max(x0, x1) - offset + footprint, max(y0, y1) - offset + footprint
+            if right <= 0 or bottom <= 0: return
+            left, top = max(min(x0, x1) - offset, 0), max(min(y0, y1) - offset, 0)
+            self.canvas[top:bottom, left:right] = color
+            return
+
+        steps = max(abs(x1 - x0), abs(y1 - y0)) + 1
+        xs = numpy.rint(numpy.linspace(x0, x1, steps)).astype(int) - offset
+        ys = numpy.rint(numpy.linspace(y0, y1, steps)).astype(int) - offset
+
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            if x + footprint <= 0 or y + footprint <= 0 or x >= width or y >= height: continue
+            self.canvas[max(y, 0):y + footprint, max(x, 0):x + footprint] = color
+
+
+class DroppingCanvasBackend(SimulatedCanvasBackend):
+
+    def __init__(self, canvas_area, ctrl_area, use_hidden_colors, background = 255, click_threshold = 0, line_threshold = 0, ctrl_area_threshold = 0):
+        """ A SimulatedCanvasBackend that loses the input the game would not keep up with, to test the delays.
+            click_threshold:        A click on the canvas is lost if it comes sooner (seconds) after the last input
+            line_threshold:         A line is lost if the pause between its input events is shorter
+            ctrl_area_threshold:    A click on the painting controls has no effect if the next input comes sooner
+        The other arguments are those of SimulatedCanvasBackend.
+        """
+        super(DroppingCanvasBackend, self).__init__(canvas_area, ctrl_area, use_hidden_colors, background)
+        self.click_threshold = click_threshold
+        self.line_threshold = line_threshold
+        self.ctrl_area_threshold = ctrl_area_threshold
+
+        # The time since the last input event, and the brush before the last click on the painting controls
+        self.gap = float("inf")
+        self.previous_brush = None
+        self.dropped = 0
+
+
+    def sleep(self, seconds):
+        super(DroppingCanvasBackend, self).sleep(seconds)
+        self.gap += seconds
+
+
+    def event(self):
+        super(DroppingCanvasBackend, self).event()
+        self.gap = self.pause
+
+
+    def settle_controls(self):
+        """ Undo the last click on the painting controls if the controls did not have time to update """
+        if self.previous_brush != None and self.gap < self.ctrl_area_threshold:
+            self.size, self.brush, self.opacity, self.color = self.previous_brush
+            self.dropped += 1
+        self.previous_brush = None
+
+
+    def click(self, x, y):
+        self.settle_controls()
+        self.mouse = (x, y)
+        brush = (self.size, self.brush, self.opacity, self.color)
+        if self.click_control(x, y):
+            self.previous_brush = brush
+        elif self.gap >= self.click_threshold:
+            self.paint(x, y, x, y)
+        else:
+            self.dropped += 1
+        self.event()
+
+
+    def shift_drag(self, point_A, point_B):
+        self.settle_controls()
+        if self.line_pause >= self.line_threshold:
+            super(DroppingCanvasBackend, self).shift_drag(point_A, point_B)
+            return
+
+        # The five input events of the line, without painting it
+        self.dropped += 1
+        self.mouse = point_B
+        click_pause, self.pause = self.pause, self.line_pause
+        for _ in range(5): self.event()
+        self.pause = click_pause
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import deque
+
+import numpy
+import time
+
+# The last part of a wait (in seconds) that is spun instead of slept, the sleep of the os overshoots
+PACER_SPIN = 0.002
+
+# The most input events whose scheduled & actual times are kept for the statistics
+PACER_HISTORY = 100000
+
+
+class InputPacer():
+
+    def __init__(self, spin = PACER_SPIN, history = PACER_HISTORY):
+        """ InputPacer class init. Issues the input events at absolute deadlines of the monotonic clock, every
+        event is due the pause of the previous event after the previous event was issued. The time it takes to
+        send an event is part of the pause (pyautogui.PAUSE comes after it), and the wait sleeps until spin
+        seconds before the deadline and spins the rest, so that sleep overshoot does not add up. The scheduled
+        and actual time of every event are recorded for the lateness statistics.
+            spin:       The last part of a wait that is spun, in seconds
+            history:    The most events that are recorded
+        """
+        self.spin = spin
+        self.deadline = None
+        self.scheduled = deque(maxlen=history)
+        self.actual = deque(maxlen=history)
+
+
+    def reset(self):
+        """ Forget the deadline, the next event is issued at once (the painting was paused or is started) """
+        self.deadline = None
+
+
+    def clear(self):
+        """ Forget the recorded events """
+        self.scheduled.clear()
+        self.actual.clear()
+
+
+    def delay(self, seconds):
+        """ Move the deadline of the next event seconds later, this is a sleep between two events """
+        if self.deadline == None:
+            self.deadline = time.perf_counter()
+        self.deadline += seconds
+
+
+    def wait(self):
+        """ Wait for the deadline, if there is one.
+        Returns:    The time (time.perf_counter) when the wait ended
+        """
+        now = time.perf_counter()
+        if self.deadline == None or now >= self.deadline:
+            return now
+
+        if self.deadline - now > self.spin:
+            time.sleep(self.deadline - now - self.spin)
+        while now < self.deadline:
+            now = time.perf_counter()
+        return now
+
+
+    def issue(self, pause):
+        """ Wait until the next input event is due and record it, call it right before the event is sent.
+            pause:  The seconds after this event before the next event is due
+        """
+        deadline = self.deadline
+        now = self.wait()
+        if deadline != None:
+            self.scheduled.append(deadline)
+            self.actual.append(now)
+        self.deadline = now + pause
+
+
+    def lateness(self):
+        """ Returns:    The seconds every recorded event was issued after its deadline, as a numpy array """
+        return numpy.array(self.actual) - numpy.array(self.scheduled)
+
+
+    def statistics(self):
+        """ Returns:    A dict of events (the number of recorded events) and the p50, p99 and max lateness in
+                        seconds, or None if no event was recorded
+        """
+        if len(self.actual) == 0: return None
+        lateness = self.lateness()
+        p50, p99 = numpy.percentile(lateness, [50, 99])
+        return {"events": len(lateness), "p50": float(p50), "p99": float(p99), "max": float(lateness.max())}
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass, fields
+from typing import Tuple
+
+from lib.color_functions import hex_to_rgb
+from ui.settings.default_settings import default_settings
+
+
+def to_bool(value):
+    """ Convert a settings value to bool, the ini backend of QSettings returns the numbers as strings """
+    if isinstance(value, str):
+        return value.strip().lower() not in ("", "0", "false")
+    return bool(value)
+
+
+def to_tuple(value):
+    """ Convert a settings value to a tuple of strings, QSettings returns a single string for a one item list """
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        return (value, )
+    return tuple(str(item) for item in value)
+
+
+@dataclass(frozen=True)
+class PaintConfig():
+    """ An immutable snapshot of the settings, read once when a painting (or an image) is prepared and passed to
+    every step of it. The fields have the names of the settings, the delays are in milliseconds.
+    """
+    window_topmost: bool = bool(default_settings["window_topmost"])
+    quality: int = default_settings["quality"]
+    ctrl_x: int = default_settings["ctrl_x"]
+    ctrl_y: int = default_settings["ctrl_y"]
+    ctrl_w: int = default_settings["ctrl_w"]
+    ctrl_h: int = default_settings["ctrl_h"]
+    skip_background_color: bool = bool(default_settings["skip_background_color"])
+    background_color: str = default_settings["background_color"]
+    skip_colors: Tuple[str, ...] = tuple(default_settings["skip_colors"])
+    pause_key: str = default_settings["pause_key"]
+    skip_key: str = default_settings["skip_key"]
+    abort_key: str = default_settings["abort_key"]
+    update_canvas: bool = bool(default_settings["update_canvas"])
+    update_canvas_end: bool = bool(default_settings["update_canvas_end"])
+    draw_lines: bool = bool(default_settings["draw_lines"])
+    double_click: bool = bool(default_settings["double_click"])
+    show_information: bool = bool(default_settings["show_information"])
+    show_preview_load: bool = bool(default_settings["show_preview_load"])
+    hide_preview_paint: bool = bool(default_settings["hide_preview_paint"])
+    paint_background: bool = bool(default_settings["paint_background"])
+    brush_opacities: bool = bool(default_settings["brush_opacities"])
+    hidden_colors: bool = bool(default_settings["hidden_colors"])
+    click_delay: int = default_settings["click_delay"]
+    ctrl_area_delay: int = default_settings["ctrl_area_delay"]
+    line_delay: int = default_settings["line_delay"]
+    minimum_line_width: int = default_settings["minimum_line_width"]
+    brush_type: int = default_settings["brush_type"]
+    large_brushes: bool = bool(default_settings["large_brushes"])
+    lab_colors: bool = bool(default_settings["lab_colors"])
+    verify_painting: bool = bool(default_settings["verify_painting"])
+
+
+    @classmethod
+    def from_settings(cls, settings):
+        """ Read every setting once from settings (a QSettings or anything with the same value(key, default)),
+        the settings that are not set get their default value.
+        Returns:    The PaintConfig
+        """
+        converters = {bool: to_bool, int: int, str: str, Tuple[str, ...]: to_tuple}
+        values = {}
+        for field in fields(cls):
+            value = settings.value(field.name, default_settings[field.name])
+            values[field.name] = converters[field.type](value)
+        return cls(**values)
+
+
+    @property
+    def colors_per_opacity(self):
+        """ Returns:    The number of colors of every opacity of the palette """
+        return 64 if self.hidden_colors else 20
+
+
+    @property
+    def background_rgb(self):
+        """ Returns:    The background color as (r, g, b) """
+        return hex_to_rgb(self.background_color)
+
+
+    @property
+    def delays(self):
+        """ Returns:    The click, line and control area delays in seconds """
+        return self.click_delay / 1000, self.line_delay / 1000, self.ctrl_area_delay / 1000
+
+
+    @property
+    def has_ctrl_area(self):
+        """ Returns:    True if the painting control area has been located """
+        return self.ctrl_w != 0 and self.ctrl_h != 0
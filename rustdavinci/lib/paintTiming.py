@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import datetime
+import numpy
+import json
+import os
+
+from lib.costModel import CostModel
+
+# The operations of a painting that are timed, the estimated time of each is fitted from the history
+OPERATIONS = ("clicks", "lines", "ctrl_clicks")
+
+# The keys of a recorded painting
+RECORD_KEYS = ("delays", "double_click", "counts", "times", "planned", "estimated_time", "actual_time", "completed")
+
+# The most paintings kept in the history file, the oldest are removed first
+HISTORY_SIZE = 200
+
+# A painting with fewer operations of a kind is not used to fit the time of that kind
+MIN_OPERATIONS = 20
+
+# The delays (in seconds) of a past painting match the current delays if they differ by at most this
+DELAY_TOLERANCE = 0.0005
+
+# The fewest past paintings that are needed for the confidence interval and the error of the estimate
+MIN_PAINTINGS = 3
+
+# The z value of the confidence interval of the estimate (95%)
+CONFIDENCE_Z = 1.96
+
+
+def nominal_times(delays, use_double_click):
+    """ The time of every operation that the delays alone account for.
+        delays:             The click, line and control area delays in seconds
+    Returns:    A dict of operation: seconds
+    """
+    click_delay, line_delay, ctrl_area_delay = delays
+    click_time = click_delay * 2 if use_double_click else click_delay
+    return {"clicks": click_time, "lines": line_delay * 5, "ctrl_clicks": click_time + ctrl_area_delay}
+
+
+class PaintTelemetry():
+
+    def __init__(self):
+        """ PaintTelemetry class init. The number and the total time of the operations of a painting. An
+        operation lasts from when it starts until the next operation starts, so its pauses are part of it. The
+        time while the painting is paused is not counted.
+        """
+        self.reset()
+
+
+    def reset(self):
+        """ Forget the timed operations """
+        self.counts = {operation: 0 for operation in OPERATIONS}
+        self.times = {operation: 0.0 for operation in OPERATIONS}
+        self.current = None
+
+
+    def start(self, operation, now):
+        """ Start operation at now (time.perf_counter), the current operation ends """
+        self.stop(now)
+        self.current = (operation, now)
+
+
+    def stop(self, now):
+        """ End the current operation at now """
+        if self.current != None:
+            operation, start = self.current
+            self.counts[operation] += 1
+            self.times[operation] += now - start
+        self.current = None
+
+
+    def discard(self):
+        """ Do not count the current operation (the painting was paused or aborted) """
+        self.current = None
+
+
+    @property
+    def total_time(self):
+        """ Returns:    The total time of the timed operations """
+        return sum(self.times.values())
+
+
+class TimingHistory():
+
+    def __init__(self, path):
+        """ TimingHistory class init. The timed operations of the past paintings, one JSON line per painting.
+            path:   The history file
+        """
+        self.path = path
+
+
+    def append(self, telemetry, delays, use_double_click, planned, estimated_time, completed):
+        """ Add a painting to the history, only the last HISTORY_SIZE paintings are kept.
+            telemetry:          The PaintTelemetry of the painting
+            delays:             The click, line and control area delays in seconds
+            use_double_click:   If every click was a double click
+            planned:            A dict of operation: the number of operations the estimate was made for
+            estimated_time:     The estimated time of the painting
+            completed:          If the painting was completed
+        """
+        record = {  "created": datetime.datetime.now().isoformat(),
+                    "delays": [float(delay) for delay in delays],
+                    "double_click": bool(use_double_click),
+                    "counts": telemetry.counts,
+                    "times": telemetry.times,
+                    "planned": {operation: int(planned[operation]) for operation in OPERATIONS},
+                    "estimated_time": float(estimated_time),
+                    "actual_time": telemetry.total_time,
+                    "completed": bool(completed)}
+
+        records = self.load()[-(HISTORY_SIZE - 1):] + [record]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            for past_record in records:
+                f.write(json.dumps(past_record) + "\n")
+        os.replace(self.path + ".tmp", self.path)
+
+
+    def load(self):
+        """ Returns:    The list of the recorded paintings, the lines that can't be read are left out """
+        records = []
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and all(key in record for key in RECORD_KEYS):
+                        records.append(record)
+        except OSError:
+            return []
+        return records
+
+
+    def cost_model(self, delays, use_double_click, records = None, exclude = None):
+        """ Fit the time of every operation at delays from the history. The past paintings with the same delays
+        give the mean time of the operation directly, else the time that the paintings took on top of their delays
+        is added to the delays. The operations without history keep the estimate of CostModel.
+            delays:             The click, line and control area delays in seconds
+            use_double_click:   If every click is a double click
+            records:            The recorded paintings, loaded if None
+            exclude:            The index of a record that is left out
+        Returns:    The CostModel
+        """
+        if records == None: records = self.load()
+        default = CostModel(*delays, use_double_click)
+        times = {"clicks": default.click_time, "lines": default.line_time, "ctrl_clicks": default.ctrl_click_time}
+        nominal = nominal_times(delays, use_double_click)
+
+        for operation in OPERATIONS:
+            matching, excess = [], []
+            for index, record in enumerate(records):
+                count = record["counts"][operation]
+                if index == exclude or count < MIN_OPERATIONS: continue
+                mean_time = record["times"][operation] / count
+                record_nominal = nominal_times(record["delays"], record["double_click"])[operation]
+                excess.append((count, mean_time - record_nominal))
+                if abs(record_nominal - nominal[operation]) <= DELAY_TOLERANCE:
+                    matching.append((count, mean_time))
+
+            if matching:
+                counts, mean_times = numpy.array(matching).T
+                times[operation] = float(numpy.average(mean_times, weights=counts))
+            elif excess:
+                counts, excess_times = numpy.array(excess).T
+                times[operation] = nominal[operation] + max(float(numpy.average(excess_times, weights=counts)), 0)
+
+        return CostModel(*delays, use_double_click, times=(times["clicks"], times["lines"], times["ctrl_clicks"]))
+
+
+    def errors(self, records = None):
+        """ The error of the estimate on the completed past paintings, every painting is estimated from the rest
+        of the history.
+        Returns:    A numpy array of the relative errors, (actual time / estimated time) - 1
+        """
+        if records == None: records = self.load()
+        errors = []
+        for index, record in enumerate(records):
+            if not record["completed"] or record["actual_time"] <= 0: continue
+            cost_model = self.cost_model(record["delays"], record["double_click"], records, exclude=index)
+            estimated_time = cost_model.operations_time(record["planned"])
+            if estimated_time > 0:
+                errors.append((record["actual_time"] / estimated_time) - 1)
+        return numpy.array(errors)
+
+
+    def estimate(self, estimated_time, records = None):
+        """ The confidence interval of an estimated time and the error of the estimate on the past paintings.
+        Returns:    (low, high) seconds or None if there are fewer than MIN_PAINTINGS past paintings, and the
+                    median absolute relative error on the past paintings (None as well)
+        """
+        errors = self.errors(records)
+        if len(errors) < MIN_PAINTINGS:
+            return None, None
+
+        mean, deviation = float(errors.mean()), float(errors.std(ddof=1))
+        low = max(estimated_time * (1 + mean - (CONFIDENCE_Z * deviation)), 0)
+        high = estimated_time * (1 + mean + (CONFIDENCE_Z * deviation))
+        return (low, high), float(numpy.median(numpy.abs(errors)))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from lib.verification import VERIFY_PASSES
+from lib.paintTiming import PaintTelemetry
+
+import time
+
+# The shortest time (in seconds) between two progress signals, the progress in between is coalesced
+PROGRESS_INTERVAL = 0.1
+
+# The shortest time (in seconds) between two saves of the checkpoint cursor
+CHECKPOINT_INTERVAL = 2
+
+
+class PaintWorker(QObject):
+    """ Runs the painting engine on a worker thread (moveToThread a QThread and connect its started signal to
+    run), so that the timing of the input is not disturbed by the GUI event loop. The GUI is updated through
+    the signals, they are delivered to the GUI thread by queued connections.
+    """
+    log = pyqtSignal(str)
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(bool)
+
+    def __init__(self, painter, plan, canvas_area, palette, brush_type, background_color = None, update_canvas = True, update_canvas_end = True, start_stroke = 0, checkpoint = None, verification = None):
+        """ PaintWorker class init, the arguments are the arguments of Painter.paint. If checkpoint is given, the
+        painting (unless it is resumed) and its cursor are saved to it and it is cleared when the painting is completed.
+        If verification (a CanvasVerification) is given, the pixels that do not match the image are repainted after
+        the painting.
+        """
+        QObject.__init__(self)
+        self.painter = painter
+        self.paint_args = (plan, canvas_area, palette, brush_type, background_color, update_canvas, update_canvas_end, start_stroke)
+        self.last_progress_time = 0
+        self.pending_progress = None
+        self.checkpoint = checkpoint
+        self.verification = verification
+        self.last_checkpoint_time = 0
+        self.cursor = None
+
+        # The repairs are not part of the estimated painting, they are timed apart from it
+        self.repair_telemetry = PaintTelemetry()
+
+
+    def report_progress(self, percent):
+        """ Emit the progress at most every PROGRESS_INTERVAL, the latest progress is kept until then """
+        self.pending_progress = percent
+        now = time.perf_counter()
+        if now - self.last_progress_time >= PROGRESS_INTERVAL:
+            self.last_progress_time = now
+            self.progress.emit(self.pending_progress)
+            self.pending_progress = None
+
+
+    def report_checkpoint(self, color_index, stroke_index):
+        """ Save the cursor at most every CHECKPOINT_INTERVAL, the latest cursor is saved when the painting stops """
+        self.cursor = (color_index, stroke_index)
+        now = time.perf_counter()
+        if now - self.last_checkpoint_time >= CHECKPOINT_INTERVAL:
+            self.last_checkpoint_time = now
+            self.save_checkpoint()
+
+
+    def save_checkpoint(self):
+        """ Save the latest cursor, a failed save does not stop the painting """
+        try:
+            self.checkpoint.save_cursor(*self.cursor)
+        except OSError as e:
+            self.log.emit("ERROR! Could not save the checkpoint: " + str(e))
+
+
+    def report_pacing(self):
+        """ Log how late the input events of the painting were issued, compared to their deadlines """
+        statistics = self.painter.backend.pacer.statistics()
+        if statistics is None: return
+        self.log.emit(  "Input lateness: p50 " + str(round(statistics["p50"] * 1000, 2)) + " ms, p99 " +
+                        str(round(statistics["p99"] * 1000, 2)) + " ms, max " + str(round(statistics["max"] * 1000, 2)) +
+                        " ms (" + str(statistics["events"]) + " events)")
+
+
+    def verify(self):
+        """ Compare the canvas with the image and repaint the pixels that do not match, at most VERIFY_PASSES times.
+        The colors that were skipped are not repaired. The repairs are timed in repair_telemetry, not in the
+        telemetry of the painter.
+        Returns:    False, if a repair was aborted
+        """
+        telemetry = self.painter.telemetry
+        self.painter.telemetry = self.repair_telemetry
+        try:
+            return self.repair()
+        finally:
+            self.painter.telemetry = telemetry
+            if self.repair_telemetry.total_time > 0:
+                self.log.emit("Repairs took " + str(round(self.repair_telemetry.total_time, 1)) + " s")
+
+
+    def repair(self):
+        """ The repair passes of verify.
+        Returns:    False, if a repair was aborted
+        """
+        _, canvas_area, palette, brush_type, _, update_canvas, update_canvas_end, _ = self.paint_args
+        skipped_colors = list(self.painter.skipped_colors)
+        for verify_pass in range(VERIFY_PASSES):
+            self.log.emit("Verifying the painting...")
+            repair = self.verification.repair_plan(skipped_colors)
+            if len(repair) == 0:
+                self.log.emit("The painting matches the image")
+                return True
+
+            self.log.emit("Repairing " + str(repair.pixels) + " pixels...")
+            if not self.painter.paint(repair, canvas_area, palette, brush_type, None, update_canvas, update_canvas_end):
+                return False
+            skipped_colors += self.painter.skipped_colors
+        return True
+
+
+    def run(self):
+        """ Paint, emits finished with True if the painting was completed and False if it was aborted """
+        self.painter.log = self.log.emit
+        self.painter.progress = self.report_progress
+        plan, canvas_area, palette, brush_type, _, update_canvas, update_canvas_end, start_stroke = self.paint_args
+        if self.checkpoint is not None and start_stroke == 0:
+            try:
+                self.checkpoint.start(  plan, canvas_area, palette, brush_type, update_canvas, update_canvas_end,
+                                        self.painter.colors_per_opacity)
+            except OSError as e:
+                self.log.emit("ERROR! Could not save the checkpoint: " + str(e))
+                self.checkpoint = None
+        if self.checkpoint is not None:
+            self.painter.checkpoint = self.report_checkpoint
+        self.painter.backend.pacer.clear()
+        self.painter.telemetry.reset()
+        self.repair_telemetry.reset()
+
+        completed = False
+        try:
+            completed = self.painter.paint(*self.paint_args)
+            self.painter.checkpoint = lambda color_index, stroke_index: None
+            if completed and self.verification is not None:
+                completed = self.verify()
+        except Exception as e:
+            self.log.emit("ERROR! The painting failed: " + str(e))
+        finally:
+            self.painter.log = lambda text: None
+            self.painter.progress = lambda percent: None
+            self.painter.checkpoint = lambda color_index, stroke_index: None
+        self.report_pacing()
+
+        if self.checkpoint is not None:
+            if completed:
+                self.checkpoint.clear()
+            elif self.cursor is not None:
+                self.save_checkpoint()
+
+        if self.pending_progress is not None:
+            self.progress.emit(self.pending_progress)
+        self.finished.emit(completed)
+
+
+class CalibrationWorker(QObject):
+    """ Runs a DelayCalibration on a worker thread, like PaintWorker. finished is emitted with the calibrated
+    delays, or None if the calibration failed or was aborted.
+    """
+    log = pyqtSignal(str)
+    finished = pyqtSignal(object)
+
+    def __init__(self, calibration):
+        """ CalibrationWorker class init """
+        QObject.__init__(self)
+        self.calibration = calibration
+
+
+    def run(self):
+        """ Calibrate the delays """
+        self.calibration.log = self.log.emit
+        delays = None
+        try:
+            delays = self.calibration.calibrate()
+        except Exception as e:
+            self.log.emit("ERROR! The calibration failed: " + str(e))
+        finally:
+            self.calibration.log = lambda text: None
+
+        self.finished.emit(delays)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+
+from lib.color_functions import rgb_to_hex
+from lib.ctrlArea import ctrl_tools_positioning
+from lib.paintTiming import PaintTelemetry
+from lib.strokePlan import LINE
+
+
+class Painter():
+
+    def __init__(self, backend):
+        """ Painter class init. The painting engine, it replays a stroke plan through an input backend. """
+        self.backend = backend
+
+        # Painting control tools
+        self.ctrl_remove = 0
+        self.ctrl_update = 0
+        self.ctrl_size = []
+        self.ctrl_brush = []
+        self.ctrl_opacity = []
+        self.ctrl_color = []
+        self.current_ctrl_size = None
+        self.current_ctrl_brush = None
+        self.current_ctrl_opacity = None
+        self.current_ctrl_color = None
+        self.use_hidden_colors = False
+
+        # Delays
+        self.click_delay = 0
+        self.line_delay = 0
+        self.ctrl_area_delay = 0
+        self.use_double_click = False
+
+        # Keyboard interrupts, they are set from other threads (the keyboard listener & the GUI). The painting
+        # waits for running while paused, so a paused painting does not use the CPU
+        self.running = threading.Event()
+        self.running.set()
+        self.skip_requested = threading.Event()
+        self.abort_requested = threading.Event()
+
+        # The colors that were skipped in the last painting
+        self.skipped_colors = []
+
+        # The number & time of the clicks, lines and control clicks of the paintings since the last reset
+        self.telemetry = PaintTelemetry()
+
+        # Callbacks for log messages, the progress in percent and the cursor of the painting (the index of the
+        # current color and of the first stroke that is not painted yet)
+        self.log = lambda text: None
+        self.progress = lambda percent: None
+        self.checkpoint = lambda color_index, stroke_index: None
+
+
+    @property
+    def paused(self):
+        """ Returns:    True if the painting is paused """
+        return not self.running.is_set()
+
+
+    @property
+    def colors_per_opacity(self):
+        """ Returns:    The number of colors of every opacity of the palette (rows of 64 or 20 colors) """
+        return 64 if self.use_hidden_colors else 20
+
+
+    def toggle_pause(self):
+        """ Pause the painting, or resume it if it is paused """
+        if self.running.is_set():
+            self.running.clear()
+        else:
+            self.running.set()
+
+
+    def skip_color(self):
+        """ Skip the rest of the current color, a paused painting is resumed """
+        self.skip_requested.set()
+        self.running.set()
+
+
+    def abort(self):
+        """ Abort the painting, a paused painting is resumed """
+        self.abort_requested.set()
+        self.running.set()
+
+
+    def set_delays(self, click_delay, line_delay, ctrl_area_delay, use_double_click):
+        """ Set the delays (in seconds) and if every click should be a double click """
+        self.click_delay = click_delay
+        self.line_delay = line_delay
+        self.ctrl_area_delay = ctrl_area_delay
+        self.use_double_click = use_double_click
+        self.backend.set_pause(click_delay, line_delay)
+
+
+    def set_ctrl_area(self, ctrl_x, ctrl_y, ctrl_w, ctrl_h, use_hidden_colors):
+        """ Set the painting control area and calculate the positioning of its controls.
+        Updates:    self.ctrl_remove
+                    self.ctrl_update
+                    self.ctrl_size
+                    self.ctrl_brush
+                    self.ctrl_opacity
+                    self.ctrl_color
+        """
+        self.use_hidden_colors = use_hidden_colors
+        (   self.ctrl_remove, self.ctrl_update, self.ctrl_size,
+            self.ctrl_brush, self.ctrl_opacity, self.ctrl_color) = ctrl_tools_positioning(ctrl_x, ctrl_y, ctrl_w, ctrl_h, use_hidden_colors)
+
+
+    def timed(self, operation):
+        """ Start timing operation (see PaintTelemetry), once the pause of the previous one is over """
+        self.telemetry.start(operation, self.backend.pacer.wait())
+
+
+    def click_pixel(self, x = 0, y = 0):
+        """ Click the pixel """
+        if isinstance(x, tuple):
+            x, y = x
+        self.backend.click(x, y)
+        if self.use_double_click:
+            self.backend.click(x, y)
+
+
+    def draw_line(self, point_A, point_B):
+        """ Draws a line between point_A and point_B, horizontal, vertical or diagonal. """
+        self.backend.shift_drag(point_A, point_B)
+
+
+    def reset_painting_controls(self):
+        """ Forget the chosen paint controls, so that all of them are clicked the next time """
+        self.current_ctrl_size = None
+        self.current_ctrl_brush = None
+        self.current_ctrl_opacity = None
+        self.current_ctrl_color = None
+
+
+    def choose_painting_controls(self, size, brush, color):
+        """ Choose the paint controls, only the controls that differ from the current ones are clicked.
+        The palette index color is split up into the opacity (rows of 64 or 20 colors) and the color swatch.
+        """
+        opacity = 5 - (color // self.colors_per_opacity)
+        swatch = color % self.colors_per_opacity
+
+        if self.current_ctrl_size != size:
+            self.current_ctrl_size = size
+            self.timed("ctrl_clicks")
+            self.click_pixel(self.ctrl_size[size])
+            self.backend.sleep(self.ctrl_area_delay)
+
+        if self.current_ctrl_brush != brush:
+            self.current_ctrl_brush = brush
+            self.timed("ctrl_clicks")
+            self.click_pixel(self.ctrl_brush[brush])
+            self.backend.sleep(self.ctrl_area_delay)
+
+        if self.current_ctrl_opacity != opacity:
+            self.current_ctrl_opacity = opacity
+            self.timed("ctrl_clicks")
+            self.click_pixel(self.ctrl_opacity[opacity])
+            self.backend.sleep(self.ctrl_area_delay)
+
+        if self.current_ctrl_color != swatch:
+            self.current_ctrl_color = swatch
+            self.timed("ctrl_clicks")
+            self.click_pixel(self.ctrl_color[swatch])
+            self.backend.sleep(self.ctrl_area_delay)
+
+
+    def paint_background(self, canvas_x, canvas_y, canvas_w, canvas_h, color):
+        """ Paint the canvas with color using the largest brush """
+        self.log("Painting background for you...")
+        self.choose_painting_controls(5, 3, color)
+        x_start = canvas_x + 10
+        x_end = canvas_x + canvas_w - 10
+        loops = int((canvas_h - 10) / 10)
+        for i in range(1, loops+1):
+            self.timed("lines")
+            self.draw_line((x_start, canvas_y + (10 * i)), (x_end, canvas_y + (10 * i)))
+
+
+    def paint(self, plan, canvas_area, palette, brush_type, background_color = None, update_canvas = True, update_canvas_end = True, start_stroke = 0):
+        """ Paint the stroke plan, or the rest of it from start_stroke (a resumed painting).
+            plan:               The StrokePlan
+            canvas_area:        (x, y, w, h) of the canvas on the screen
+            palette:            The rgb colors of the palette indices in the plan
+            brush_type:         The brush type used for the strokes
+            background_color:   Paint the background with this palette index first, if not None
+            update_canvas:      Click the update button after every color
+            update_canvas_end:  Click the update button when the painting is completed
+            start_stroke:       The strokes before this index are already painted
+        Returns:    True, if the painting was completed
+                    False, if it was aborted
+        """
+        canvas_x, canvas_y, canvas_w, canvas_h = canvas_area
+        self.running.set()
+        self.skip_requested.clear()
+        self.abort_requested.clear()
+        self.skipped_colors = []
+        pixel_counter = int(plan.lengths[:start_stroke].sum())
+        progress_percent = 0
+        previous_progress_percent = None
+        plan_pixels = max(plan.pixels, 1)
+        self.reset_painting_controls()
+        self.backend.pacer.reset()
+
+        self.telemetry.discard()
+        self.click_pixel(self.ctrl_size[0]) # To set focus on the rust window
+        self.backend.sleep(.5)
+        self.click_pixel(self.ctrl_size[0])
+        if background_color != None:
+            self.paint_background(canvas_x, canvas_y, canvas_w, canvas_h, background_color)
+
+        color_segments = plan.color_segments()
+        for counter, (color, start, stop) in enumerate(color_segments):
+            if stop <= start_stroke: continue
+            start = max(start, start_stroke)
+            self.checkpoint(counter, start)
+            self.skip_requested.clear()
+            # Print current color to the log
+            self.log(   "(" + str((counter+1)) + "/" + str((len(color_segments))) +
+                        ") Current color: " + str(rgb_to_hex(palette[color])))
+
+            # Choose painting controls
+            self.choose_painting_controls(int(plan.size[start]), brush_type, color)
+
+            strokes = zip(  plan.kind[start:stop].tolist(), plan.x0[start:stop].tolist(), plan.y0[start:stop].tolist(),
+                            plan.x1[start:stop].tolist(), plan.y1[start:stop].tolist(), plan.size[start:stop].tolist())
+            for index, (kind, x0, y0, x1, y1, size) in enumerate(strokes, start + 1):
+                if not self.running.is_set():
+                    self.telemetry.discard()
+                    self.running.wait()
+                    self.backend.pacer.reset()
+                if self.skip_requested.is_set():
+                    self.skipped_colors.append(color)
+                    break
+                if self.abort_requested.is_set():
+                    self.telemetry.discard()
+                    self.log("Aborted...")
+                    return False
+
+                if size != self.current_ctrl_size:
+                    self.choose_painting_controls(size, brush_type, color)
+
+                if kind == LINE:
+                    self.timed("lines")
+                    self.draw_line((canvas_x + x0, canvas_y + y0), (canvas_x + x1, canvas_y + y1))
+                else:
+                    self.timed("clicks")
+                    self.click_pixel(canvas_x + x0, canvas_y + y0)
+                self.checkpoint(counter, index)
+
+                # Calculate percentage for progress bar
+                pixel_counter += abs(x1 - x0) + abs(y1 - y0) + 1
+                progress_percent = int(pixel_counter * 100 / plan_pixels)
+                if progress_percent != previous_progress_percent:
+                    previous_progress_percent = progress_percent
+                    self.progress(progress_percent)
+
+            if update_canvas:
+                self.timed("clicks")
+                self.click_pixel(self.ctrl_update)
+
+        if update_canvas_end:
+            self.timed("clicks")
+            self.click_pixel(self.ctrl_update)
+
+        self.telemetry.stop(self.backend.pacer.wait())
+        return True
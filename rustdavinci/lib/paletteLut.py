@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+import itertools
+import hashlib
+import zipfile
+import numpy
+import os
+
+# The lookup table has a cell per cube of rgb values, 6 bits gives 64x64x64 cells of 4x4x4 rgb values
+CELL_BITS = 6
+CELL_SIZE = 1 << (8 - CELL_BITS)
+
+# The most candidate colors kept per cell, the colors of the cells with more candidates are searched among all colors
+MAX_CANDIDATES = 8
+
+# Added to the distance that candidates may be further away, it covers the rounding of the float32 distances
+DISTANCE_MARGIN = 0.5
+
+# The color spaces where the distance between colors is measured
+RGB = "rgb"
+LAB = "lab"
+
+# The most lookup tables kept loaded, the least recently used table is removed first
+LUT_CACHE_SIZE = 4
+
+# Lookup tables that are already loaded, by palette & color space (least recently used first)
+loaded_luts = OrderedDict()
+
+
+def rgb_to_lab(rgb):
+    """ Convert sRGB colors (..., 3) to CIELAB (D65 white point).
+    Returns:    The L*, a*, b* values (..., 3)
+    """
+    rgb = numpy.asarray(rgb, dtype=numpy.float64) / 255
+    linear = numpy.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ numpy.array([[0.412453, 0.212671, 0.019334],
+                                [0.357580, 0.715160, 0.119193],
+                                [0.180423, 0.072169, 0.950227]])
+    xyz /= numpy.array([0.95047, 1.0, 1.08883])
+
+    f = numpy.where(xyz > (6 / 29) ** 3, numpy.cbrt(xyz), (xyz / (3 * (6 / 29) ** 2)) + (4 / 29))
+    return numpy.stack((    (116 * f[..., 1]) - 16,
+                            500 * (f[..., 0] - f[..., 1]),
+                            200 * (f[..., 1] - f[..., 2])), axis=-1)
+
+
+def color_coordinates(rgb, color_space):
+    """ Returns:    The coordinates of rgb colors (..., 3) in color_space """
+    if color_space == LAB:
+        return rgb_to_lab(rgb)
+    return numpy.asarray(rgb, dtype=numpy.float64)
+
+
+def closest_indices(coordinates, palette):
+    """ Returns:    The index of the closest color of palette for every color (n x 3, same color space) """
+    indices = numpy.empty(len(coordinates), dtype=numpy.uint8)
+    for start in range(0, len(coordinates), 16384):
+        chunk = coordinates[start:start + 16384]
+        distances = sum((chunk[:, None, channel] - palette[None, :, channel]) ** 2 for channel in range(3))
+        indices[start:start + 16384] = numpy.argmin(distances, axis=1)
+    return indices
+
+
+class PaletteLUT():
+
+    def __init__(self, palette, cache_folder = None, color_space = RGB):
+        """ PaletteLUT class init. A lookup table of the candidates for the closest color of palette in every cell
+        of the rgb cube, so that an image is quantized by indexing. The pixels of the cells with a single candidate
+        get it directly, the other pixels are compared to the candidates of their cell only. The distance between
+        colors is the euclidean distance in color_space (CIE76 delta E for LAB).
+            palette:        At most 256 (r, g, b) colors
+            cache_folder:   The folder where the table is saved, so it only has to be built once
+            color_space:    RGB or LAB
+        """
+        self.color_space = color_space
+        self.palette = color_coordinates(numpy.array(palette, dtype=numpy.uint8), color_space)
+        self.candidates = None
+        self.counts = None
+
+        key = hashlib.sha1(numpy.array(palette, dtype=numpy.uint8).tobytes() + color_space.encode()).hexdigest()
+        path = os.path.join(cache_folder, "palette_cells_" + key + ".npz") if cache_folder else None
+        cells = 1 << (3 * CELL_BITS)
+
+        if path and os.path.isfile(path):
+            try:
+                with numpy.load(path) as data:
+                    self.candidates, self.counts = data["candidates"], data["counts"]
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                self.candidates = None
+
+        if self.candidates is None or self.candidates.shape[0] != cells or self.counts.shape != (cells,):
+            self.build()
+            if path:
+                try:
+                    os.makedirs(cache_folder, exist_ok=True)
+                    numpy.savez_compressed(path, candidates=self.candidates, counts=self.counts)
+                except OSError:
+                    pass
+
+
+    def build(self):
+        """ Build the candidates of every cell. Every color of a cell is within the radius of the cell from its
+        center, so a palette color can only be the closest color of some color of the cell if it is at most two
+        radii further away from the center than the palette color closest to the center. The radius is reached at
+        the corners of the cell, also in LAB (checked for every cell). The candidates are sorted by their index in
+        the palette, so that ties are broken like a full search.
+        Updates:    self.candidates, the candidates of every cell (padded with the first one)
+                    self.counts, the number of candidates of every cell (MAX_CANDIDATES + 1 if there are more)
+        """
+        cells_per_channel = 1 << CELL_BITS
+        kept = min(MAX_CANDIDATES, len(self.palette))
+        palette = self.palette.astype(numpy.float32)
+        palette_norms = (palette ** 2).sum(axis=1)
+        corner_offsets = numpy.array(list(itertools.product((0, CELL_SIZE - 1), repeat=3)))
+
+        self.candidates = numpy.empty((cells_per_channel ** 3, kept), dtype=numpy.uint8)
+        self.counts = numpy.empty(cells_per_channel ** 3, dtype=numpy.uint8)
+        for start in range(0, cells_per_channel ** 3, 4096):
+            cells = numpy.arange(start, min(start + 4096, cells_per_channel ** 3))
+            lows = numpy.column_stack(numpy.unravel_index(cells, (cells_per_channel, ) * 3)) * CELL_SIZE
+            centers = color_coordinates(lows + ((CELL_SIZE - 1) / 2), self.color_space).astype(numpy.float32)
+            corners = color_coordinates(lows[:, None, :] + corner_offsets[None, :, :], self.color_space)
+            radius = numpy.sqrt(((corners - centers[:, None, :]) ** 2).sum(axis=2)).max(axis=1).astype(numpy.float32)
+
+            # The squared distances are compared, (nearest + 2 radii)^2 keeps the same candidates
+            distances = (centers ** 2).sum(axis=1)[:, None] - (2 * centers @ palette.T) + palette_norms[None, :]
+            nearest = numpy.sqrt(numpy.maximum(distances.min(axis=1), 0))
+            is_candidate = distances <= ((nearest + (2 * radius) + DISTANCE_MARGIN) ** 2)[:, None]
+            count = is_candidate.sum(axis=1)
+
+            # The candidates of every cell in the order of the palette, padded with the first candidate. The cells
+            # with too many candidates are searched among all colors, their candidates are not used
+            is_kept = count <= kept
+            rows, indices = numpy.nonzero(is_candidate[is_kept])
+            rank = numpy.arange(len(rows)) - numpy.repeat(numpy.cumsum(count[is_kept]) - count[is_kept], count[is_kept])
+            candidates = numpy.zeros((numpy.count_nonzero(is_kept), kept), dtype=numpy.uint8)
+            candidates[rows, rank] = indices
+            candidates = numpy.where(numpy.arange(kept)[None, :] < count[is_kept, None], candidates, candidates[:, :1])
+
+            self.candidates[cells[is_kept]] = candidates
+            self.candidates[cells[~is_kept]] = 0
+            self.counts[cells] = numpy.minimum(count, kept + 1)
+
+
+    def quantize(self, rgb_arr):
+        """ Find the closest palette color of every pixel of an rgb image array (h x w x 3, uint8).
+        Returns:    A 2D uint8 array of palette indices
+        """
+        shift = 8 - CELL_BITS
+        cells = (   ((rgb_arr[:, :, 0].astype(numpy.int32) >> shift) << (2 * CELL_BITS)) |
+                    ((rgb_arr[:, :, 1].astype(numpy.int32) >> shift) << CELL_BITS) |
+                    (rgb_arr[:, :, 2].astype(numpy.int32) >> shift))
+        indices = self.candidates[:, 0][cells]
+
+        # The pixels of the cells with more than one candidate, every distinct color is only compared once
+        ambiguous = numpy.flatnonzero(self.counts[cells] > 1)
+        if len(ambiguous) == 0: return indices
+        rgb = rgb_arr.reshape(-1, 3)[ambiguous]
+        colors, inverse = numpy.unique(     (rgb[:, 0].astype(numpy.int32) << 16) | (rgb[:, 1].astype(numpy.int32) << 8) | rgb[:, 2],
+                                            return_inverse=True)
+        rgb = numpy.column_stack(((colors >> 16) & 255, (colors >> 8) & 255, colors & 255))
+        color_cells = ((rgb[:, 0] >> shift) << (2 * CELL_BITS)) | ((rgb[:, 1] >> shift) << CELL_BITS) | (rgb[:, 2] >> shift)
+        coordinates = color_coordinates(rgb, self.color_space)
+
+        closest = numpy.empty(len(colors), dtype=numpy.uint8)
+        overflow = self.counts[color_cells] > self.candidates.shape[1]
+        if overflow.any():
+            closest[overflow] = closest_indices(coordinates[overflow], self.palette)
+        for start in range(0, len(colors), 16384):
+            chunk = slice(start, start + 16384)
+            candidates = self.candidates[color_cells[chunk]]
+            candidate_colors = self.palette[candidates]
+            distances = sum((candidate_colors[..., channel] - coordinates[chunk, None, channel]) ** 2 for channel in range(3))
+            is_refined = ~overflow[chunk]
+            closest[chunk][is_refined] = numpy.take_along_axis(candidates, numpy.argmin(distances, axis=1)[:, None], axis=1)[is_refined, 0]
+
+        indices.ravel()[ambiguous] = closest[inverse.ravel()]
+        return indices
+
+
+def palette_lut(palette, cache_folder = None, color_space = RGB):
+    """ Returns:    The PaletteLUT of palette & color_space, loaded or built only once while it is one of the
+                    LUT_CACHE_SIZE most recently used tables
+    """
+    key = (numpy.asarray(palette, dtype=numpy.uint8).tobytes(), color_space)
+    if key in loaded_luts:
+        loaded_luts.move_to_end(key)
+        return loaded_luts[key]
+
+    loaded_luts[key] = PaletteLUT(palette, cache_folder, color_space)
+    if len(loaded_luts) > LUT_CACHE_SIZE:
+        loaded_luts.popitem(last=False)
+    return loaded_luts[key]
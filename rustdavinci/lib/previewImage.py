@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from PyQt5.QtGui import QImage
+
+from collections import OrderedDict
+
+import hashlib
+
+# The size of the preview label of the main window
+PREVIEW_SIZE = (550, 380)
+
+# The most previews kept in a PreviewCache, the least recently used preview is removed first
+PREVIEW_CACHE_SIZE = 16
+
+
+def pil_to_qimage(image):
+    """ Convert a PIL.Image to a QImage in memory. RGBA images keep their transparency, every other mode is
+    converted to RGB. A QImage (unlike a QPixmap) can be created outside of the GUI thread.
+    Returns:    The QImage, it owns a copy of the pixels
+    """
+    if image.mode == "RGBA":
+        image_format, channels = QImage.Format_RGBA8888, 4
+    else:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image_format, channels = QImage.Format_RGB888, 3
+
+    width, height = image.size
+    data = image.tobytes()
+    return QImage(data, width, height, width * channels, image_format).copy()
+
+
+def image_hash(image):
+    """ Returns:    A hash of the mode, size and pixels of a PIL.Image """
+    header = (image.mode + str(image.size)).encode()
+    return hashlib.blake2b(header + image.tobytes(), digest_size=16).hexdigest()
+
+
+def fit_size(size, area):
+    """ The size of an image of size (w, h) that is resized to fit in area (w, h), the aspect ratio is kept.
+    Returns:    The (w, h) of the resized image
+    """
+    width, height = size
+    area_w, area_h = area
+
+    fitted_h = int(float(height) * (area_w / float(width)))
+    fitted_w = int(float(width) * (area_h / float(height)))
+
+    if fitted_h <= area_h:
+        return area_w, fitted_h
+    elif fitted_w <= area_w:
+        return fitted_w, area_h
+    return area_w, area_h
+
+
+class PreviewCache():
+
+    def __init__(self, size = PREVIEW_CACHE_SIZE):
+        """ PreviewCache class init. The previews that are already created, by key.
+            size:   The most previews kept
+        """
+        self.size = size
+        self.previews = OrderedDict()
+
+
+    def get(self, key, create):
+        """ Get the preview of key, create() is only called if it is not in the cache.
+        Returns:    The preview
+        """
+        if key in self.previews:
+            self.previews.move_to_end(key)
+            return self.previews[key]
+
+        preview = create()
+        self.previews[key] = preview
+        if len(self.previews) > self.size:
+            self.previews.popitem(last=False)
+        return preview
+
+
+    def clear(self):
+        """ Remove every preview """
+        self.previews.clear()
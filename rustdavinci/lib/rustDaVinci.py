@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from PyQt5.QtCore import QSettings, Qt, QRect, QDir
+from PyQt5.QtCore import QSettings, Qt, QRect, QDir, QStandardPaths, QThread
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import QMessageBox, QInputDialog, QFileDialog, QApplication, QLabel
 
@@ -12,6 +12,7 @@ from PIL import Image
 import urllib.request
 import pyautogui
 import datetime
+import platform
 import numpy
 import time
 import cv2
@@ -20,8 +21,22 @@ import os
 from lib.rustPaletteData import rust_palette
 from lib.captureArea import capture_area
 from lib.color_functions import hex_to_rgb, rgb_to_hex
+from lib.paintConfig import PaintConfig
+from lib.paletteLut import palette_lut, RGB, LAB
+from lib.strokePlan import create_stroke_plan
+from lib.costModel import CostModel
+from lib.paintTiming import TimingHistory
+from lib.colorOrder import optimize_color_order
+from lib.strokeOrder import order_strokes, travel_distance
+from lib.inputBackend import PyAutoGUIBackend
+from lib.painter import Painter
+from lib.paintWorker import PaintWorker, CalibrationWorker
+from lib.calibration import DelayCalibration
+from lib.verification import CanvasVerification
+from lib.checkpoint import Checkpoint
+from lib.ctrlAreaSearch import template_pyramid, locate_template, confirm_region, confirm_template, CtrlAreaCache
+from lib.previewImage import pil_to_qimage, image_hash, fit_size, PreviewCache, PREVIEW_SIZE
 from ui.dialogs.captureDialog import CaptureAreaDialog
-from ui.settings.default_settings import default_settings
 
 
 class rustDaVinci():
@@ -37,43 +52,43 @@ class rustDaVinci():
         self.quantized_img = None
         self.palette_data = None
         self.updated_palette = None
+        self.palette_index = None
+        self.palette_arr = None
+
+        # The palettes that are already built, by background color & palette settings
+        self.palettes = {}
+
+        # The lookup tables of the palettes are saved here
+        self.palette_cache_folder = os.path.join(QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "palettes")
 
         # Pixmaps
         self.pixmap_on_display = 0
         self.org_img_pixmap = None
-        self.quantized_img_pixmap_normal = None
-        self.quantized_img_pixmap_high = None
+
+        # The quantized previews are created when they are displayed, with the PaintConfig of the image and by
+        # the hash of the image, the palette settings, the quality and the size
+        self.previews = PreviewCache()
+        self.preview_config = None
+        self.org_img_hash = None
 
         # Booleans
         self.org_img_ok = False
         self.use_double_click = False
-        self.use_hidden_colors = False
 
         # Keyboard interrupt variables
         self.pause_key = None
         self.skip_key = None
         self.abort_key = None
-        self.paused = False
-        self.skip_current_color = False
-        self.abort = False
-
-        # Painting control tools
-        self.ctrl_remove = 0
-        self.ctrl_update = 0
-        self.ctrl_size = []
-        self.ctrl_brush = []
-        self.ctrl_opacity = []
-        self.ctrl_color = []
-        self.current_ctrl_size = None
-        self.current_ctrl_brush = None
-        self.current_ctrl_opacity = None
-        self.current_ctrl_color = None
+
+        # The painting engine
+        self.painter = Painter(PyAutoGUIBackend())
 
         # Canvas coordinates/ ratio
         self.canvas_x = 0
         self.canvas_y = 0
         self.canvas_w = 0
         self.canvas_h = 0
+        self.last_canvas_size = None
 
         # Statistics
         self.img_colors = []
@@ -81,12 +96,19 @@ class rustDaVinci():
         self.pixels = 0
         self.lines = 0
         self.estimated_time = 0
+        self.estimated_operations = None
+        self.stroke_plan = None
+        self.click_plan = None
+        self.color_order_time_saved = 0
+        self.travel_distance_before = 0
+        self.travel_distance = 0
 
         # Delays
         self.click_delay = 0
         self.line_delay = 0
         self.ctrl_area_delay = 0
         self.use_double_click = False
+        self.cost_model = CostModel()
 
         self.background_color = None
         self.skip_colors = None
@@ -94,25 +116,49 @@ class rustDaVinci():
         # Hotkey display QLabel
         self.hotkey_label = None
 
+        # The painting worker & its thread, and (keyboard listener, start time, PaintConfig) while painting
+        self.paint_thread = None
+        self.paint_worker = None
+        self.painting_session = None
+
+        # The control areas that were found automatically, per screen size & template scale
+        self.ctrl_area_cache = CtrlAreaCache(self.settings)
+
+        # The last painting is saved here, so that it can be resumed
+        self.checkpoint = Checkpoint(os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "checkpoint"))
+
+        # The timed operations of the past paintings, the estimated time is fitted from them. The planned operations
+        # and the estimated time of the current painting are recorded when it is finished
+        self.timing_history = TimingHistory(os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "timing_history.jsonl"))
+        self.timing_session = None
+
 
         # Init functions
-        if not (int(self.settings.value("ctrl_w", default_settings["ctrl_w"])) == 0 or int(self.settings.value("ctrl_h", default_settings["ctrl_h"]))):
-            self.calculate_ctrl_tools_positioning()
+        self.apply_calibration_profile()
+        config = self.paint_config()
+        if config.has_ctrl_area:
+            self.calculate_ctrl_tools_positioning(config)
+
 
+    def paint_config(self):
+        """ Returns:    A PaintConfig snapshot of the current settings """
+        return PaintConfig.from_settings(self.settings)
 
-    def update(self):
+
+    def update(self, config = None):
         """ Updates pyauogui delays, booleans and paint image button"""
-        self.click_delay = float(int(self.settings.value("click_delay", default_settings["click_delay"]))/1000)
-        self.line_delay = float(int(self.settings.value("line_delay", default_settings["line_delay"]))/1000)
-        self.ctrl_area_delay = float(int(self.settings.value("ctrl_area_delay", default_settings["ctrl_area_delay"]))/1000)
-        self.use_double_click = bool(self.settings.value("double_click", default_settings["double_click"]))
+        if config is None:
+            config = self.paint_config()
+        self.click_delay, self.line_delay, self.ctrl_area_delay = config.delays
+        self.use_double_click = config.double_click
 
-        # Update the pyautogui delay
-        pyautogui.PAUSE = self.click_delay
+        # Update the painting engine delays and the estimated time of each painting operation
+        self.painter.set_delays(self.click_delay, self.line_delay, self.ctrl_area_delay, self.use_double_click)
+        self.cost_model = self.timing_history.cost_model(config.delays, self.use_double_click)
 
-        if int(self.settings.value("ctrl_w", default_settings["ctrl_w"])) == 0 or int(self.settings.value("ctrl_h", default_settings["ctrl_h"])) == 0:
+        if not config.has_ctrl_area:
             self.parent.ui.paint_image_PushButton.setEnabled(False)
-        elif self.org_img_ok and int(self.settings.value("ctrl_w", default_settings["ctrl_w"])) != 0 and int(self.settings.value("ctrl_h", default_settings["ctrl_h"])) != 0:
+        elif self.org_img_ok:
             self.parent.ui.paint_image_PushButton.setEnabled(True)
 
 
@@ -137,11 +183,12 @@ class rustDaVinci():
                 self.org_img_template = Image.open(path).convert("RGBA")
                 self.org_img = self.org_img_template
 
-                self.convert_transparency()
-                self.create_pixmaps()
+                config = self.paint_config()
+                self.convert_transparency(config)
+                self.create_pixmaps(config)
 
-                if bool(self.settings.value("show_preview_load", default_settings["show_preview_load"])):
-                    if int(self.settings.value("quality", default_settings["quality"])) == 0:
+                if config.show_preview_load:
+                    if config.quality == 0:
                         self.pixmap_on_display = 1
                     else:
                         self.pixmap_on_display = 2
@@ -183,18 +230,17 @@ class rustDaVinci():
                 self.org_img_template = Image.open(urllib.request.urlopen(request)).convert("RGBA")
 
                 # Pixmap for original image
-                self.org_img_template.save("temp_url_image.png")
-                self.org_img_pixmap = QPixmap("temp_url_image.png", "1")
-                os.remove("temp_url_image.png")
+                self.org_img_pixmap = QPixmap.fromImage(pil_to_qimage(self.org_img_template))
 
                 # The original PIL.Image object
                 self.org_img = self.org_img_template
 
-                self.convert_transparency()
-                self.create_pixmaps()
+                config = self.paint_config()
+                self.convert_transparency(config)
+                self.create_pixmaps(config)
 
-                if bool(self.settings.value("show_preview_load", default_settings["show_preview_load"])):
-                    if int(self.settings.value("quality", default_settings["quality"])) == 0:
+                if config.show_preview_load:
+                    if config.quality == 0:
                         self.pixmap_on_display = 1
                     else:
                         self.pixmap_on_display = 2
@@ -220,9 +266,9 @@ class rustDaVinci():
         self.update()
 
 
-    def convert_transparency(self):
+    def convert_transparency(self, config):
         """ Paste the org_img on top of an image with background color """
-        background_color = rust_palette.index(hex_to_rgb(self.settings.value("background_color", default_settings["background_color"])))
+        background_color = rust_palette.index(config.background_rgb)
         # Set transparency in image to default background
         try:
             self.org_img = self.org_img_template
@@ -234,52 +280,62 @@ class rustDaVinci():
             None
 
 
-    def create_pixmaps(self):
-        """ Create quantized pixmaps """
-        # Pixmap for quantized image of quality normal
-        temp_normal = self.quantize_to_palette(self.org_img, True, 0)
-        temp_normal.save("temp_normal.png")
-        self.quantized_img_pixmap_normal = QPixmap("temp_normal.png")
-        os.remove("temp_normal.png")
+    def create_pixmaps(self, config):
+        """ Prepare the quantized previews, they are created by preview_pixmap when they are displayed.
+        Updates:    preview_config,
+                    org_img_hash,
+                    org_img_ok
+        """
+        self.preview_config = config
+        self.org_img_hash = image_hash(self.org_img)
+        self.org_img_ok = True
 
-        # Pixmap for quantized image of quality high
-        temp_high = self.quantize_to_palette(self.org_img, True, 1)
-        temp_high.save("temp_high.png")
-        self.quantized_img_pixmap_high = QPixmap("temp_high.png")
-        os.remove("temp_high.png")
 
-        self.org_img_ok = True
+    def preview_pixmap(self, pixmap_on_display):
+        """ Get the pixmap of the original image (0) or of the image quantized with quality normal (1) or
+        high (2). The quantized image is the size of the last located canvas (as it will be painted) or, before
+        the canvas is located, at most the size of the preview label. It is only quantized if it is not cached.
+        Returns:    The QPixmap
+        """
+        if pixmap_on_display == 0:
+            return self.org_img_pixmap
+
+        config = self.preview_config
+        quality = pixmap_on_display - 1
+        if self.last_canvas_size != None:
+            size = fit_size(self.org_img.size, self.last_canvas_size)
+        elif self.org_img.size[0] > PREVIEW_SIZE[0] or self.org_img.size[1] > PREVIEW_SIZE[1]:
+            size = fit_size(self.org_img.size, PREVIEW_SIZE)
+        else:
+            size = self.org_img.size
+
+        key = ( self.org_img_hash, config.background_rgb, config.hidden_colors, config.brush_opacities,
+                config.skip_background_color, config.lab_colors, quality, size)
+        return self.previews.get(key, lambda: QPixmap.fromImage(self.quantize_to_qimage(self.org_img, config, quality, size)))
+
+
+    def quantize_to_qimage(self, image, config, quality, size):
+        """ Returns:    The image resized to size and quantized with quality, as a QImage """
+        if image.size != size:
+            image = image.resize(size, Image.ANTIALIAS)
+        return pil_to_qimage(self.quantize_to_palette(image, config, True, quality))
 
 
-    def convert_img(self):
+    def convert_img(self, config):
         """ Convert the image to fit the canvas and quantize the image.
         Updates:    quantized_img,
                     x_correction,
                     y_correction
         Returns:    False, if the image type is invalid.
         """
-        org_img_w = self.org_img.size[0]
-        org_img_h = self.org_img.size[1]
+        resized_w, resized_h = fit_size(self.org_img.size, (self.canvas_w, self.canvas_h))
+        resized_img = self.org_img.resize((resized_w, resized_h), Image.ANTIALIAS)
 
-        wpercent = (self.canvas_w / float(org_img_w))
-        hpercent = (self.canvas_h / float(org_img_h))
+        # Center the image on the canvas
+        x_correction = int((self.canvas_w - resized_w)/2)
+        y_correction = int((self.canvas_h - resized_h)/2)
 
-        hsize = int((float(org_img_h) * float(wpercent)))
-        wsize = int((float(org_img_w) * float(hpercent)))
-
-        x_correction = 0
-        y_correction = 0
-
-        if hsize <= self.canvas_h:
-            resized_img = self.org_img.resize((self.canvas_w, hsize), Image.ANTIALIAS)
-            y_correction = int((self.canvas_h - hsize)/2)
-        elif wsize <= self.canvas_w:
-            resized_img = self.org_img.resize((wsize, self.canvas_h), Image.ANTIALIAS)
-            x_correction = int((self.canvas_w - wsize)/2)
-        else:
-            resized_img = self.org_img.resize((self.canvas_w, self.canvas_h), Image.ANTIALIAS)
-
-        self.quantized_img = self.quantize_to_palette(resized_img)
+        self.quantized_img = self.quantize_to_palette(resized_img, config)
         if self.quantized_img == False:
             self.org_img = None
             self.quantized_img = None
@@ -293,101 +349,82 @@ class rustDaVinci():
         return True
 
 
-    def update_palette(self, rgb_background):
-        """  """
-        use_hidden_colors = bool(self.settings.value("hidden_colors", default_settings["hidden_colors"]))
-        use_brush_opacities = bool(self.settings.value("brush_opacities", default_settings["brush_opacities"]))
+    def update_palette(self, config):
+        """ Select the palette for the current settings. The palettes are built once per background color,
+        hidden_colors, brush_opacities & skip_background_color and reused after that.
+        Updates:    palette_data,
+                    updated_palette,
+                    palette_index,
+                    palette_arr,
+                    background_color
+        """
+        key = (config.background_rgb, config.hidden_colors, config.brush_opacities, config.skip_background_color)
+        if key not in self.palettes:
+            self.palettes[key] = self.build_palette(*key)
 
-        background_index = rust_palette.index(rgb_background)
+        (self.palette_data, self.updated_palette, self.palette_index,
+         self.palette_arr, self.background_color) = self.palettes[key]
 
-        if self.settings.value("skip_background_color", default_settings["skip_background_color"]):
-            background_opacities = [background_index % 256, (background_index+(64*1)) % 256, (background_index+(64*2)) % 256, (background_index+(64*3)) % 256]
-        else:
-            background_opacities = []
-
-        # Select the palette to be used
-        self.palette_data = Image.new("P", (1, 1))
-        palette = ()
-        self.updated_palette = []
-
-        # Choose how many colors in the palette
-        if use_hidden_colors:
-            if use_brush_opacities:
-                for i, color in enumerate(rust_palette):
-                    if i in background_opacities:
-                        palette = palette + rgb_background
-                        self.updated_palette.append(rgb_background)
-                    else:
-                        palette = palette + color
-                        self.updated_palette.append(color)
-            else:
-                for i, color in enumerate(rust_palette):
-                    if i == 64:
-                        palette = palette + (2, 2, 2) * 192
-                        break
-                    if i in background_opacities:
-                        palette = palette + rgb_background
-                        self.updated_palette.append(rgb_background)
-                    else:
-                        palette = palette + color
-                        self.updated_palette.append(color)
+
+    def build_palette(self, rgb_background, use_hidden_colors, use_brush_opacities, skip_background_color):
+        """ Build the palette of the colors that can be painted. Without hidden colors only the first 20 colors of
+        every opacity are used, without brush opacities only the first opacity. If the background color is
+        skipped, it replaces all the opacities of the background color.
+        Returns:    The P image of the palette (padded to 256 colors), the list of rgb colors, a dict of the first
+                    index of every rgb color, the colors as a numpy array and the background color index (or None)
+        """
+        colors_per_opacity = 64 if use_hidden_colors else 20
+        opacities = 4 if use_brush_opacities else 1
+
+        background_index = rust_palette.index(rgb_background)
+        if skip_background_color:
+            background_opacities = {(background_index + (64 * opacity)) % 256 for opacity in range(4)}
         else:
-            if use_brush_opacities:
-                for i, color in enumerate(rust_palette):
-                    if (i >= 0 and i <= 19) or (i >= 64 and i <= 83) or (i >= 128 and i <= 147) or (i >= 192 and i <= 211):
-                        if i in background_opacities:
-                            palette = palette + rgb_background
-                            self.updated_palette.append(rgb_background)
-                        else:
-                            palette = palette + color
-                            self.updated_palette.append(color)
-                palette = palette + (2, 2, 2) * 176
-            else:
-                for i, color in enumerate(rust_palette):
-                    if i == 20:
-                        palette = palette + (2, 2, 2) * 236
-                        break
-                    if i in background_opacities:
-                        palette = palette + rgb_background
-                        self.updated_palette.append(rgb_background)
-                    else:
-                        palette = palette + color
-                        self.updated_palette.append(color)
+            background_opacities = set()
 
+        updated_palette = []
+        for i, color in enumerate(rust_palette):
+            if (i % 64) < colors_per_opacity and (i // 64) < opacities:
+                updated_palette.append(rgb_background if i in background_opacities else color)
 
-        if rgb_background in self.updated_palette:
-            if use_hidden_colors:
-                self.background_color = self.updated_palette.index(rgb_background) % 64
-            else:
-                self.background_color = self.updated_palette.index(rgb_background) % 20
+        palette_index = {}
+        for i, color in enumerate(updated_palette):
+            palette_index.setdefault(color, i)
+
+        if rgb_background in palette_index:
+            background_color = palette_index[rgb_background] % colors_per_opacity
         else:
-            self.background_color = None
+            background_color = None
+
+        palette_arr = numpy.array(updated_palette, dtype=numpy.uint8)
+        palette_data = Image.new("P", (1, 1))
+        palette_data.putpalette(palette_arr.ravel().tolist() + [2, 2, 2] * (256 - len(updated_palette)))
+        palette_data.load()
 
-        self.palette_data.putpalette(palette)
-        self.palette_data.load()
+        return palette_data, updated_palette, palette_index, palette_arr, background_color
 
 
-    def quantize_to_palette(self, image, pixmap = False, pixmap_q = 0):
-        """ Convert an RGB, RGBA or L mode image to use a given P image's palette.
+    def quantize_to_palette(self, image, config, pixmap = False, pixmap_q = 0):
+        """ Convert an RGB, RGBA or L mode image to use a given P image's palette. Without dithering, the
+        closest colors (in rgb or, with the lab_colors setting, CIELAB) are looked up in the (cached) lookup
+        table of the palette.
         Returns:    The quantized image
         """
-        rgb = hex_to_rgb(self.settings.value("background_color", default_settings["background_color"]))
-        self.update_palette(rgb)
+        self.update_palette(config)
 
-        self.org_img = image
-        self.org_img.load()
+        if image.mode != "RGB":
+            image = image.convert("RGB")
 
-        if self.org_img.mode == "RGBA":
-            self.org_img = image.convert("RGB")
+        quality = pixmap_q if pixmap else config.quality
 
-        if not pixmap:
-            quality = int(self.settings.value("quality", default_settings["quality"]))
-            if quality == 0:
-                im = image.im.convert("P", 0, self.palette_data.im)
-            elif quality == 1:
-                im = image.im.convert("P", 1, self.palette_data.im) # Dithering
-        else:
-            im = image.im.convert("P", pixmap_q, self.palette_data.im)
+        if quality == 0:
+            lut = palette_lut(self.palette_arr, self.palette_cache_folder, LAB if config.lab_colors else RGB)
+            quantized_img = Image.fromarray(lut.quantize(numpy.asarray(image)), "P")
+            quantized_img.putpalette(self.palette_data.getpalette())
+            return quantized_img
+
+        image.load()
+        im = image.im.convert("P", 1, self.palette_data.im) # Dithering
 
         try: return image._new(im)
         except AttributeError: return image._makeself(im)
@@ -398,6 +435,7 @@ class rustDaVinci():
         self.org_img = None
         self.quantized_img = None
         self.org_img_ok = False
+        self.previews.clear()
         self.update()
 
 
@@ -438,6 +476,7 @@ class rustDaVinci():
         self.canvas_y = canvas_area[1]
         self.canvas_w = canvas_area[2]
         self.canvas_h = canvas_area[3]
+        self.last_canvas_size = (self.canvas_w, self.canvas_h)
         return True
 
 
@@ -483,7 +522,7 @@ class rustDaVinci():
     def locate_control_area_automatically(self):
         """"""
         self.parent.hide()
-        ctrl_area = self.locate_control_area_opencv()
+        ctrl_area = self.locate_control_area_cached()
         self.parent.show()
 
         msg = QMessageBox(self.parent)
@@ -511,176 +550,130 @@ class rustDaVinci():
 
 
     def locate_control_area_opencv(self):
-        """ Automatically tries to find the painting control area with opencv.
+        """ Automatically tries to find the painting control area with opencv, coarse-to-fine over the scales of
+        the template. The time of every step is written to the log.
         Returns:    ctrl_x,
                     ctrl_y,
                     ctrl_w,
                     ctrl_h
                     False, if no control area was found
         """
-        screenshot = pyautogui.screenshot()
-        screen_w, screen_h = screenshot.size
-
-        image_gray = cv2.cvtColor(numpy.array(screenshot), cv2.COLOR_BGR2GRAY)
+        pyramid = template_pyramid()
+        if pyramid == None: return False
 
-        tmpl = cv2.imread("opencv_template/rust_palette_template.png", 0)
-        tmpl_w, tmpl_h = tmpl.shape[::-1]
+        start = time.perf_counter()
+        screenshot = pyautogui.screenshot()
+        image_gray = cv2.cvtColor(numpy.array(screenshot), cv2.COLOR_RGB2GRAY)
+        ctrl_area, scale_index, timings = locate_template(image_gray, pyramid)
+        total = time.perf_counter() - start
+        if ctrl_area != False:
+            self.ctrl_area_cache.store(pyautogui.size(), scale_index, ctrl_area)
+
+        self.parent.ui.log_TextEdit.append("Control area search: " + str(round(total * 1000)) + " ms (refine " +
+                                           str(round(timings[-1][1] * 1000, 1)) + " ms)")
+        self.parent.ui.log_TextEdit.append("  Per scale: " + ", ".join(
+            "x" + str(round(scale, 2)) + " " + str(round(seconds * 1000, 1)) + " ms" for scale, seconds in timings[:-1]))
+        return ctrl_area
+
+
+    def locate_control_area_cached(self):
+        """ Find the painting control area, the cached areas of this screen size are confirmed first and the full
+        search only runs if none of them is on the screen anymore.
+        Returns:    ctrl_x,
+                    ctrl_y,
+                    ctrl_w,
+                    ctrl_h
+                    False, if no control area was found
+        """
+        for scale_index, area in self.ctrl_area_cache.areas(pyautogui.size()):
+            ctrl_area = self.confirm_control_area(area, scale_index)
+            if ctrl_area != False:
+                return ctrl_area
+        return self.locate_control_area_opencv()
 
-        x_coord, y_coord = 0, 0
-        threshold = 0.8
 
-        for loop in range(50):
-            matches = cv2.matchTemplate(image_gray, tmpl, cv2.TM_CCOEFF_NORMED)
-            loc = numpy.where(matches >= threshold)
+    def confirm_control_area(self, area, scale_index):
+        """ Confirm that the painting control area is (still) at a cached area, only the template of its scale is
+        matched in a small region around it. An area that moved a few pixels is cached at its new position.
+        Returns:    ctrl_x,
+                    ctrl_y,
+                    ctrl_w,
+                    ctrl_h
+                    False, if the control area is not there
+        """
+        pyramid = template_pyramid()
+        if pyramid == None: return False
+
+        start = time.perf_counter()
+        screen_size = pyautogui.size()
+        region = confirm_region(area, screen_size)
+        region_gray = cv2.cvtColor(self.painter.backend.screenshot(*region), cv2.COLOR_RGB2GRAY)
+        ctrl_area = confirm_template(region_gray, region, pyramid.templates[scale_index])
+        self.parent.ui.log_TextEdit.append("Control area check: " + str(round((time.perf_counter() - start) * 1000, 1)) + " ms")
+
+        if ctrl_area != False and ctrl_area != tuple(area):
+            self.ctrl_area_cache.store(screen_size, scale_index, ctrl_area)
+        return ctrl_area
+
+
+    def check_control_area(self, config):
+        """ Before painting, confirm that the painting control area is still where it was found automatically (a
+        manually captured area is not checked). If it is not, the screen is searched again and the settings are
+        updated with the new area.
+        Returns:    The PaintConfig to paint with, None if the painting is cancelled
+        """
+        area = (config.ctrl_x, config.ctrl_y, config.ctrl_w, config.ctrl_h)
+        scale_index = self.ctrl_area_cache.scale_of(pyautogui.size(), area)
+        if scale_index == None: return config
 
-            x_list, y_list = [], []
-            for point in zip(*loc[::-1]):
-                x_list.append(point[0])
-                y_list.append(point[1])
+        ctrl_area = self.confirm_control_area(area, scale_index)
+        if ctrl_area == area: return config
 
-            if x_list:
-                x_coord = int(sum(x_list) / len(x_list))
-                y_coord = int(sum(y_list) / len(y_list))
-                return x_coord, y_coord, tmpl_w, tmpl_h
+        if ctrl_area == False:
+            self.parent.ui.log_TextEdit.append("Control area not found at its position, searching the screen...")
+            QApplication.processEvents()
+            self.parent.hide()
+            ctrl_area = self.locate_control_area_opencv()
+            self.parent.show()
 
-            tmpl_w, tmpl_h = int(tmpl.shape[1]*1.035), int(tmpl.shape[0]*1.035)
-            tmpl = cv2.resize(tmpl, (int(tmpl_w), int(tmpl_h)))
+        if ctrl_area == False:
+            btn = QMessageBox.question(self.parent, None,
+                "Couldn't find the painting control area on the screen...\n\n" +
+                "Would you like to paint anyway?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            return config if btn == QMessageBox.Yes else None
 
-            if tmpl_w > screen_w or tmpl_h > screen_h or loop == 49: return False
+        self.parent.ui.log_TextEdit.append("Controls area position updated...")
+        self.settings.setValue("ctrl_x", str(ctrl_area[0]))
+        self.settings.setValue("ctrl_y", str(ctrl_area[1]))
+        self.settings.setValue("ctrl_w", str(ctrl_area[2]))
+        self.settings.setValue("ctrl_h", str(ctrl_area[3]))
+        return self.paint_config()
 
 
-    def calculate_ctrl_tools_positioning(self):
+    def calculate_ctrl_tools_positioning(self, config):
         """ This function calculates the positioning of the different controls in the painting control area.
         The brush size, type and opacity along with all the different colors.
-        Updates:    self.ctrl_remove
-                    self.ctrl_update
-                    self.ctrl_size
-                    self.ctrl_brush
-                    self.ctrl_opacity
-                    self.ctrl_color
+        Updates:    The painting control tools of self.painter
         """
-        # Reset
-        self.ctrl_remove = 0
-        self.ctrl_update = 0
-        self.ctrl_size = []
-        self.ctrl_brush = []
-        self.ctrl_opacity = []
-        self.ctrl_color = []
-
-        ctrl_x = int(self.settings.value("ctrl_x", default_settings["ctrl_x"]))
-        ctrl_y = int(self.settings.value("ctrl_y", default_settings["ctrl_y"]))
-        ctrl_w = int(self.settings.value("ctrl_w", default_settings["ctrl_w"]))
-        ctrl_h = int(self.settings.value("ctrl_h", default_settings["ctrl_h"]))
-
-        # Calculate the distance between two items on a row of six items (Size)
-        first_x_coord_of_six_v1 = ctrl_x + (ctrl_w/6.5454)
-        second_x_coord_of_six_v1 = ctrl_x + (ctrl_w/3.4285)
-        dist_btwn_x_coords_of_six_v1 = second_x_coord_of_six_v1 - first_x_coord_of_six_v1
-
-        # Calculate the distance between two items on a row of six items (Opacity)
-        first_x_coord_of_six_v2 = ctrl_x + (ctrl_w/7.5789)
-        second_x_coord_of_six_v2 = ctrl_x + (ctrl_w/3.5555)
-        dist_btwn_x_coords_of_six_v2 = second_x_coord_of_six_v2 - first_x_coord_of_six_v2
-
-        # Calculate the distance between two items on a row of four items (Colors width)
-        first_x_coord_of_four = ctrl_x + (ctrl_w/6)
-        second_x_coord_of_four = ctrl_x + (ctrl_w/2.5714)
-        dist_btwn_x_coords_of_four = second_x_coord_of_four - first_x_coord_of_four
-
-        # Calculate the distance between two items on a column of eight items (Colors height)
-        first_y_coord_of_eight = ctrl_y + (ctrl_h/2.3220)
-        second_y_coord_of_eight = ctrl_y + (ctrl_h/1.9855)
-        dist_btwn_y_coords_of_eight = second_y_coord_of_eight - first_y_coord_of_eight
-
-        # Set the point location of the remove & update buttons
-        self.ctrl_remove = ((ctrl_x + (ctrl_w/2.7692)), (ctrl_y + (ctrl_h/19.5714)))
-        self.ctrl_update = ((ctrl_x + (ctrl_w/1.5652)), (ctrl_y + (ctrl_h/19.5714)))
-
-
-        for size in range(6):
-            self.ctrl_size.append((  first_x_coord_of_six_v1 +
-                                     (size * dist_btwn_x_coords_of_six_v1),
-                                     (ctrl_y + (ctrl_h/6.9661))))
-
-        for brush in range(4):
-            self.ctrl_brush.append(( first_x_coord_of_four +
-                                     (brush * dist_btwn_x_coords_of_four),
-                                     (ctrl_y + (ctrl_h/4.2371))))
-
-        for opacity in range(6):
-            self.ctrl_opacity.append((   first_x_coord_of_six_v2 +
-                                         (opacity * dist_btwn_x_coords_of_six_v2),
-                                         (ctrl_y + (ctrl_h/3.0332))))
-
-        for row in range(8):
-            for column in range(4):
-                if (row == 0 or row == 4) and column == 3: continue
-                if (row == 1 or row == 5) and (column == 2 or column == 3): continue
-                if row == 2 and column == 0: continue
-                if row == 3 and (column == 0 or column == 1): continue
-                if row == 6 and column == 2: continue
-                if row == 7 and (column == 1 or column == 2): continue
-                self.ctrl_color.append(  (first_x_coord_of_four + (column * dist_btwn_x_coords_of_four),
-                                         (first_y_coord_of_eight + (row * dist_btwn_y_coords_of_eight))))
-
-        # Hidden colors location
-        if bool(self.settings.value("hidden_colors", default_settings["hidden_colors"])):
-            self.ctrl_color.append((ctrl_x + (ctrl_w/18.0000), ctrl_y + (ctrl_h/2.1518)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/4.2353), ctrl_y + (ctrl_h/2.1406)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/13.0909), ctrl_y + (ctrl_h/1.8430)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.6923), ctrl_y + (ctrl_h/1.9116)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.8228), ctrl_y + (ctrl_h/1.8853)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3714), ctrl_y + (ctrl_h/1.8348)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0746), ctrl_y + (ctrl_h/1.9116)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0667), ctrl_y + (ctrl_h/1.8430)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.8947), ctrl_y + (ctrl_h/1.6440)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3333), ctrl_y + (ctrl_h/1.6181)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.2857), ctrl_y + (ctrl_h/1.6440)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0827), ctrl_y + (ctrl_h/1.6506)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0588), ctrl_y + (ctrl_h/1.6310)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0588), ctrl_y + (ctrl_h/1.6118)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.8462), ctrl_y + (ctrl_h/1.4472)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.4545), ctrl_y + (ctrl_h/1.4784)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3846), ctrl_y + (ctrl_h/1.4838)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3333), ctrl_y + (ctrl_h/1.4784)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.1803), ctrl_y + (ctrl_h/1.4523)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.1077), ctrl_y + (ctrl_h/1.4421)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0746), ctrl_y + (ctrl_h/1.4731)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/18.0000), ctrl_y + (ctrl_h/1.4679)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.7895), ctrl_y + (ctrl_h/1.4371)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/16.0000), ctrl_y + (ctrl_h/1.3258)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.8919), ctrl_y + (ctrl_h/1.3258)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.4286), ctrl_y + (ctrl_h/1.3301)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/16.0000), ctrl_y + (ctrl_h/1.2088)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.6923), ctrl_y + (ctrl_h/1.2342)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/4.0000), ctrl_y + (ctrl_h/1.2018)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.2000), ctrl_y + (ctrl_h/1.1983)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.9200), ctrl_y + (ctrl_h/1.2342)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.4845), ctrl_y + (ctrl_h/1.1844)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3714), ctrl_y + (ctrl_h/1.1844)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0746), ctrl_y + (ctrl_h/1.2053)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/16.0000), ctrl_y + (ctrl_h/1.1048)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/4.2353), ctrl_y + (ctrl_h/1.1078)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3333), ctrl_y + (ctrl_h/1.1078)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.0667), ctrl_y + (ctrl_h/1.1048)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.3488), ctrl_y + (ctrl_h/1.0327)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/3.4286), ctrl_y + (ctrl_h/1.0512)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.4694), ctrl_y + (ctrl_h/1.0327)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/2.7692), ctrl_y + (ctrl_h/1.1982)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/2.0571), ctrl_y + (ctrl_h/1.2160)))
-            self.ctrl_color.append((ctrl_x + (ctrl_w/1.3211), ctrl_y + (ctrl_h/1.4784)))
-
-
-    def calculate_statistics(self):
+        self.painter.set_ctrl_area(config.ctrl_x, config.ctrl_y, config.ctrl_w, config.ctrl_h, config.hidden_colors)
+
+
+    def calculate_statistics(self, config):
         """ Calculate what colors, how many pixels and lines for the painting
         Updates:    self.img_colors,
                     self.tot_pixels,
+                    self.stroke_plan,
+                    self.click_plan,
+                    self.color_order_time_saved,
+                    self.travel_distance_before,
+                    self.travel_distance,
                     self.pixels,
                     self.lines
         """
-        minimum_line_width = int(self.settings.value("minimum_line_width", default_settings["minimum_line_width"]))
-        self.update_skip_colors()
-        pixel_arr = self.quantized_img.load()
+        minimum_line_width = config.minimum_line_width
+        large_brushes = config.large_brushes
+        self.update_skip_colors(config)
 
         self.img_colors = []
         self.tot_pixels = 0
@@ -692,76 +685,54 @@ class rustDaVinci():
                 self.tot_pixels += color[0]
                 self.img_colors.append(color[1])
 
-        for color in self.img_colors:
-            is_first_point_of_row = True
-            is_last_point_of_row = False
-            is_previous_color = False
-            is_line = False
-            pixels_in_line = 0
-
-            for y in range(self.canvas_h):
-                is_first_point_of_row = True
-                is_last_point_of_row = False
-                is_previous_color = False
-                is_line = False
-                pixels_in_line = 0
-
-                for x in range(self.canvas_w):
-                    if x == (self.canvas_w - 1): is_last_point_of_row = True
-
-                    if is_first_point_of_row:
-                        is_first_point_of_row = False
-                        if pixel_arr[x, y] == color:
-                            is_previous_color = True
-                            pixels_in_line = 1
-                        continue
-
-                    if pixel_arr[x, y] == color:
-                        if is_previous_color:
-                            if is_last_point_of_row:
-                                if pixels_in_line >= minimum_line_width: self.lines += 1
-                                else:
-                                    self.pixels += (pixels_in_line + 1)
-                            else: is_line = True; pixels_in_line += 1
-                        else:
-                            if is_last_point_of_row: self.pixels += 1
-                            else:
-                                is_previous_color = True
-                                pixels_in_line = 1
-                    else:
-                        if is_previous_color:
-                            if is_line:
-                                is_line = False
-
-                                if is_last_point_of_row:
-                                    if pixels_in_line >= minimum_line_width: self.lines += 1
-                                    else:
-                                        self.pixels += (pixels_in_line + 1)
-                                    continue
-
-                                if pixels_in_line >= minimum_line_width: self.lines += 1
-                                else: self.pixels += (pixels_in_line + 1)
-                                pixels_in_line = 0
-                            else: self.pixels += 1
-                            is_previous_color = False
-                        else:
-                            is_line = False
-                            pixels_in_line = 0
-
-
-    def calculate_estimated_time(self):
-        """ Calculate estimated time for the painting process.
+        # Plan every stroke of the painting once, it is shared by the estimation and the painting.
+        # Only the fully opaque colors may paint over other pixels, overlapping strokes would darken the others
+        colors_per_opacity = config.colors_per_opacity
+        opaque_colors = range(colors_per_opacity)
+        naive_plan = create_stroke_plan(self.quantized_img, self.img_colors, minimum_line_width,
+                                        self.cost_model, opaque_colors, large_brushes)
+        naive_time = self.cost_model.plan_time(naive_plan, self.img_colors, colors_per_opacity)
+
+        # Reorder the colors to paint over as much as possible, keep the original order if it is faster
+        img_colors = optimize_color_order(  self.quantized_img, self.img_colors, opaque_colors,
+                                            colors_per_opacity, minimum_line_width, self.cost_model)
+        self.stroke_plan = create_stroke_plan(  self.quantized_img, img_colors, minimum_line_width,
+                                                self.cost_model, opaque_colors, large_brushes)
+        self.color_order_time_saved = naive_time - self.cost_model.plan_time(self.stroke_plan, img_colors, colors_per_opacity)
+        if self.color_order_time_saved > 0:
+            self.img_colors = img_colors
+        else:
+            self.stroke_plan = naive_plan
+            self.color_order_time_saved = 0
+
+        # Reorder the strokes of every color to shorten the mouse travel
+        self.travel_distance_before = travel_distance(self.stroke_plan)
+        self.stroke_plan = order_strokes(self.stroke_plan)
+        self.travel_distance = travel_distance(self.stroke_plan)
+        self.click_plan = self.stroke_plan.as_clicks(numpy.asarray(self.quantized_img))
+        self.pixels = self.stroke_plan.clicks
+        self.lines = self.stroke_plan.lines
+
+
+    def calculate_estimated_time(self, config):
+        """ Calculate estimated time for the painting process, with the operation times fitted from the history.
         Updates:    Estimated time for clicking and lines
                     Estimated time for only clicking
+                    self.estimated_operations, the number of clicks, lines and ctrl_clicks of the estimate
         """
-        one_click_time = self.click_delay + 0.001
-        one_click_time = one_click_time * 2 if self.use_double_click else one_click_time
-        one_line_time = (self.line_delay * 5) + 0.0035
-        set_paint_controls_time =   (len(self.img_colors) * ((2 * self.click_delay) + (2 * self.ctrl_area_delay))) + ((2 * self.click_delay) + (2 * self.ctrl_area_delay))
-        est_time_lines = int((self.pixels * one_click_time) + (self.lines * one_line_time) + set_paint_controls_time)
-        est_time_click = int((self.tot_pixels * one_click_time) + set_paint_controls_time)
-
-        if not bool(self.settings.value("draw_lines", default_settings["draw_lines"])):
+        ctrl_clicks = self.cost_model.controls_clicks(self.img_colors, config.colors_per_opacity, self.stroke_plan.size_changes)
+        canvas = self.cost_model.canvas_operations( self.img_colors, self.canvas_h, config.paint_background,
+                                                    config.update_canvas, config.update_canvas_end)
+        operations_lines = {"clicks": canvas["clicks"] + self.stroke_plan.clicks,
+                            "lines": canvas["lines"] + self.stroke_plan.lines,
+                            "ctrl_clicks": canvas["ctrl_clicks"] + ctrl_clicks}
+        operations_click = {"clicks": canvas["clicks"] + self.click_plan.clicks,
+                            "lines": canvas["lines"],
+                            "ctrl_clicks": canvas["ctrl_clicks"] + ctrl_clicks}
+        est_time_lines = int(self.cost_model.operations_time(operations_lines))
+        est_time_click = int(self.cost_model.operations_time(operations_click))
+
+        if not config.draw_lines:
             self.prefer_lines = False
             self.estimated_time = est_time_click
         elif est_time_lines < est_time_click:
@@ -770,29 +741,19 @@ class rustDaVinci():
         else:
             self.prefer_lines = False
             self.estimated_time = est_time_click
+        self.estimated_operations = operations_lines if self.prefer_lines else operations_click
 
 
-    def click_pixel(self, x = 0, y = 0):
-        """ Click the pixel """
-        if isinstance(x, tuple):
-            pyautogui.click(x[0], x[1])
-            if self.use_double_click:
-                pyautogui.click(x[0], x[1])
-        else:
-            pyautogui.click(x, y)
-            if self.use_double_click:
-                pyautogui.click(x, y)
-
-
-    def draw_line(self, point_A, point_B):
-        """ Draws a line between point_A and point_B. """
-        pyautogui.PAUSE = self.line_delay
-        pyautogui.mouseDown(button="left", x=point_A[0], y=point_A[1])
-        pyautogui.keyDown("shift")
-        pyautogui.moveTo(point_B[0], point_B[1])
-        pyautogui.keyUp("shift")
-        pyautogui.mouseUp(button="left")
-        pyautogui.PAUSE = self.click_delay
+    def estimate_text(self, estimated_time):
+        """ Returns:    The estimated time as text, with its confidence interval and its error on the past paintings
+                        once there are enough of them in the history
+        """
+        text = str(time.strftime("%H:%M:%S", time.gmtime(estimated_time)))
+        interval, error = self.timing_history.estimate(estimated_time)
+        if interval != None:
+            text += " (" + " - ".join(str(time.strftime("%H:%M:%S", time.gmtime(value))) for value in interval)
+            text += ", error " + str(int(round(error * 100))) + "%)"
+        return text
 
 
     def key_event(self, key):
@@ -801,20 +762,18 @@ class rustDaVinci():
         except: key_str = str(key.name)
 
         if key_str == self.pause_key:       # Pause
-            self.paused = not self.paused
+            self.painter.toggle_pause()
         elif key_str == self.skip_key:      # Skip color
-            self.paused = False
-            self.skip_current_color = True
+            self.painter.skip_color()
         elif key_str == self.abort_key:     # Abort
-            self.paused = False
-            self.abort = True
+            self.painter.abort()
 
 
-    def shutdown(self, listener, start_time, state = 0):
+    def shutdown(self, listener, start_time, config, state = 0):
         """ Shutdown the painting process """
         self.parent.ui.load_image_PushButton.setEnabled(True)
         self.parent.ui.identify_ctrl_PushButton.setEnabled(True)
-        self.parent.ui.paint_image_PushButton.setEnabled(True)
+        self.parent.ui.paint_image_PushButton.setEnabled(self.org_img_ok and config.has_ctrl_area)
         self.parent.ui.settings_PushButton.setEnabled(True)
 
         listener.stop()
@@ -825,74 +784,40 @@ class rustDaVinci():
 
         if state == 0: self.parent.ui.progress_ProgressBar.setValue(100)
 
-        if bool(self.settings.value("window_topmost", default_settings["window_topmost"])):
+        if config.window_topmost:
             self.parent.setWindowFlags(self.parent.windowFlags() & ~Qt.WindowStaysOnTopHint)
             self.parent.show()
         self.parent.activateWindow()
 
 
-    def choose_painting_controls(self, size, brush, color):
-        """ Choose the paint controls """
-        if self.current_ctrl_size != size:
-            self.current_ctrl_size = size
-            self.click_pixel(self.ctrl_size[size])
-            time.sleep(self.ctrl_area_delay)
-
-        if self.current_ctrl_brush != brush:
-            self.current_ctrl_brush = brush
-            self.click_pixel(self.ctrl_brush[brush])
-            time.sleep(self.ctrl_area_delay)
-
-        if self.use_hidden_colors:
-            if   color >= 0  and color < 64: self.click_pixel(self.ctrl_opacity[5])
-            elif color >= 64 and color < 128: self.click_pixel(self.ctrl_opacity[4])
-            elif color >= 128 and color < 192: self.click_pixel(self.ctrl_opacity[3])
-            elif color >= 192 and color < 256: self.click_pixel(self.ctrl_opacity[2])
-        else:
-            if   color >= 0  and color < 20: self.click_pixel(self.ctrl_opacity[5])
-            elif color >= 20 and color < 40: self.click_pixel(self.ctrl_opacity[4])
-            elif color >= 40 and color < 60: self.click_pixel(self.ctrl_opacity[3])
-            elif color >= 60 and color < 80: self.click_pixel(self.ctrl_opacity[2])
-        time.sleep(self.ctrl_area_delay)
-
-        if self.current_ctrl_color != color:
-            if self.use_hidden_colors:
-                self.click_pixel(self.ctrl_color[color%64])
-            else:
-                self.click_pixel(self.ctrl_color[color%20])
-            time.sleep(self.ctrl_area_delay)
-
-
-    def update_skip_colors(self):
+    def update_skip_colors(self, config):
         """ Updates the skip colors list """
         self.skip_colors = []
-        temp_skip_colors = self.settings.value("skip_colors", default_settings["skip_colors"], "QStringList")
-        if len(temp_skip_colors) != 0:
-            for color in temp_skip_colors:
-                if hex_to_rgb(color) in self.updated_palette:
-                    self.skip_colors.append(self.updated_palette.index(hex_to_rgb(color)))
+        if len(config.skip_colors) != 0:
+            for color in config.skip_colors:
+                if hex_to_rgb(color) in self.palette_index:
+                    self.skip_colors.append(self.palette_index[hex_to_rgb(color)])
 
-        skip_background_color = bool(self.settings.value("skip_background_color", default_settings["skip_background_color"]))
-        if skip_background_color:
-            bg_color_rgb = hex_to_rgb(self.settings.value("background_color", default_settings["background_color"]))
-            use_hidden_colors = bool(self.settings.value("hidden_colors", default_settings["hidden_colors"]))
-            use_opacities = bool(self.settings.value("brush_opacities", default_settings["brush_opacities"]))
+        if config.skip_background_color:
+            bg_color_rgb = config.background_rgb
+            use_hidden_colors = config.hidden_colors
+            use_opacities = config.brush_opacities
 
             bg_colors = []
 
-            if bg_color_rgb in self.updated_palette:
+            if bg_color_rgb in self.palette_index:
                 if use_hidden_colors:
                     if use_opacities:
-                        bg_index = self.updated_palette.index(bg_color_rgb) % 64
+                        bg_index = self.palette_index[bg_color_rgb] % 64
                         bg_colors = [bg_index, bg_index+(64*1), bg_index+(64*2), bg_index+(64*3)]
                     else:
-                        bg_colors = [self.updated_palette.index(bg_color_rgb) % 64]
+                        bg_colors = [self.palette_index[bg_color_rgb] % 64]
                 else:
                     if use_opacities:
-                        bg_index = self.updated_palette.index(bg_color_rgb) % 20
+                        bg_index = self.palette_index[bg_color_rgb] % 20
                         bg_colors = [bg_index, bg_index+(20*1), bg_index+(20*2), bg_index+(20*3)]
                     else:
-                        bg_colors = [self.updated_palette.index(bg_color_rgb) % 20]
+                        bg_colors = [self.palette_index[bg_color_rgb] % 20]
 
             self.skip_colors = self.skip_colors + bg_colors
 
@@ -901,31 +826,17 @@ class rustDaVinci():
 
     def start_painting(self):
         """ Start the painting """
-        # Update global variables
-        self.use_hidden_colors =    bool(self.settings.value("hidden_colors", default_settings["hidden_colors"]))
-        self.pause_key =            str(self.settings.value("pause_key", default_settings["pause_key"])).lower()
-        self.skip_key =             str(self.settings.value("skip_key", default_settings["skip_key"])).lower()
-        self.abort_key =            str(self.settings.value("abort_key", default_settings["abort_key"])).lower()
-
-        # Update local variables
-        minimum_line_width =    int(self.settings.value("minimum_line_width", default_settings["minimum_line_width"]))
-        ctrl_x =                int(self.settings.value("ctrl_x", default_settings["ctrl_x"]))
-        ctrl_y =                int(self.settings.value("ctrl_h", default_settings["ctrl_y"]))
-        ctrl_w =                int(self.settings.value("ctrl_w", default_settings["ctrl_w"]))
-        ctrl_h =                int(self.settings.value("ctrl_h", default_settings["ctrl_h"]))
-        brush_type =            int(self.settings.value("brush_type", default_settings["brush_type"]))
-        use_brush_opacities =   bool(self.settings.value("brush_opacities", default_settings["brush_opacities"]))
-        hide_preview_paint =    bool(self.settings.value("hide_preview_paint", default_settings["hide_preview_paint"]))
-        update_canvas_end =     bool(self.settings.value("update_canvas_end", default_settings["update_canvas_end"]))
-        window_topmost =        bool(self.settings.value("window_topmost", default_settings["window_topmost"]))
-        update_canvas =         bool(self.settings.value("update_canvas", default_settings["update_canvas"]))
-        show_info =             bool(self.settings.value("show_information", default_settings["show_information"]))
-
-
-        self.update()                               # Update click, line, ctrl_area delay
-        self.update_skip_colors()                   # Update self.skip_colors variable
+        # Read the settings once, the whole painting uses this snapshot
+        config = self.paint_config()
+        self.pause_key = config.pause_key.lower()
+        self.skip_key = config.skip_key.lower()
+        self.abort_key = config.abort_key.lower()
+
+        self.update(config)                         # Update click, line, ctrl_area delay
+        config = self.check_control_area(config)    # Confirm the control area
+        if config == None: return
         if not self.locate_canvas_area(): return    # Locate the canvas
-        if not self.convert_img(): return           # Quantize the image
+        if not self.convert_img(config): return     # Quantize the image
 
         # Clear the log
         self.parent.ui.progress_ProgressBar.setValue(0)
@@ -933,9 +844,9 @@ class rustDaVinci():
         self.parent.ui.log_TextEdit.append("Calculating statistics...")
         QApplication.processEvents()
 
-        self.calculate_ctrl_tools_positioning()     # Calculate the control tools positioning
-        self.calculate_statistics()                 # Calculate statistics (colors, total pixels, lines)
-        self.calculate_estimated_time()             # Calculate the estimated time
+        self.calculate_ctrl_tools_positioning(config)   # Calculate the control tools positioning
+        self.calculate_statistics(config)               # Calculate statistics (colors, total pixels, lines)
+        self.calculate_estimated_time(config)           # Calculate the estimated time
 
 
         # Opens a information dialog
@@ -944,13 +855,127 @@ class rustDaVinci():
         question += "\nTotal Number of pixels to paint: \t" + str(self.tot_pixels)
         question += "\nNumber of pixels to paint:\t\t" + str(self.pixels)
         question += "\nNumber of lines:\t\t\t" + str(self.lines)
-        question += "\nEst. painting time:\t\t\t" + str(time.strftime("%H:%M:%S", time.gmtime(self.estimated_time)))
+        question += "\nEst. painting time:\t\t\t" + self.estimate_text(self.estimated_time)
+        question += "\nTime saved by the color order:\t\t" + str(time.strftime("%H:%M:%S", time.gmtime(self.color_order_time_saved)))
+        question += "\nMouse travel (before ordering):\t\t" + str(int(self.travel_distance)) + " px (" + str(int(self.travel_distance_before)) + " px)"
         question += "\n\nWould you like to start the painting?"
-        if show_info:
+        if config.show_information:
             btn = QMessageBox.question(self.parent, None, question, QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
             if btn == QMessageBox.No:
                 return
 
+        # Print out the estimated time and estimated finish time
+        self.parent.ui.log_TextEdit.append("Est. time:\t" + self.estimate_text(self.estimated_time))
+        self.parent.ui.log_TextEdit.append( "Est. finished:\t" + str((datetime.datetime.now() + datetime.timedelta(seconds=self.estimated_time)).time().strftime("%H:%M:%S")))
+
+        # Paint the background with the default background color
+        background_color = self.background_color if config.paint_background else None
+
+        # Replay the stroke plan, split up into clicks if lines are not preferred
+        plan = self.stroke_plan if self.prefer_lines else order_strokes(self.click_plan)
+        canvas_area = (self.canvas_x, self.canvas_y, self.canvas_w, self.canvas_h)
+
+        # Compare the canvas with the image when the painting is completed and repair the pixels that differ
+        verification = None
+        if config.verify_painting:
+            verification = CanvasVerification(  self.painter.backend.screenshot, canvas_area, self.quantized_img,
+                                                self.updated_palette, self.img_colors, config.minimum_line_width)
+
+        self.timing_session = (self.estimated_operations, self.estimated_time)
+        self.begin_painting(config, plan, canvas_area, self.updated_palette, config.brush_type,
+                            background_color, config.update_canvas, config.update_canvas_end, 0, verification)
+
+
+    def resume_painting(self):
+        """ Resume the last painting from its checkpoint, the strokes that are already painted are skipped """
+        saved = self.checkpoint.load()
+        if saved == None:
+            msg = QMessageBox(self.parent)
+            msg.setIcon(QMessageBox.Critical)
+            msg.setText("ERROR! There is no painting to resume...")
+            msg.exec_()
+            return
+
+        config = self.paint_config()
+        self.pause_key = config.pause_key.lower()
+        self.skip_key = config.skip_key.lower()
+        self.abort_key = config.abort_key.lower()
+
+        # The palette indices of the plan are split into the opacity & the color swatch by the colors per opacity
+        # it was planned with, another hidden colors setting would click the wrong controls
+        if saved["colors_per_opacity"] != config.colors_per_opacity:
+            msg = QMessageBox(self.parent)
+            msg.setIcon(QMessageBox.Critical)
+            if saved["colors_per_opacity"] == None:
+                msg.setText("ERROR! The painting was saved without its hidden colors setting, it can't be resumed...")
+            else:
+                setting = "enabled" if saved["colors_per_opacity"] == 64 else "disabled"
+                msg.setText("ERROR! The painting was planned with the hidden colors " + setting + ", change the " +
+                            "setting back to resume it...")
+            msg.exec_()
+            return
+
+        self.update(config)
+        if not config.has_ctrl_area:
+            msg = QMessageBox(self.parent)
+            msg.setIcon(QMessageBox.Critical)
+            msg.setText("ERROR! The painting control area has not been located...")
+            msg.exec_()
+            return
+        config = self.check_control_area(config)
+        if config == None: return
+        self.calculate_ctrl_tools_positioning(config)
+
+        plan, stroke_index = saved["plan"], saved["stroke_index"]
+        remaining = plan[stroke_index:]
+        remaining_colors = [color for color, start, stop in remaining.color_segments()]
+        canvas = self.cost_model.canvas_operations( remaining_colors, saved["canvas_area"][3], False,
+                                                    saved["update_canvas"], saved["update_canvas_end"])
+        estimated_operations = {"clicks": canvas["clicks"] + remaining.clicks, "lines": remaining.lines,
+                                "ctrl_clicks": self.cost_model.controls_clicks(remaining_colors, config.colors_per_opacity, remaining.size_changes)}
+        estimated_time = self.cost_model.operations_time(estimated_operations)
+
+        question = "Canvas:\t\t\t\t" + " x ".join(str(value) for value in saved["canvas_area"][2:])
+        question += "\nColor:\t\t\t\t" + str(saved["color_index"] + 1) + "/" + str(len(plan.color_segments()))
+        question += "\nStrokes painted:\t\t\t" + str(stroke_index) + "/" + str(len(plan))
+        question += "\nEst. remaining time:\t\t" + self.estimate_text(estimated_time)
+        question += "\n\nWould you like to resume the painting?"
+        btn = QMessageBox.question(self.parent, None, question, QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if btn == QMessageBox.No:
+            return
+
+        self.parent.ui.progress_ProgressBar.setValue(0)
+        self.parent.ui.log_TextEdit.clear()
+        self.parent.ui.log_TextEdit.append("Resuming at stroke " + str(stroke_index + 1) + "/" + str(len(plan)))
+        self.parent.ui.log_TextEdit.append("Est. time:\t" + self.estimate_text(estimated_time))
+
+        self.timing_session = (estimated_operations, estimated_time)
+        self.begin_painting(config, plan, saved["canvas_area"], saved["palette"], saved["brush_type"], None,
+                            saved["update_canvas"], saved["update_canvas_end"], stroke_index)
+
+
+    def begin_painting(self, config, plan, canvas_area, palette, brush_type, background_color, update_canvas, update_canvas_end, start_stroke = 0, verification = None):
+        """ Paint the plan on the painting worker, the arguments are those of Painter.paint and PaintWorker """
+        self.start_session(config)
+
+        # Paint on a worker thread, the log, progress bar and shutdown are updated from its signals. The painting
+        # is checkpointed, so that it can be resumed
+        self.paint_thread = QThread()
+        self.paint_worker = PaintWorker(self.painter, plan, canvas_area, palette, brush_type, background_color,
+                                        update_canvas, update_canvas_end, start_stroke, self.checkpoint, verification)
+        self.paint_worker.moveToThread(self.paint_thread)
+        self.paint_thread.started.connect(self.paint_worker.run)
+        self.paint_worker.log.connect(self.parent.ui.log_TextEdit.append)
+        self.paint_worker.progress.connect(self.parent.ui.progress_ProgressBar.setValue)
+        self.paint_worker.finished.connect(self.paint_thread.quit)
+        self.paint_worker.finished.connect(self.parent.painting_finished)
+        self.paint_thread.start()
+
+
+    def start_session(self, config):
+        """ Prepare the main window for painting and start the keyboard listener.
+        Updates:    painting_session
+        """
         # Disable mainwindow buttons while painting
         self.parent.ui.load_image_PushButton.setEnabled(False)
         self.parent.ui.identify_ctrl_PushButton.setEnabled(False)
@@ -958,12 +983,12 @@ class rustDaVinci():
         self.parent.ui.settings_PushButton.setEnabled(False)
 
         # If window_topmost setting is set, activate window always on top functionality
-        if window_topmost:
+        if config.window_topmost:
             self.parent.setWindowFlags(self.parent.windowFlags() | Qt.WindowStaysOnTopHint)
             self.parent.show()
 
         # If hide_preview_paint and self.parent.is_expanded, close image preview
-        if hide_preview_paint and self.parent.is_expanded:
+        if config.hide_preview_paint and self.parent.is_expanded:
             self.parent.preview_clicked()
 
         # Add label info about pause, skip and abort keys
@@ -974,150 +999,143 @@ class rustDaVinci():
                                     self.abort_key + " = Abort")
         self.hotkey_label.show()
 
-        # Paint the background with the default background color
-        self.click_pixel(self.ctrl_size[0]) # To set focus on the rust window
-        time.sleep(.5)
-        self.click_pixel(self.ctrl_size[0])
-        if bool(self.settings.value("paint_background", default_settings["paint_background"])) and self.background_color != None:
-            self.parent.ui.log_TextEdit.append("Painting background for you...")
-            self.choose_painting_controls(5, 3, self.background_color)
-            x_start = self.canvas_x + 10
-            x_end = self.canvas_x + self.canvas_w - 10
-            loops = int((self.canvas_h - 10) / 10)
-            for i in range(1, loops+1):
-                self.draw_line((x_start, self.canvas_y + (10 * i)), (x_end, self.canvas_y + (10 * i)))
-
-
-        # Print out the start time, estimated time and estimated finish time
+        # Print out the start time
         self.parent.ui.log_TextEdit.append("Start time:\t" + str((datetime.datetime.now()).time().strftime("%H:%M:%S")))
-        self.parent.ui.log_TextEdit.append("Est. time:\t" + str(time.strftime("%H:%M:%S", time.gmtime(self.estimated_time))))
-        self.parent.ui.log_TextEdit.append( "Est. finished:\t" + str((datetime.datetime.now() + datetime.timedelta(seconds=self.estimated_time)).time().strftime("%H:%M:%S")))
         QApplication.processEvents()
 
-
-        self.paused = False
-        self.abort = False
-        pixel_counter = 0
-        progress_percent = 0
-        previous_progress_percent = None
-
         start_time = time.time()
-        pixel_arr = self.quantized_img.load()
 
         # Start keyboard listener
         listener = keyboard.Listener(on_press=self.key_event)
         listener.start()
 
-        for counter, color in enumerate(self.img_colors):
-            self.skip_current_color = False
-            # Print current color to the log
-            color_hex = rgb_to_hex(self.updated_palette[color])
-            self.parent.ui.log_TextEdit.append( "(" + str((counter+1)) + "/" +
-                                                str((len(self.img_colors))) +
-                                                ") Current color: " + str(color_hex))
-            QApplication.processEvents()
+        self.painting_session = (listener, start_time, config)
 
-            # Choose painting controls
-            self.choose_painting_controls(0, brush_type, color)
-
-            for y in range(self.canvas_h):
-                if self.skip_current_color: break
-
-                # Calculate percentage for progress bar
-                progress_percent = int(pixel_counter/int(self.tot_pixels/100))
-                if progress_percent != previous_progress_percent:
-                    previous_progress_percent = progress_percent
-                    self.parent.ui.progress_ProgressBar.setValue(progress_percent)
-
-                # Reset variables
-                is_first_point_of_row = True
-                is_last_point_of_row = False
-                is_previous_color = False
-                is_line = False
-                pixels_in_line = 0
-
-                for x in range(self.canvas_w):
-
-                    while self.paused: QApplication.processEvents()
-                    if self.skip_current_color: break
-                    if self.abort:
-                        self.parent.ui.log_TextEdit.append("Aborted...")
-                        return self.shutdown(listener, start_time, 1)
-
-                    if x == (self.canvas_w - 1):
-                        is_last_point_of_row = True
-
-                    if is_first_point_of_row and self.prefer_lines:
-                        is_first_point_of_row = False
-                        if pixel_arr[x, y] == color:
-                            first_point = (self.canvas_x + x, self.canvas_y + y)
-                            is_previous_color = True
-                            pixels_in_line = 1
-                        continue
-
-                    if pixel_arr[x, y] == color:
-                        if not self.prefer_lines:
-                            self.click_pixel(self.canvas_x + x, self.canvas_y + y)
-                            pixel_counter += 1
-                            continue
-                        if is_previous_color:
-                            if is_last_point_of_row:
-                                if pixels_in_line >= minimum_line_width:
-                                    self.draw_line(first_point, (self.canvas_x + x, self.canvas_y + y))
-                                    pixel_counter += pixels_in_line
-                                else:
-                                    for index in range(pixels_in_line):
-                                        self.click_pixel(first_point[0] + index, self.canvas_y + y)
-                                    self.click_pixel(self.canvas_x + x, self.canvas_y + y)
-                                    pixel_counter += pixels_in_line + 1
-                            else:
-                                is_line = True
-                                pixels_in_line += 1
-                        else:
-                            if is_last_point_of_row:
-                                self.click_pixel(self.canvas_x + x, self.canvas_y + y)
-                                pixel_counter += 1
-                            else:
-                                first_point = (self.canvas_x + x, self.canvas_y + y)
-                                is_previous_color = True
-                                pixels_in_line = 1
-                    else:
-                        if not self.prefer_lines: continue
-                        if is_previous_color:
-                            if is_line:
-                                is_line = False
-
-                                if is_last_point_of_row:
-                                    if pixels_in_line >= minimum_line_width:
-                                        self.draw_line(first_point, (self.canvas_x + (x-1), self.canvas_y + y))
-                                        pixel_counter += pixels_in_line
-                                    else:
-                                        for index in range(pixels_in_line):
-                                            self.click_pixel(first_point[0] + index, self.canvas_y + y)
-                                        pixel_counter += pixels_in_line
-                                    continue
-
-                                if pixels_in_line >= minimum_line_width:
-                                    self.draw_line(first_point, (self.canvas_x + (x-1), self.canvas_y + y))
-                                    pixel_counter += pixels_in_line
-                                else:
-                                    for index in range(pixels_in_line):
-                                        self.click_pixel(first_point[0] + index, self.canvas_y + y)
-                                    pixel_counter += pixels_in_line
-                                pixels_in_line = 0
-
-                            else:
-                                self.click_pixel(self.canvas_x + (x-1), self.canvas_y + y)
-                                pixel_counter += 1
-                            is_previous_color = False
-                        else:
-                            is_line = False
-                            pixels_in_line = 0
-
-            if update_canvas:
-                self.click_pixel(self.ctrl_update)
-
-        if update_canvas_end:
-            self.click_pixel(self.ctrl_update)
-
-        return self.shutdown(listener, start_time)
+
+    def painting_finished(self, completed):
+        """ Shutdown the painting process when the painting worker is done (on the GUI thread) """
+        self.paint_thread.wait()
+        self.paint_thread = None
+        self.paint_worker = None
+
+        listener, start_time, config = self.painting_session
+        self.painting_session = None
+        self.shutdown(listener, start_time, config, 0 if completed else 1)
+        self.record_timing(config, completed)
+
+
+    def record_timing(self, config, completed):
+        """ Add the timed operations of the painting to the history, the next estimates are fitted from them """
+        if self.timing_session == None: return
+        estimated_operations, estimated_time = self.timing_session
+        self.timing_session = None
+        if self.painter.telemetry.total_time <= 0: return
+
+        try:
+            self.timing_history.append( self.painter.telemetry, config.delays, config.double_click,
+                                        estimated_operations, estimated_time, completed)
+        except OSError as e:
+            self.parent.ui.log_TextEdit.append("ERROR! Could not save the timing history: " + str(e))
+            return
+        self.update()
+
+
+    def calibrate_delays(self):
+        """ Calibrate the click, line and control area delays by painting a small test pattern in the top left
+        corner of an empty area of the canvas (see DelayCalibration), the current delays must work. The calibrated
+        delays are saved to the settings and to the calibration profile of this machine & screen resolution.
+        """
+        config = self.paint_config()
+        self.pause_key = config.pause_key.lower()
+        self.skip_key = config.skip_key.lower()
+        self.abort_key = config.abort_key.lower()
+
+        self.update(config)
+        if not config.has_ctrl_area:
+            msg = QMessageBox(self.parent)
+            msg.setIcon(QMessageBox.Critical)
+            msg.setText("ERROR! The painting control area has not been located...")
+            msg.exec_()
+            return
+
+        # The test area is not the canvas of the next painting, the preview keeps the size of the last canvas
+        last_canvas_size = self.last_canvas_size
+        located = self.locate_canvas_area()
+        self.last_canvas_size = last_canvas_size
+        if not located: return
+
+        self.calculate_ctrl_tools_positioning(config)
+        self.update_palette(config)
+
+        # The two colors of the first opacity that are the furthest apart
+        colors = self.palette_arr[:config.colors_per_opacity].astype(numpy.int32)
+        distances = ((colors[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2)
+        color_pair = tuple(int(index) for index in numpy.unravel_index(numpy.argmax(distances), distances.shape))
+
+        calibration = DelayCalibration( self.painter, self.painter.backend.screenshot,
+                                        (self.canvas_x, self.canvas_y, self.canvas_w, self.canvas_h),
+                                        self.updated_palette, color_pair, config.brush_type,
+                                        (config.click_delay, config.line_delay, config.ctrl_area_delay), config.double_click)
+
+        self.parent.ui.progress_ProgressBar.setValue(0)
+        self.parent.ui.log_TextEdit.clear()
+        self.parent.ui.log_TextEdit.append("Calibrating the delays...")
+        self.start_session(config)
+
+        self.paint_thread = QThread()
+        self.paint_worker = CalibrationWorker(calibration)
+        self.paint_worker.moveToThread(self.paint_thread)
+        self.paint_thread.started.connect(self.paint_worker.run)
+        self.paint_worker.log.connect(self.parent.ui.log_TextEdit.append)
+        self.paint_worker.finished.connect(self.paint_thread.quit)
+        self.paint_worker.finished.connect(self.parent.calibration_finished)
+        self.paint_thread.start()
+
+
+    def calibration_finished(self, delays):
+        """ Save the calibrated delays (None if the calibration failed) when the calibration worker is done """
+        self.paint_thread.wait()
+        self.paint_thread = None
+        self.paint_worker = None
+
+        listener, start_time, config = self.painting_session
+        self.painting_session = None
+        self.shutdown(listener, start_time, config, 1)
+
+        if delays != None:
+            click_delay, line_delay, ctrl_area_delay = delays
+            for name, value in (("click_delay", click_delay), ("line_delay", line_delay), ("ctrl_area_delay", ctrl_area_delay)):
+                self.settings.setValue(name, value)
+                self.settings.setValue("calibration/" + self.calibration_profile() + "/" + name, value)
+            self.settings.setValue("calibration_profile", self.calibration_profile())
+            self.parent.ui.log_TextEdit.append( "Calibrated delays: click " + str(click_delay) + " ms, line " +
+                                                str(line_delay) + " ms, control area " + str(ctrl_area_delay) + " ms")
+
+        # The painter is left with the delays of the last test pattern
+        self.update()
+
+
+    def calibration_profile(self):
+        """ Returns:    The name of the calibration profile of this machine & screen resolution """
+        width, height = pyautogui.size()
+        return platform.node() + "_" + str(width) + "x" + str(height)
+
+
+    def apply_calibration_profile(self):
+        """ Use the calibrated delays of this machine & screen resolution, if they are not in use already (so
+        that the delays that are changed in the settings are kept until the profile changes) """
+        profile = self.calibration_profile()
+        if self.settings.value("calibration_profile", "") == profile: return
+        if self.settings.value("calibration/" + profile + "/click_delay") == None: return
+
+        for name in ("click_delay", "line_delay", "ctrl_area_delay"):
+            self.settings.setValue(name, self.settings.value("calibration/" + profile + "/" + name))
+        self.settings.setValue("calibration_profile", profile)
+
+
+    def abort_painting(self):
+        """ Abort the painting (if any) and wait for the painting worker to stop """
+        if self.paint_thread is not None:
+            self.painter.abort()
+            self.paint_thread.quit()
+            self.paint_thread.wait()
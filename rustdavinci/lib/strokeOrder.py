@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from lib.strokePlan import StrokePlan, CLICK
+
+# Tours of the clicks are only searched for up to this many clicks of a color, more clicks are dense enough
+# for the serpentine order to be close to the shortest. Every pass of 2-opt scores all the moves at once
+MAX_TOUR_CLICKS = 200
+MAX_TOUR_PASSES = 8
+
+
+def segment_bounds(plan):
+    """ Returns:    A list of (start, stop) of the consecutive strokes with the same color and brush size """
+    if len(plan) == 0: return []
+    is_start = numpy.ones(len(plan), dtype=bool)
+    is_start[1:] = (numpy.diff(plan.color) != 0) | (numpy.diff(plan.size) != 0)
+    starts = numpy.flatnonzero(is_start).tolist()
+    return list(zip(starts, starts[1:] + [len(plan)]))
+
+
+def travel_distance(plan):
+    """ The distance (in canvas pixels) that the cursor travels over the canvas, along the lines and between
+    the strokes of each color & brush size. The trips to the painting controls are not included.
+    Returns:    The travel distance
+    """
+    distance = numpy.hypot(plan.x1 - plan.x0, plan.y1 - plan.y0).sum()
+    for start, stop in segment_bounds(plan):
+        distance += numpy.hypot(plan.x0[start + 1:stop] - plan.x1[start:stop - 1],
+                                plan.y0[start + 1:stop] - plan.y1[start:stop - 1]).sum()
+    return float(distance)
+
+
+def serpentine(x0, y0, x1, y1):
+    """ Order strokes in a boustrophedon: the horizontal strokes (and clicks) row by row, every other row from
+    right to left, then the vertical strokes column by column, every other column from bottom to top.
+    Returns:    The order and which strokes should be drawn in the opposite direction
+    """
+    is_vertical = (x0 == x1) & (y0 != y1)
+    orders, is_reversed = [], numpy.zeros(len(x0), dtype=bool)
+    for is_group, across, along_start, along_end in (   (~is_vertical, y0, x0, x1),
+                                                        (is_vertical, x0, y0, y1)):
+        group = numpy.flatnonzero(is_group)
+        lanes, lane_index = numpy.unique(across[group], return_inverse=True)
+        is_backwards = (lane_index % 2) == 1
+        low = numpy.minimum(along_start[group], along_end[group])
+        high = numpy.maximum(along_start[group], along_end[group])
+        orders.append(group[numpy.lexsort((numpy.where(is_backwards, -high, low), lane_index))])
+
+        # Draw every stroke in the direction of its lane
+        is_reversed[group] = numpy.where(is_backwards, along_start[group] < along_end[group], along_start[group] > along_end[group])
+    return numpy.concatenate(orders), is_reversed
+
+
+def path_length(points, start):
+    """ Returns:    The length of the path from start through all points """
+    path = numpy.vstack((start, points))
+    return numpy.hypot(*numpy.diff(path, axis=0).T).sum()
+
+
+def distance_matrix(points):
+    """ Returns:    The distances between every two points (n x n) """
+    return numpy.hypot(points[:, None, 0] - points[None, :, 0], points[:, None, 1] - points[None, :, 1])
+
+
+def nearest_neighbour_tour(points, start):
+    """ Returns:    The order of the points in a nearest neighbour tour from start """
+    distances = distance_matrix(points)
+    position_distances = numpy.hypot(points[:, 0] - start[0], points[:, 1] - start[1])
+    order = []
+    for _ in range(len(points)):
+        nearest = int(numpy.argmin(position_distances))
+        order.append(nearest)
+        distances[:, nearest] = numpy.inf
+        position_distances = distances[nearest]
+    return numpy.array(order, dtype=int)
+
+
+def two_opt(points, start, order, passes):
+    """ Improve an open tour from start by reversing the parts of it that cross. Every pass scores all the
+    moves at once and applies the best move of every start edge, as long as the moves do not overlap.
+    Returns:    The new order
+    """
+    order = order.copy()
+    n = len(order)
+    for _ in range(passes):
+        # The path with a last point at no distance from every point, so the end of the open path is an edge too
+        distances = numpy.zeros((n + 2, n + 2))
+        distances[:n + 1, :n + 1] = distance_matrix(numpy.vstack((start, points[order])))
+        edges = distances[numpy.arange(n + 1), numpy.arange(1, n + 2)]
+
+        # Reversing path[i + 1:j + 1] replaces the edges (i, i + 1) & (j, j + 1) with (i, j) & (i + 1, j + 1)
+        gain = numpy.triu(distances[:n + 1, :n + 1] + distances[1:, 1:] - edges[:, None] - edges[None, :], 2)
+        best_j = numpy.argmin(gain, axis=1)
+        best_gain = gain[numpy.arange(n + 1), best_j]
+        moves = numpy.flatnonzero(best_gain < -1e-9)
+        if len(moves) == 0: break
+
+        # Moves that touch none of the same points are independent of each other
+        is_used = numpy.zeros(n + 1, dtype=bool)
+        for i in moves[numpy.argsort(best_gain[moves])].tolist():
+            j = int(best_j[i])
+            if is_used[i:j + 1].any(): continue
+            is_used[i:j + 1] = True
+            order[i:j] = order[i:j][::-1]
+    return order
+
+
+def order_strokes(plan):
+    """ Reorder the strokes of each color & brush size to shorten the travel of the cursor. The lines are
+    drawn in a serpentine order and the clicks are visited after them, in a nearest neighbour tour improved
+    by 2-opt if there are few of them (and if it is shorter than the serpentine order).
+    Returns:    The new StrokePlan
+    """
+    x0, y0, x1, y1 = plan.x0.copy(), plan.y0.copy(), plan.x1.copy(), plan.y1.copy()
+    new_order = []
+    for start, stop in segment_bounds(plan):
+        index = numpy.arange(start, stop)
+        is_click = plan.kind[index] == CLICK
+        lines, clicks = index[~is_click], index[is_click]
+
+        order, is_reversed = serpentine(x0[lines], y0[lines], x1[lines], y1[lines])
+        reversed_lines = lines[is_reversed]
+        x0[reversed_lines], x1[reversed_lines] = plan.x1[reversed_lines], plan.x0[reversed_lines]
+        y0[reversed_lines], y1[reversed_lines] = plan.y1[reversed_lines], plan.y0[reversed_lines]
+        lines = lines[order]
+
+        clicks = clicks[serpentine(x0[clicks], y0[clicks], x1[clicks], y1[clicks])[0]]
+        if 2 < len(clicks) <= MAX_TOUR_CLICKS:
+            points = numpy.column_stack((x0[clicks], y0[clicks])).astype(float)
+            position = numpy.array([x1[lines[-1]], y1[lines[-1]]] if len(lines) else points[0], dtype=float)
+            tour = two_opt(points, position, nearest_neighbour_tour(points, position), MAX_TOUR_PASSES)
+            if path_length(points[tour], position) < path_length(points, position):
+                clicks = clicks[tour]
+
+        new_order += [lines, clicks]
+
+    new_order = numpy.concatenate(new_order) if new_order else numpy.zeros(0, dtype=int)
+    return StrokePlan(  plan.color[new_order], plan.kind[new_order], x0[new_order], y0[new_order],
+                        x1[new_order], y1[new_order], plan.size[new_order])
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from lib.costModel import CostModel
+from lib.ctrlArea import ctrl_size_footprints
+
+# Stroke kinds
+CLICK = 0
+LINE = 1
+
+# The pixels of the color that a large brush keeps on every side, the footprints of the brush sizes are approximate
+FOOTPRINT_MARGIN = 1
+
+
+class StrokePlan():
+
+    def __init__(self, color, kind, x0, y0, x1, y1, size = None):
+        """ StrokePlan class init. A stroke plan is the ordered list of every stroke of a painting,
+        stored as compact arrays where index i describes the i:th stroke.
+            color:  The palette index of the stroke
+            kind:   CLICK or LINE
+            x0, y0: The canvas coordinate where the stroke starts
+            x1, y1: The canvas coordinate where the stroke ends (equal to x0, y0 for a click)
+            size:   The brush size of the stroke (all 0 if None)
+        Lines are either horizontal (y0 == y1) or vertical (x0 == x1).
+        """
+        self.color = numpy.asarray(color, dtype=numpy.uint8)
+        self.kind = numpy.asarray(kind, dtype=numpy.uint8)
+        self.x0 = numpy.asarray(x0, dtype=numpy.int32)
+        self.y0 = numpy.asarray(y0, dtype=numpy.int32)
+        self.x1 = numpy.asarray(x1, dtype=numpy.int32)
+        self.y1 = numpy.asarray(y1, dtype=numpy.int32)
+        if size is None: size = numpy.zeros(len(self.kind))
+        self.size = numpy.asarray(size, dtype=numpy.uint8)
+
+
+    def __len__(self):
+        """ The number of strokes in the plan """
+        return len(self.kind)
+
+
+    def __getitem__(self, index):
+        """ The StrokePlan of the strokes at index (a slice or an array of indices) """
+        return StrokePlan(  self.color[index], self.kind[index], self.x0[index], self.y0[index],
+                            self.x1[index], self.y1[index], self.size[index])
+
+
+    @property
+    def clicks(self):
+        """ The number of click strokes """
+        return int(numpy.count_nonzero(self.kind == CLICK))
+
+
+    @property
+    def lines(self):
+        """ The number of line strokes """
+        return int(numpy.count_nonzero(self.kind == LINE))
+
+
+    @property
+    def lengths(self):
+        """ The number of pixels covered by each stroke """
+        return numpy.abs(self.x1 - self.x0) + numpy.abs(self.y1 - self.y0) + 1
+
+
+    @property
+    def pixels(self):
+        """ The number of pixels covered by all strokes """
+        return int(self.lengths.sum())
+
+
+    @property
+    def size_changes(self):
+        """ The number of times the brush size is changed within the strokes of a color """
+        return int(numpy.count_nonzero((numpy.diff(self.size) != 0) & (numpy.diff(self.color) == 0)))
+
+
+    def color_segments(self):
+        """ Split the plan into the consecutive strokes of each color.
+        Returns:    A list of (color, start, stop) where the strokes of color are in [start, stop)
+        """
+        if len(self) == 0: return []
+        starts = numpy.flatnonzero(numpy.diff(self.color)) + 1
+        starts = numpy.concatenate(([0], starts)).tolist()
+        stops = starts[1:] + [len(self)]
+        return [(int(self.color[start]), start, stop) for start, stop in zip(starts, stops)]
+
+
+    def as_clicks(self, pixel_arr = None):
+        """ Split up every line into one click per pixel. If the 2D array of palette indices pixel_arr is given,
+        the clicks on pixels of another color (that lines pass over) are left out.
+        Returns:    The new StrokePlan
+        """
+        lengths = self.lengths
+        index = numpy.repeat(numpy.arange(len(self)), lengths)
+        offset = numpy.arange(len(index)) - numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        x = self.x0[index] + (offset * numpy.sign(self.x1 - self.x0)[index])
+        y = self.y0[index] + (offset * numpy.sign(self.y1 - self.y0)[index])
+        if pixel_arr is not None:
+            is_needed = pixel_arr[y, x] == self.color[index]
+            index, x, y = index[is_needed], x[is_needed], y[is_needed]
+        return StrokePlan(self.color[index], numpy.full(len(index), CLICK), x, y, x, y, self.size[index])
+
+
+def find_runs(pixel_arr):
+    """ Find the horizontal runs of equally colored pixels in a 2D array of palette indices.
+    Returns:    The x-start, x-end, y and color of every run, in row-major order
+    """
+    width = pixel_arr.shape[1]
+    is_run_start = numpy.ones(pixel_arr.shape, dtype=bool)
+    is_run_start[:, 1:] = pixel_arr[:, 1:] != pixel_arr[:, :-1]
+    run_starts = numpy.flatnonzero(is_run_start)
+    run_lengths = numpy.diff(numpy.append(run_starts, pixel_arr.size))
+
+    x0 = run_starts % width
+    return x0, x0 + run_lengths - 1, run_starts // width, pixel_arr.ravel()[run_starts]
+
+
+def trim_runs(x0, x1, y, is_covered):
+    """ Shrink horizontal runs so that they start and end on pixels that are not covered yet.
+    Returns:    The new x-start and x-end, and which runs still have pixels that are not covered
+    """
+    width = is_covered.shape[1]
+    flat_index = numpy.arange(is_covered.size)
+    not_covered = ~is_covered.ravel()
+
+    # The next & previous pixel (in row-major order) that is not covered, for every pixel
+    next_index = numpy.minimum.accumulate(numpy.where(not_covered, flat_index, is_covered.size)[::-1])[::-1]
+    prev_index = numpy.maximum.accumulate(numpy.where(not_covered, flat_index, -1))
+
+    start = next_index[(y * width) + x0]
+    stop = prev_index[(y * width) + x1]
+    is_kept = start <= stop
+    return start - (y * width), stop - (y * width), is_kept
+
+
+def window_sums(mask, footprint):
+    """ Returns:    The number of set pixels of every footprint x footprint window of mask, by top-left corner """
+    integral = numpy.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=numpy.int32)
+    integral[1:, 1:] = mask.cumsum(axis=0, dtype=numpy.int32).cumsum(axis=1, dtype=numpy.int32)
+    return (integral[footprint:, footprint:] - integral[:-footprint, footprint:] -
+            integral[footprint:, :-footprint] + integral[:-footprint, :-footprint])
+
+
+def interior_strokes(is_inside, remaining, footprint):
+    """ Cover the pixels of remaining with strokes of a footprint x footprint brush, where is_inside tells
+    (by top-left corner) where the brush is completely inside the area of the color.
+    Returns:    The top-left corners of the brush as a 2D bool array, and the pixels that they cover
+    """
+    height, width = remaining.shape
+    is_inside = is_inside & (window_sums(remaining, footprint) > 0)
+
+    # Every column of brush positions is covered by one position per footprint rows, plus the first and
+    # last position so that the whole column is painted. Rows of positions then become lines.
+    above = numpy.zeros_like(is_inside)
+    below = numpy.zeros_like(is_inside)
+    above[1:] = is_inside[:-1]
+    below[:-1] = is_inside[1:]
+    on_grid = (numpy.arange(is_inside.shape[0]) % footprint == 0)[:, None]
+    corners = is_inside & (on_grid | ~above | ~below)
+
+    # The pixels covered by the brush, a window sum over the corners padded back to the size of mask
+    padded = numpy.zeros((height + footprint - 1, width + footprint - 1), dtype=numpy.uint8)
+    padded[footprint - 1:footprint - 1 + corners.shape[0], footprint - 1:footprint - 1 + corners.shape[1]] = corners
+    return corners, window_sums(padded, footprint) > 0
+
+
+def mask_time(mask, minimum_line_width, cost_model):
+    """ Returns:    The estimated time of painting the pixels of mask with the smallest brush """
+    times = []
+    for arr in (mask, mask.T):
+        x0, x1, _, value = find_runs(arr.astype(numpy.uint8))
+        lengths = x1 - x0 + 1
+        times.append(runs_time(lengths, (lengths > 1) & (lengths >= minimum_line_width), value, cost_model)[1])
+    return min(times)
+
+
+def large_brush_strokes(pixel_arr, colors, minimum_line_width, cost_model):
+    """ Paint the inside of the large areas of colors with the larger brush sizes, largest first. A size is
+    only used for a color if it is estimated to be faster than painting the same pixels with the smallest
+    brush, including the time of changing the brush size. The footprint of a stroke is kept FOOTPRINT_MARGIN
+    pixels away from the other colors.
+    Returns:    The strokes as color, kind, x0, y0, x1, y1, size arrays and the covered pixels
+    """
+    is_covered = numpy.zeros(pixel_arr.shape, dtype=bool)
+    strokes = [[] for _ in range(7)]
+    if min(pixel_arr.shape) < 2: return [numpy.array([], dtype=numpy.int32) for _ in range(7)], is_covered
+
+    # Only the colors with 2x2 blocks can be painted with a larger brush, and the pixels of the blocks
+    # must take longer to click than changing the brush size does
+    top_left = pixel_arr[:-1, :-1]
+    is_block = (top_left == pixel_arr[1:, :-1]) & (top_left == pixel_arr[:-1, 1:]) & (top_left == pixel_arr[1:, 1:])
+    blocks = numpy.bincount(top_left[is_block], minlength=256)
+    block_colors = [color for color in colors if blocks[color] * 4 * cost_model.click_time > (2 * cost_model.ctrl_click_time)]
+
+    for color in block_colors:
+        is_color = pixel_arr == color
+        rows = numpy.flatnonzero(is_color.any(axis=1))
+        cols = numpy.flatnonzero(is_color.any(axis=0))
+        top, left = rows[0], cols[0]
+        mask = is_color[top:rows[-1] + 1, left:cols[-1] + 1]
+        remaining = mask.copy()
+
+        # The brush is kept FOOTPRINT_MARGIN pixels inside the color, the mask is eroded by the margin
+        window = (2 * FOOTPRINT_MARGIN) + 1
+        eroded = numpy.zeros_like(mask)
+        eroded[FOOTPRINT_MARGIN:mask.shape[0] - FOOTPRINT_MARGIN, FOOTPRINT_MARGIN:mask.shape[1] - FOOTPRINT_MARGIN] = (
+            window_sums(mask, window) == window * window)
+
+        # Where each brush size fits inside the color, a size only fits if the smaller sizes do
+        is_inside = {}
+        for size in range(1, len(ctrl_size_footprints)):
+            footprint = ctrl_size_footprints[size]
+            if footprint > min(mask.shape): break
+            is_inside[size] = window_sums(eroded, footprint) == footprint * footprint
+            if not is_inside[size].any(): break
+
+        for size in sorted(is_inside, reverse=True):
+            footprint = ctrl_size_footprints[size]
+            corners, covered = interior_strokes(is_inside[size], remaining, footprint)
+            if not corners.any(): continue
+
+            # The lines (and single clicks) of the brush
+            x0, x1, y, value = find_runs(corners.astype(numpy.uint8))
+            x0, x1, y = x0[value == 1], x1[value == 1], y[value == 1]
+            is_line = x1 > x0
+            brush_time = cost_model.strokes_time(numpy.count_nonzero(~is_line), numpy.count_nonzero(is_line)) + (2 * cost_model.ctrl_click_time)
+            if brush_time >= mask_time(remaining, minimum_line_width, cost_model) - mask_time(remaining & ~covered, minimum_line_width, cost_model):
+                continue
+
+            remaining &= ~covered
+            offset = footprint // 2
+            for i, values in enumerate((numpy.full(len(x0), color), numpy.where(is_line, LINE, CLICK),
+                                        left + x0 + offset, top + y + offset, left + x1 + offset, top + y + offset,
+                                        numpy.full(len(x0), size))):
+                strokes[i].append(values)
+
+        is_covered[top:rows[-1] + 1, left:cols[-1] + 1] |= mask & ~remaining
+
+    return [numpy.concatenate(values) if values else numpy.array([], dtype=numpy.int32) for values in strokes], is_covered
+
+
+def range_min(values, starts, stops):
+    """ Returns:    The minimum of values[start:stop] for every start & stop, where stop > start """
+    lengths = stops - starts
+    levels = numpy.floor(numpy.log2(numpy.maximum(lengths, 1))).astype(int)
+    minimums = numpy.empty(len(starts), dtype=values.dtype)
+
+    # A sparse table where level k holds the minimum of every 2^k values
+    table = values
+    for level in range(int(levels.max()) + 1 if len(levels) else 0):
+        if level > 0:
+            table = numpy.minimum(table[:-(2 ** (level - 1))], table[2 ** (level - 1):])
+        is_level = levels == level
+        minimums[is_level] = numpy.minimum( table[starts[is_level]],
+                                            table[stops[is_level] - (2 ** level)])
+    return minimums
+
+
+def bridge_runs(x0, x1, y, color, rank, pixel_rank, minimum_line_width, cost_model):
+    """ Merge horizontal runs of the same color in a row into lines over the pixels in between, if all of
+    those pixels are painted over later by a fully opaque color (pixel_rank holds the rank of the final color
+    of every pixel, -1 if it may not be painted over). Which runs of a chain are merged is chosen by cost_model.
+    Returns:    The x-start, x-end, y, color, rank and if the run is a line, of the new runs
+    """
+    width = pixel_rank.shape[1]
+    minimum_line = max(minimum_line_width, 2)
+    if len(x0) == 0: return x0, x1, y, color, rank, numpy.zeros(0, dtype=bool)
+    order = numpy.lexsort((x0, y, color))
+    x0, x1, y, color, rank = x0[order], x1[order], y[order], color[order], rank[order]
+    is_line = (x1 - x0 + 1) >= minimum_line
+
+    # Can the gap between a run and the next run of the same color in the row be painted over
+    is_neighbour = numpy.flatnonzero((color[1:] == color[:-1]) & (y[1:] == y[:-1]))
+    can_bridge = numpy.zeros(max(len(x0) - 1, 0), dtype=bool)
+    can_bridge[is_neighbour] = range_min(   pixel_rank.ravel(),
+                                            (y[is_neighbour] * width) + x1[is_neighbour] + 1,
+                                            (y[is_neighbour] * width) + x0[is_neighbour + 1]) >= rank[is_neighbour]
+
+    # Chains of runs that can be bridged, only chains long enough for a line can be improved
+    chain_first = numpy.flatnonzero(numpy.concatenate(([True], ~can_bridge)))
+    chain_last = numpy.append(chain_first[1:], len(x0)) - 1
+    is_chain = (chain_last > chain_first) & ((x1[chain_last] - x0[chain_first] + 1) >= minimum_line)
+
+    is_kept = numpy.ones(len(x0), dtype=bool)
+    starts, ends = x0.tolist(), x1.tolist()
+    for first, last in zip(chain_first[is_chain].tolist(), chain_last[is_chain].tolist()):
+        # best[i] is the time of the first i runs, a run is either clicked or the last run of a line that
+        # starts at some earlier run (the minimum of best over those starts is kept in best_start)
+        best = [0]
+        best_start = [(0, 0)]
+        choice = []
+        possible_starts = 0
+        for i in range(last - first + 1):
+            while possible_starts <= i and starts[first + possible_starts] <= ends[first + i] - minimum_line + 1:
+                possible_starts += 1
+            time = best[i] + ((ends[first + i] - starts[first + i] + 1) * cost_model.click_time)
+            start = -1
+            if possible_starts > 0 and best_start[possible_starts - 1][0] + cost_model.line_time < time:
+                time = best_start[possible_starts - 1][0] + cost_model.line_time
+                start = best_start[possible_starts - 1][1]
+            best.append(time)
+            best_start.append(min(best_start[-1], (time, i + 1)))
+            choice.append(start)
+
+        i = last - first
+        while i >= 0:
+            start = choice[i]
+            if start == -1:
+                is_line[first + i] = False
+                i -= 1
+            else:
+                x1[first + start] = x1[first + i]
+                is_line[first + start] = True
+                is_kept[first + start + 1:first + i + 1] = False
+                i = start - 1
+
+    return x0[is_kept], x1[is_kept], y[is_kept], color[is_kept], rank[is_kept], is_line[is_kept]
+
+
+def painted_runs(pixel_arr, is_covered, color_rank, pixel_rank, minimum_line_width, cost_model):
+    """ Find the horizontal runs of the painted colors, shrunk to the pixels that are not covered yet and
+    bridged over the pixels that are painted over later.
+    Returns:    The x-start, x-end, y, color, rank and if the run is a line, of every run
+    """
+    x0, x1, y, color = find_runs(pixel_arr)
+    if is_covered.any():
+        x0, x1, is_kept = trim_runs(x0, x1, y, is_covered)
+        x0, x1, y, color = x0[is_kept], x1[is_kept], y[is_kept], color[is_kept]
+
+    # Colors not in img_colors are not painted
+    rank = color_rank[color]
+    is_painted = rank >= 0
+    x0, x1, y, color, rank = x0[is_painted], x1[is_painted], y[is_painted], color[is_painted], rank[is_painted]
+
+    if (pixel_rank >= 0).any():
+        return bridge_runs(x0, x1, y, color, rank, pixel_rank, minimum_line_width, cost_model)
+    lengths = x1 - x0 + 1
+    return x0, x1, y, color, rank, (lengths > 1) & (lengths >= minimum_line_width)
+
+
+def runs_time(lengths, is_line, color, cost_model):
+    """ Returns:    The estimated time of painting the runs, per palette index """
+    clicks = numpy.bincount(color[~is_line], weights=lengths[~is_line], minlength=256)
+    lines = numpy.bincount(color[is_line], minlength=256)
+    return cost_model.strokes_time(clicks, lines)
+
+
+def create_stroke_plan(quantized_img, img_colors, minimum_line_width, cost_model = None, opaque_colors = (), large_brushes = False):
+    """ Create the stroke plan for a quantized image. If large_brushes, the inside of large areas of the
+    opaque_colors are painted with the larger brush sizes first. Everything else is painted with the smallest
+    brush, each color either with horizontal or with vertical runs, whichever is estimated to be faster by
+    cost_model. Runs of a color may be merged over pixels that are painted over later by one of the
+    opaque_colors. Every run that is at least minimum_line_width (and two) pixels long becomes a line, all
+    other pixels become clicks. The strokes are ordered by the color order of img_colors, the brush size
+    (largest first) and then top-to-bottom, left-to-right.
+    Returns:    The StrokePlan
+    """
+    if cost_model == None: cost_model = CostModel()
+    pixel_arr = numpy.asarray(quantized_img, dtype=numpy.uint8)
+
+    # Rank of each color in the painting order, colors not in img_colors are not painted
+    color_rank = numpy.full(256, -1, dtype=numpy.int32)
+    color_rank[numpy.asarray(img_colors, dtype=numpy.uint8)] = numpy.arange(len(img_colors))
+
+    # The rank of every pixel that may be painted over by earlier colors
+    is_opaque = numpy.zeros(256, dtype=bool)
+    is_opaque[numpy.asarray(list(opaque_colors), dtype=numpy.uint8)] = True
+    pixel_rank = numpy.where(is_opaque[pixel_arr], color_rank[pixel_arr], -1)
+
+    # Large brush strokes only cover pixels of their own color, the painting order of the colors is kept
+    large_colors = [color for color in img_colors if is_opaque[color]] if large_brushes else []
+    large_strokes, is_covered = large_brush_strokes(pixel_arr, large_colors, minimum_line_width, cost_model)
+
+    # Find the runs in both orientations and choose the faster one for every color
+    h_x0, h_x1, h_y, h_color, h_rank, h_is_line = painted_runs(
+        pixel_arr, is_covered, color_rank, pixel_rank, minimum_line_width, cost_model)
+    v_y0, v_y1, v_x, v_color, v_rank, v_is_line = painted_runs(
+        pixel_arr.T, is_covered.T, color_rank, pixel_rank.T, minimum_line_width, cost_model)
+    is_vertical = ( runs_time(v_y1 - v_y0 + 1, v_is_line, v_color, cost_model) <
+                    runs_time(h_x1 - h_x0 + 1, h_is_line, h_color, cost_model))
+    h_runs = ~is_vertical[h_color]
+    v_runs = is_vertical[v_color]
+
+    x0 = numpy.concatenate((h_x0[h_runs], v_x[v_runs]))
+    y0 = numpy.concatenate((h_y[h_runs], v_y0[v_runs]))
+    x1 = numpy.concatenate((h_x1[h_runs], v_x[v_runs]))
+    y1 = numpy.concatenate((h_y[h_runs], v_y1[v_runs]))
+    color = numpy.concatenate((h_color[h_runs], v_color[v_runs]))
+    rank = numpy.concatenate((h_rank[h_runs], v_rank[v_runs]))
+    is_line = numpy.concatenate((h_is_line[h_runs], v_is_line[v_runs]))
+    lengths = (x1 - x0) + (y1 - y0) + 1
+    kind = numpy.where(is_line, LINE, CLICK)
+
+    # Split the runs that are not lines into single clicks, except on the pixels that are already covered or
+    # that are painted over later
+    plan = StrokePlan(color[~is_line], kind[~is_line], x0[~is_line], y0[~is_line], x1[~is_line], y1[~is_line]).as_clicks()
+    click_rank = numpy.repeat(rank[~is_line], lengths[~is_line])
+    is_needed = ~is_covered[plan.y0, plan.x0] & (pixel_arr[plan.y0, plan.x0] == plan.color)
+    click_rank = click_rank[is_needed]
+
+    # Merge large brush strokes, lines and clicks back into scan order and group them by color and size
+    l_color, l_kind, l_x0, l_y0, l_x1, l_y1, l_size = large_strokes
+    strokes_x = numpy.concatenate((l_x0, x0[is_line], plan.x0[is_needed]))
+    strokes_y = numpy.concatenate((l_y0, y0[is_line], plan.y0[is_needed]))
+    strokes_size = numpy.concatenate((l_size, numpy.zeros(numpy.count_nonzero(is_line)), plan.size[is_needed])).astype(numpy.int32)
+    strokes_rank = numpy.concatenate((color_rank[l_color.astype(numpy.int32)], rank[is_line], click_rank))
+    order = numpy.lexsort((strokes_x, strokes_y, -strokes_size, strokes_rank))
+
+    return StrokePlan(  numpy.concatenate((l_color, color[is_line], plan.color[is_needed]))[order],
+                        numpy.concatenate((l_kind, kind[is_line], plan.kind[is_needed]))[order],
+                        strokes_x[order],
+                        strokes_y[order],
+                        numpy.concatenate((l_x1, x1[is_line], plan.x1[is_needed]))[order],
+                        numpy.concatenate((l_y1, y1[is_line], plan.y1[is_needed]))[order],
+                        strokes_size[order])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy
+
+from lib.paletteLut import closest_indices
+from lib.strokePlan import StrokePlan, find_runs, CLICK, LINE
+
+# A pixel on the screen matches its palette color if it is closer to it than to every other color of the image
+# (some colors of the palette are only 24 apart) and at most this far away from it (rgb euclidean distance)
+VERIFY_TOLERANCE = 48
+
+# The most verification & repair passes after a painting
+VERIFY_PASSES = 2
+
+
+def to_canvas_grid(shot, width, height):
+    """ Sample a screenshot of the canvas at the centers of the canvas pixels, the screenshot is larger than the
+    canvas with display scaling.
+    Returns:    The rgb pixels of the canvas (height x width x 3)
+    """
+    if shot.shape[:2] == (height, width):
+        return shot
+    ys = ((numpy.arange(height) + 0.5) * shot.shape[0] / height).astype(int)
+    xs = ((numpy.arange(width) + 0.5) * shot.shape[1] / width).astype(int)
+    return shot[ys][:, xs]
+
+
+def mismatched_pixels(canvas_rgb, target, palette, colors, tolerance = VERIFY_TOLERANCE):
+    """ Compare the canvas with the target image. Only the pixels of colors (the painted colors) are compared,
+    a pixel matches if it is closer to its palette color than to any other color of the target and within
+    tolerance of it.
+        canvas_rgb: The rgb pixels of the canvas (h x w x 3)
+        target:     The palette indices of the image (h x w)
+        palette:    The rgb colors of the palette indices
+        colors:     The palette indices that are painted
+        tolerance:  The largest rgb distance that matches
+    Returns:    A bool array (h x w) of the pixels that do not match
+    """
+    palette = numpy.array(palette, dtype=numpy.float64)
+    pixels = canvas_rgb.reshape(-1, 3).astype(numpy.float64)
+    target = target.ravel()
+
+    is_painted = numpy.zeros(256, dtype=bool)
+    is_painted[numpy.asarray(list(colors), dtype=numpy.uint8)] = True
+    checked = numpy.flatnonzero(is_painted[target])
+
+    # The closest of the colors that are in the target, colors with the same rgb value are the same
+    image_colors = numpy.unique(target)
+    closest = image_colors[closest_indices(pixels[checked], palette[image_colors])]
+    is_closest = (palette[closest] == palette[target[checked]]).all(axis=1)
+    is_near = ((pixels[checked] - palette[target[checked]]) ** 2).sum(axis=1) <= tolerance ** 2
+
+    mismatched = numpy.zeros(target.shape, dtype=bool)
+    mismatched[checked] = ~(is_closest & is_near)
+    return mismatched.reshape(canvas_rgb.shape[:2])
+
+
+def repair_plan(target, mismatched, colors, minimum_line_width):
+    """ Create the plan that repaints the mismatched pixels. Runs of mismatched pixels of the same color that are
+    at least minimum_line_width (and two) pixels long become lines, the other pixels clicks. The strokes are
+    ordered by the order of colors and then top-to-bottom, left-to-right.
+    Returns:    The StrokePlan
+    """
+    x0, x1, y, color = find_runs(numpy.where(mismatched, target.astype(numpy.int16), -1))
+    is_repaired = color >= 0
+    x0, x1, y, color = x0[is_repaired], x1[is_repaired], y[is_repaired], color[is_repaired]
+    lengths = x1 - x0 + 1
+    is_line = (lengths > 1) & (lengths >= minimum_line_width)
+
+    clicks = StrokePlan(color[~is_line], numpy.full(numpy.count_nonzero(~is_line), CLICK), x0[~is_line], y[~is_line], x1[~is_line], y[~is_line]).as_clicks()
+    color = numpy.concatenate((color[is_line], clicks.color))
+    kind = numpy.concatenate((numpy.full(numpy.count_nonzero(is_line), LINE), clicks.kind))
+    x0 = numpy.concatenate((x0[is_line], clicks.x0))
+    x1 = numpy.concatenate((x1[is_line], clicks.x1))
+    y = numpy.concatenate((y[is_line], clicks.y0))
+
+    color_rank = numpy.full(256, len(colors), dtype=numpy.int32)
+    color_rank[numpy.asarray(list(colors), dtype=numpy.uint8)] = numpy.arange(len(colors))
+    order = numpy.lexsort((x0, y, color_rank[color]))
+    return StrokePlan(color[order], kind[order], x0[order], y[order], x1[order], y[order])
+
+
+class CanvasVerification():
+
+    def __init__(self, screenshot, canvas_area, target, palette, colors, minimum_line_width, tolerance = VERIFY_TOLERANCE):
+        """ CanvasVerification class init. Compares the canvas on the screen with the image that was painted.
+            screenshot:         A function (x, y, w, h) -> the rgb pixels of that area of the screen (h x w x 3)
+            canvas_area:        (x, y, w, h) of the canvas on the screen
+            target:             The palette indices of the image, the size of the canvas
+            palette:            The rgb colors of the palette indices
+            colors:             The painted palette indices, in painting order
+            minimum_line_width: The shortest run of pixels that is repaired with a line
+            tolerance:          The largest rgb distance that matches
+        """
+        self.screenshot = screenshot
+        self.canvas_area = canvas_area
+        self.target = numpy.asarray(target, dtype=numpy.uint8)
+        self.palette = palette
+        self.colors = list(colors)
+        self.minimum_line_width = minimum_line_width
+        self.tolerance = tolerance
+
+
+    def mismatched(self, colors):
+        """ Returns:    A bool array of the canvas pixels of colors that do not match the image """
+        canvas_x, canvas_y, canvas_w, canvas_h = self.canvas_area
+        shot = numpy.asarray(self.screenshot(canvas_x, canvas_y, canvas_w, canvas_h))
+        canvas_rgb = to_canvas_grid(shot, canvas_w, canvas_h)
+        return mismatched_pixels(canvas_rgb, self.target, self.palette, colors, self.tolerance)
+
+
+    def repair_plan(self, skipped_colors = ()):
+        """ Returns:    The StrokePlan that repaints the pixels that do not match the image, except the pixels of
+                        skipped_colors (the colors that were skipped while painting)
+        """
+        colors = [color for color in self.colors if color not in skipped_colors]
+        return repair_plan(self.target, self.mismatched(colors), colors, self.minimum_line_width)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.inputBackend import DroppingCanvasBackend
+from lib.calibration import DelayCalibration, CalibrationError, CLICK_DELAY, LINE_DELAY, CTRL_AREA_DELAY
+from lib.painter import Painter
+
+CANVAS_AREA = (500, 300, 200, 120)
+CTRL_AREA = (1474, 175, 200, 576)
+
+# The current click, line and control area delays in milliseconds
+CURRENT_DELAYS = (20, 30, 180)
+
+
+class TestDelayCalibration(unittest.TestCase):
+
+    def calibration(self, delays, thresholds):
+        """ Returns:    A DelayCalibration from delays on a DroppingCanvasBackend that loses the input sooner than
+                        thresholds (milliseconds)
+        """
+        backend = DroppingCanvasBackend(CANVAS_AREA, CTRL_AREA, False, 255, *(value / 1000 for value in thresholds))
+        painter = Painter(backend)
+        painter.set_ctrl_area(*CTRL_AREA, False)
+        palette = [tuple(color) for color in backend.palette.tolist()]
+        return DelayCalibration(painter, backend.screenshot, CANVAS_AREA, palette, (0, 1), 1, delays)
+
+
+    def calibrate(self, thresholds):
+        """ Returns:    The delays calibrated from CURRENT_DELAYS """
+        return self.calibration(CURRENT_DELAYS, thresholds).calibrate()
+
+
+    def assert_delays_work(self, delays, thresholds):
+        """ Paint every test pattern twice with delays on a fresh backend, every stroke must register (the click
+        that sets the focus on the window may be lost)
+        """
+        calibration = self.calibration(delays, thresholds)
+        for delay in (CLICK_DELAY, LINE_DELAY, CTRL_AREA_DELAY):
+            for _ in range(2):
+                self.assertTrue(calibration.paint_pattern(delay, delays))
+
+
+    def test_delays_work_together(self):
+        """ The click pause is part of the time the painting controls get, the control area delay must be found
+        with the calibrated click delay
+        """
+        thresholds = (7, 13, 50)
+        delays = self.calibrate(thresholds)
+        self.assertEqual(delays[CLICK_DELAY], 9)
+        self.assertEqual(delays[LINE_DELAY], 16)
+        self.assertGreaterEqual(delays[CLICK_DELAY] + delays[CTRL_AREA_DELAY], thresholds[CTRL_AREA_DELAY])
+        self.assertTrue(all(delay <= current for delay, current in zip(delays, CURRENT_DELAYS)))
+        self.assert_delays_work(delays, thresholds)
+
+
+    def test_no_thresholds(self):
+        delays = self.calibrate((0, 0, 0))
+        self.assertEqual(delays, [0, 0, 0])
+
+
+    def test_current_delays_fail(self):
+        with self.assertRaises(CalibrationError):
+            self.calibrate((25, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy
+import cv2
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.ctrlAreaSearch import template_pyramid, locate_template, confirm_region, confirm_template, CtrlAreaCache, TEMPLATE_PATH
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), TEMPLATE_PATH)
+
+# The size (w, h) of the synthetic screenshots
+SCREEN_SIZE = (1920, 1080)
+
+
+class DictSettings():
+
+    def __init__(self):
+        """ The value & setValue of QSettings, in a dict """
+        self.values = {}
+
+
+    def value(self, key, default = None):
+        return self.values.get(key, default)
+
+
+    def setValue(self, key, value):
+        self.values[key] = value
+
+
+def screen(seed):
+    """ Returns:    A grayscale screenshot of smooth shapes and some noise, like a blurry game scene """
+    rng = numpy.random.RandomState(seed)
+    screen_gray = cv2.resize(rng.randint(0, 256, (27, 48)).astype(numpy.uint8), SCREEN_SIZE, interpolation=cv2.INTER_CUBIC)
+    return numpy.clip(screen_gray + rng.randint(-8, 9, screen_gray.shape), 0, 255).astype(numpy.uint8)
+
+
+def plant(screen_gray, template, x, y):
+    """ Returns:    A copy of screen_gray with template at (x, y) """
+    screen_gray = screen_gray.copy()
+    screen_gray[y:y + template.shape[0], x:x + template.shape[1]] = template
+    return screen_gray
+
+
+class TestCtrlAreaSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pyramid = template_pyramid(TEMPLATE)
+
+
+    def test_locate_template(self):
+        """ The template is found at the exact position and scale it was planted at """
+        for scale_index, x, y, seed in ((0, 1474, 175, 0), (12, 1203, 301, 1)):
+            template = self.pyramid.templates[scale_index]
+            screen_gray = plant(screen(seed), template, x, y)
+            area, found_scale, timings = locate_template(screen_gray, self.pyramid)
+            self.assertEqual(area, (x, y, template.shape[1], template.shape[0]))
+            self.assertEqual(found_scale, scale_index)
+            self.assertEqual(len(timings), len(self.pyramid.templates) + 1)
+
+
+    def test_no_template(self):
+        area, found_scale, _ = locate_template(screen(2), self.pyramid)
+        self.assertEqual((area, found_scale), (False, None))
+
+
+    def test_confirm_cached_area(self):
+        """ A cached area is confirmed while the screen shows the template there, and rejected once it changes """
+        scale_index = 5
+        template = self.pyramid.templates[scale_index]
+        screen_gray = plant(screen(3), template, 1500, 200)
+        area, found_scale, _ = locate_template(screen_gray, self.pyramid)
+        cache = CtrlAreaCache(DictSettings())
+        cache.store(SCREEN_SIZE, found_scale, area)
+        self.assertEqual(cache.areas(SCREEN_SIZE), [(scale_index, area)])
+        self.assertEqual(cache.scale_of(SCREEN_SIZE, area), scale_index)
+        self.assertEqual(cache.areas((2560, 1440)), [])
+
+        def confirm(screen_gray):
+            region = confirm_region(area, SCREEN_SIZE)
+            x, y, w, h = region
+            return confirm_template(screen_gray[y:y + h, x:x + w], region, self.pyramid.templates[cache.scale_of(SCREEN_SIZE, area)])
+
+        self.assertEqual(confirm(screen_gray), area)
+
+        # The controls moved a few pixels, within the margin of the region
+        self.assertEqual(confirm(plant(screen(3), template, 1503, 196)), (1503, 196) + area[2:])
+
+        # The controls are somewhere else or hidden, or the UI scale changed
+        self.assertFalse(confirm(plant(screen(3), template, 1200, 200)))
+        self.assertFalse(confirm(screen(4)))
+        bigger = self.pyramid.templates[scale_index + 4]
+        self.assertFalse(confirm(plant(screen(3), bigger, 1500 - 20, 200 - 30)))
+
+
+    def test_confirm_region(self):
+        self.assertEqual(confirm_region((100, 50, 200, 400), SCREEN_SIZE, 8), (92, 42, 216, 416))
+        self.assertEqual(confirm_region((2, 3, 200, 400), SCREEN_SIZE, 8), (0, 0, 210, 411))
+        self.assertEqual(confirm_region((1800, 700, 120, 380), SCREEN_SIZE, 8), (1792, 692, 128, 388))
+
+
+if __name__ == "__main__":
+    unittest.main()
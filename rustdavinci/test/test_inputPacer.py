@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.inputPacer import InputPacer
+
+# The pause (seconds) after every paced event, short enough for the tests to be quick
+PAUSE = 0.003
+
+
+class TestInputPacer(unittest.TestCase):
+
+    def issue_events(self, pacer, pauses, work = 0):
+        """ Issue an event for every pause, doing work seconds of other things after each.
+        Returns:    The time (time.perf_counter) right after every event was issued
+        """
+        issued = []
+        for pause in pauses:
+            pacer.issue(pause)
+            issued.append(time.perf_counter())
+            end = issued[-1] + work
+            while time.perf_counter() < end: pass
+        return issued
+
+
+    def test_deadlines(self):
+        """ No event is issued before its deadline, which is the pause after the previous event was issued """
+        pacer = InputPacer()
+        pauses = [PAUSE, 0, PAUSE * 2, 0.0005, PAUSE] * 8
+        issued = self.issue_events(pacer, pauses)
+        self.assertEqual(len(pacer.actual), len(pauses) - 1)
+
+        scheduled, actual = list(pacer.scheduled), list(pacer.actual)
+        for index in range(len(actual)):
+            self.assertGreaterEqual(actual[index], scheduled[index])
+            self.assertLessEqual(actual[index], issued[index + 1])
+        for index in range(1, len(actual)):
+            self.assertAlmostEqual(scheduled[index], actual[index - 1] + pauses[index], places=9)
+        self.assertTrue((pacer.lateness() >= 0).all())
+
+
+    def test_work_is_part_of_the_pause(self):
+        """ The time spent between two events counts towards the pause, a late event is issued at once """
+        pacer = InputPacer()
+        self.issue_events(pacer, [PAUSE] * 10, work=PAUSE / 2)
+        for scheduled, actual in zip(list(pacer.scheduled)[1:], list(pacer.actual)[:-1]):
+            self.assertAlmostEqual(scheduled, actual + PAUSE, places=9)
+
+        pacer.reset()
+        self.issue_events(pacer, [PAUSE] * 5, work=PAUSE * 2)
+        self.assertTrue((pacer.lateness()[-4:] >= PAUSE * 0.99).all())
+
+
+    def test_delay(self):
+        """ A sleep between two events moves the deadline of the next event """
+        pacer = InputPacer()
+        pacer.issue(PAUSE)
+        deadline = pacer.deadline
+        pacer.delay(PAUSE * 2)
+        self.assertAlmostEqual(pacer.deadline, deadline + (PAUSE * 2), places=9)
+        pacer.delay(PAUSE)
+        pacer.issue(0)
+        self.assertAlmostEqual(pacer.scheduled[-1], deadline + (PAUSE * 3), places=9)
+        self.assertGreaterEqual(pacer.actual[-1], deadline + (PAUSE * 3))
+
+        # Without a deadline the sleep starts now
+        pacer.reset()
+        before = time.perf_counter()
+        pacer.delay(PAUSE)
+        self.assertGreaterEqual(pacer.deadline, before + PAUSE)
+        self.assertGreaterEqual(pacer.wait(), before + PAUSE)
+
+
+    def test_reset(self):
+        """ After a reset the next event is issued at once and is not recorded """
+        pacer = InputPacer()
+        pacer.issue(10)
+        pacer.reset()
+        start = time.perf_counter()
+        pacer.issue(PAUSE)
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(len(pacer.actual), 0)
+
+
+    def test_statistics(self):
+        pacer = InputPacer(history=20)
+        self.assertIsNone(pacer.statistics())
+
+        self.issue_events(pacer, [PAUSE / 3] * 30)
+        statistics = pacer.statistics()
+        self.assertEqual(set(statistics), {"events", "p50", "p99", "max"})
+        self.assertEqual(statistics["events"], 20)
+        self.assertTrue(0 <= statistics["p50"] <= statistics["p99"] <= statistics["max"])
+        self.assertEqual(statistics["max"], pacer.lateness().max())
+
+        pacer.clear()
+        self.assertIsNone(pacer.statistics())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import tempfile
+import numpy
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.paintTiming import TimingHistory, PaintTelemetry, OPERATIONS, MIN_OPERATIONS, CONFIDENCE_Z
+from lib.costModel import CostModel
+
+# The click, line and control area delays (seconds) of the current settings
+DELAYS = (0.02, 0.03, 0.18)
+
+# The counts of operations of a painting, and of the painting that is estimated
+COUNTS = {"clicks": 1000, "lines": 300, "ctrl_clicks": 60}
+PLANNED = {"clicks": 4000, "lines": 900, "ctrl_clicks": 120}
+
+
+def record(mean_times, counts = COUNTS, delays = DELAYS, double_click = False, planned = COUNTS, actual_time = None,
+           completed = True):
+    """ Returns:    A recorded painting where every operation took mean_times (a dict of operation: seconds) """
+    times = {operation: mean_times[operation] * counts[operation] for operation in OPERATIONS}
+    return {"delays": list(delays),
+            "double_click": double_click,
+            "counts": dict(counts),
+            "times": times,
+            "planned": dict(planned),
+            "estimated_time": sum(times.values()),
+            "actual_time": sum(times.values()) if actual_time == None else actual_time,
+            "completed": completed}
+
+
+def fitted_times(cost_model):
+    """ Returns:    The times of cost_model as a dict of operation: seconds """
+    return {"clicks": cost_model.click_time, "lines": cost_model.line_time, "ctrl_clicks": cost_model.ctrl_click_time}
+
+
+class TestCostModel(unittest.TestCase):
+
+    def assert_times(self, cost_model, expected):
+        for operation in OPERATIONS:
+            self.assertAlmostEqual(fitted_times(cost_model)[operation], expected[operation], places=9)
+
+
+    def test_no_history(self):
+        history = TimingHistory("unused")
+        default = fitted_times(CostModel(*DELAYS, False))
+        self.assert_times(history.cost_model(DELAYS, False, []), default)
+
+        # Too few operations of a kind to fit its time
+        few = dict(COUNTS, lines=MIN_OPERATIONS - 1)
+        fitted = history.cost_model(DELAYS, False, [record({"clicks": 0.025, "lines": 0.2, "ctrl_clicks": 0.21}, few)])
+        self.assert_times(fitted, {"clicks": 0.025, "lines": default["lines"], "ctrl_clicks": 0.21})
+
+
+    def test_same_delays(self):
+        """ The mean time of every operation, weighted by the number of operations of each painting """
+        history = TimingHistory("unused")
+        records = [ record({"clicks": 0.024, "lines": 0.16, "ctrl_clicks": 0.2}),
+                    record({"clicks": 0.030, "lines": 0.19, "ctrl_clicks": 0.23}, {"clicks": 3000, "lines": 100, "ctrl_clicks": 60})]
+        expected = {"clicks": ((0.024 * 1000) + (0.030 * 3000)) / 4000,
+                    "lines": ((0.16 * 300) + (0.19 * 100)) / 400,
+                    "ctrl_clicks": (0.2 + 0.23) / 2}
+        self.assert_times(history.cost_model(DELAYS, False, records), expected)
+
+        # A painting at other delays is not used when some have the same delays
+        other = record({"clicks": 0.5, "lines": 0.5, "ctrl_clicks": 0.5}, delays=(0.05, 0.05, 0.3))
+        self.assert_times(history.cost_model(DELAYS, False, records + [other]), expected)
+
+        # The left out painting is not used
+        self.assert_times(  history.cost_model(DELAYS, False, records, exclude=1),
+                            {"clicks": 0.024, "lines": 0.16, "ctrl_clicks": 0.2})
+
+
+    def test_other_delays(self):
+        """ The time on top of the delays of the past paintings is added to the current delays """
+        history = TimingHistory("unused")
+        records = [ record({"clicks": 0.011, "lines": 0.06, "ctrl_clicks": 0.13}, delays=(0.01, 0.01, 0.1)),
+                    record({"clicks": 0.043, "lines": 0.27, "ctrl_clicks": 0.34}, delays=(0.04, 0.05, 0.3))]
+        expected = {"clicks": 0.02 + 0.002, "lines": 0.15 + 0.015, "ctrl_clicks": 0.2 + 0.01}
+        self.assert_times(history.cost_model(DELAYS, False, records), expected)
+
+        # Double clicks take two click delays, a painting that was faster than its delays adds nothing
+        fast = record({"clicks": 0.015, "lines": 0.04, "ctrl_clicks": 0.1}, delays=(0.01, 0.01, 0.1), double_click=True)
+        expected = {"clicks": 0.04, "lines": 0.15, "ctrl_clicks": 0.22}
+        self.assert_times(history.cost_model(DELAYS, True, [fast]), expected)
+
+
+class TestEstimate(unittest.TestCase):
+
+    def history(self, errors, mean_times):
+        """ Returns:    Records that all took mean_times per operation, and took (1 + error) times the estimate of
+                        the rest of the history for their PLANNED operations
+        """
+        planned_time = CostModel(*DELAYS, False, times=tuple(mean_times[operation] for operation in OPERATIONS)).operations_time(PLANNED)
+        return [record(mean_times, planned=PLANNED, actual_time=planned_time * (1 + error)) for error in errors]
+
+
+    def test_interval(self):
+        history = TimingHistory("unused")
+        mean_times = {"clicks": 0.026, "lines": 0.17, "ctrl_clicks": 0.21}
+        errors = [0.05, -0.02, 0.1, 0.03, -0.06]
+        records = self.history(errors, mean_times)
+        numpy.testing.assert_allclose(history.errors(records), errors, atol=1e-12)
+
+        (low, high), median_error = history.estimate(100.0, records)
+        mean, deviation = numpy.mean(errors), numpy.std(errors, ddof=1)
+        self.assertAlmostEqual(low, 100.0 * (1 + mean - (CONFIDENCE_Z * deviation)))
+        self.assertAlmostEqual(high - low, 100.0 * 2 * CONFIDENCE_Z * deviation)
+        self.assertAlmostEqual(median_error, 0.05)
+
+
+    def test_leave_one_out(self):
+        """ Every painting is estimated without itself, a slow painting does not hide its own error """
+        history = TimingHistory("unused")
+        records = self.history([0, 0, 0], {"clicks": 0.02, "lines": 0.15, "ctrl_clicks": 0.2})
+        records.append(record({"clicks": 0.04, "lines": 0.3, "ctrl_clicks": 0.4}, planned=COUNTS))
+        errors = history.errors(records)
+
+        # The slow painting is estimated at the times of the others, they at a mean including the slow one
+        self.assertAlmostEqual(errors[3], 1.0)
+        self.assertTrue((errors[:3] < 0).all())
+
+
+    def test_too_few_paintings(self):
+        history = TimingHistory("unused")
+        mean_times = {"clicks": 0.026, "lines": 0.17, "ctrl_clicks": 0.21}
+        records = self.history([0.05, -0.02], mean_times)
+        self.assertEqual(history.estimate(100.0, records), (None, None))
+
+        # Paintings that were not completed are used for the times but not for the errors
+        records += [record(mean_times, completed=False)] * 3
+        self.assertEqual(history.estimate(100.0, records), (None, None))
+
+
+    def test_append_load(self):
+        telemetry = PaintTelemetry()
+        for now in range(30):
+            telemetry.start("clicks", now * 0.03)
+        telemetry.stop(0.9)
+        with tempfile.TemporaryDirectory() as folder:
+            history = TimingHistory(os.path.join(folder, "history", "timing.jsonl"))
+            self.assertEqual(history.load(), [])
+            history.append(telemetry, DELAYS, False, PLANNED, 120.0, True)
+            with open(history.path, "a") as f:
+                f.write("not json\n{}\n")
+            history.append(telemetry, DELAYS, False, PLANNED, 130.0, False)
+
+            records = history.load()
+            self.assertEqual([past_record["estimated_time"] for past_record in records], [120.0, 130.0])
+            self.assertEqual(records[0]["counts"]["clicks"], 30)
+            self.assertAlmostEqual(history.cost_model(DELAYS, False).click_time, 0.03)
+
+
+if __name__ == "__main__":
+    unittest.main()
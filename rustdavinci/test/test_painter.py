@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.inputBackend import SimulatedCanvasBackend
+from lib.strokePlan import create_stroke_plan
+from lib.costModel import CostModel
+from lib.painter import Painter
+
+CTRL_AREA = (1474, 175, 200, 576)
+
+# The canvas is placed here on the screen, its size is the size of the image
+CANVAS_POSITION = (500, 300)
+
+# The delays of the cost model that chooses between clicks, lines and the brush sizes
+COST_MODEL = CostModel(0.02, 0.03, 0.18, False)
+
+
+def block_image(height, width, block, colors, seed):
+    """ Returns:    A height x width array of random palette indices below colors, in block x block squares """
+    rng = numpy.random.RandomState(seed)
+    blocks = rng.randint(0, colors, ((height // block) + 1, (width // block) + 1)).astype(numpy.uint8)
+    return numpy.repeat(numpy.repeat(blocks, block, axis=0), block, axis=1)[:height, :width].copy()
+
+
+class TestPainter(unittest.TestCase):
+
+    def replay(self, plan, quantized_img, use_hidden_colors, background = 255, background_color = None):
+        """ Paint plan on a SimulatedCanvasBackend the size of quantized_img.
+        Returns:    The backend
+        """
+        height, width = quantized_img.shape
+        canvas_area = CANVAS_POSITION + (width, height)
+        backend = SimulatedCanvasBackend(canvas_area, CTRL_AREA, use_hidden_colors, background)
+        painter = Painter(backend)
+        painter.set_delays(0.02, 0.03, 0.18, False)
+        painter.set_ctrl_area(*CTRL_AREA, use_hidden_colors)
+        palette = [tuple(color) for color in backend.palette.tolist()]
+        self.assertTrue(painter.paint(plan, canvas_area, palette, 1, background_color))
+        return backend
+
+
+    def assert_painted(self, quantized_img, img_colors, use_hidden_colors = False, minimum_line_width = 3,
+                       opaque = False, large_brushes = False):
+        """ Plan quantized_img, replay the plan and compare the canvas with the image pixel for pixel.
+        Returns:    The StrokePlan
+        """
+        colors_per_opacity = 64 if use_hidden_colors else 20
+        opaque_colors = range(colors_per_opacity) if opaque else ()
+        plan = create_stroke_plan(  quantized_img, img_colors, minimum_line_width, COST_MODEL, opaque_colors,
+                                    large_brushes)
+        backend = self.replay(plan, quantized_img, use_hidden_colors)
+        numpy.testing.assert_array_equal(backend.canvas, quantized_img)
+        return plan
+
+
+    def test_lines(self):
+        """ Stripes of runs that are all long enough for a line """
+        quantized_img = numpy.repeat(block_image(30, 1, 1, 20, 0), 80, axis=1)
+        plan = self.assert_painted(quantized_img, sorted(set(quantized_img.ravel().tolist())))
+        self.assertEqual(plan.clicks, 0)
+        self.assertGreater(plan.lines, 0)
+
+
+    def test_clicks(self):
+        quantized_img = block_image(40, 60, 2, 20, 1)
+        plan = self.assert_painted(quantized_img, sorted(set(quantized_img.ravel().tolist())), minimum_line_width=1000)
+        self.assertEqual(plan.lines, 0)
+
+
+    def test_lines_and_clicks(self):
+        for block, seed in ((1, 2), (3, 3), (7, 4)):
+            quantized_img = block_image(60, 90, block, 80, seed)
+            img_colors = sorted(set(quantized_img.ravel().tolist()))
+            numpy.random.RandomState(seed).shuffle(img_colors)
+            self.assert_painted(quantized_img, img_colors)
+            self.assert_painted(quantized_img, img_colors, opaque=True)
+
+
+    def test_background(self):
+        """ The background is painted first and its color is not part of the plan, the canvas starts out with
+        other colors where the background strokes reach (5 pixels from the edges, canvas sizes of tens)
+        """
+        quantized_img = block_image(60, 90, 5, 20, 5)
+        background_color = int(quantized_img[0, 0])
+        img_colors = [color for color in sorted(set(quantized_img.ravel().tolist())) if color != background_color]
+        plan = create_stroke_plan(quantized_img, img_colors, 3, COST_MODEL, range(20))
+        self.assertFalse((plan.color == background_color).any())
+
+        height, width = quantized_img.shape
+        canvas_area = CANVAS_POSITION + (width, height)
+        backend = SimulatedCanvasBackend(canvas_area, CTRL_AREA, False, background_color)
+        backend.canvas[5:height - 5, 5:width - 5] = block_image(height - 10, width - 10, 1, 20, 6)
+        painter = Painter(backend)
+        painter.set_ctrl_area(*CTRL_AREA, False)
+        palette = [tuple(color) for color in backend.palette.tolist()]
+        self.assertTrue(painter.paint(plan, canvas_area, palette, 1, background_color))
+        numpy.testing.assert_array_equal(backend.canvas, quantized_img)
+
+
+    def test_hidden_colors(self):
+        quantized_img = block_image(60, 90, 3, 256, 7)
+        img_colors = sorted(set(quantized_img.ravel().tolist()))
+        self.assert_painted(quantized_img, img_colors, use_hidden_colors=True)
+        self.assert_painted(quantized_img, img_colors, use_hidden_colors=True, opaque=True)
+
+
+    def test_large_brushes(self):
+        for block, seed, use_hidden_colors in ((20, 8, False), (40, 9, False), (13, 10, True)):
+            quantized_img = block_image(120, 160, block, 6, seed)
+            quantized_img[30:90, 60:63] = 3
+            img_colors = sorted(set(quantized_img.ravel().tolist()))
+            plan = self.assert_painted( quantized_img, img_colors, use_hidden_colors, opaque=True,
+                                        large_brushes=True)
+            self.assertTrue((plan.size > 0).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
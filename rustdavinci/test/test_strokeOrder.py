@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib import strokeOrder
+from lib.strokeOrder import nearest_neighbour_tour, two_opt, order_strokes, travel_distance, path_length
+from lib.strokePlan import create_stroke_plan
+from lib.costModel import CostModel
+
+# The delays of the cost model that chooses between clicks, lines and the brush sizes
+COST_MODEL = CostModel(0.02, 0.03, 0.18, False)
+
+
+def block_image(height, width, block, colors, seed):
+    """ Returns:    A height x width array of random palette indices below colors, in block x block squares """
+    rng = numpy.random.RandomState(seed)
+    blocks = rng.randint(0, colors, ((height // block) + 1, (width // block) + 1)).astype(numpy.uint8)
+    return numpy.repeat(numpy.repeat(blocks, block, axis=0), block, axis=1)[:height, :width].copy()
+
+
+def sparse_image(height, width, dots, colors, seed):
+    """ Returns:    A height x width array of color 0 with dots pixels of random other colors below colors """
+    rng = numpy.random.RandomState(seed)
+    pixel_arr = numpy.zeros((height, width), dtype=numpy.uint8)
+    pixel_arr[rng.randint(0, height, dots), rng.randint(0, width, dots)] = rng.randint(1, colors, dots)
+    return pixel_arr
+
+
+def stroke_set(plan):
+    """ Returns:    The sorted strokes of plan, independent of the direction they are drawn in """
+    low_x, high_x = numpy.minimum(plan.x0, plan.x1), numpy.maximum(plan.x0, plan.x1)
+    low_y, high_y = numpy.minimum(plan.y0, plan.y1), numpy.maximum(plan.y0, plan.y1)
+    return sorted(zip(  plan.color.tolist(), plan.kind.tolist(), low_x.tolist(), low_y.tolist(),
+                        high_x.tolist(), high_y.tolist(), plan.size.tolist()))
+
+
+class TestTours(unittest.TestCase):
+
+    def test_permutations(self):
+        rng = numpy.random.RandomState(0)
+        for n in (1, 2, 3, 10, 57, 200):
+            points = rng.randint(0, 300, (n, 2)).astype(float)
+            start = rng.randint(0, 300, 2).astype(float)
+            tour = nearest_neighbour_tour(points, start)
+            numpy.testing.assert_array_equal(numpy.sort(tour), numpy.arange(n))
+
+            improved = two_opt(points, start, tour, strokeOrder.MAX_TOUR_PASSES)
+            numpy.testing.assert_array_equal(numpy.sort(improved), numpy.arange(n))
+            self.assertLessEqual(path_length(points[improved], start), path_length(points[tour], start) + 1e-9)
+
+
+    def test_duplicate_points(self):
+        points = numpy.array([[5, 5], [1, 1], [5, 5], [1, 1], [9, 0]], dtype=float)
+        start = numpy.array([0, 0], dtype=float)
+        tour = two_opt(points, start, nearest_neighbour_tour(points, start), strokeOrder.MAX_TOUR_PASSES)
+        numpy.testing.assert_array_equal(numpy.sort(tour), numpy.arange(len(points)))
+
+
+class TestOrderStrokes(unittest.TestCase):
+
+    def assert_ordered(self, quantized_img, large_brushes = False):
+        """ order_strokes keeps every stroke and the colors & brush sizes in the same order, and never travels
+        further than the serpentine order (order_strokes without click tours)
+        """
+        img_colors = sorted(set(quantized_img.ravel().tolist()))
+        plan = create_stroke_plan(quantized_img, img_colors, 3, COST_MODEL, range(20), large_brushes)
+        ordered = order_strokes(plan)
+        self.assertEqual(stroke_set(ordered), stroke_set(plan))
+        numpy.testing.assert_array_equal(ordered.color, plan.color)
+        numpy.testing.assert_array_equal(ordered.size, plan.size)
+
+        tour_clicks = strokeOrder.MAX_TOUR_CLICKS
+        try:
+            strokeOrder.MAX_TOUR_CLICKS = 0
+            serpentine = order_strokes(plan)
+        finally:
+            strokeOrder.MAX_TOUR_CLICKS = tour_clicks
+        self.assertEqual(stroke_set(serpentine), stroke_set(plan))
+        self.assertLessEqual(travel_distance(ordered), travel_distance(serpentine) + 1e-6)
+        return ordered, serpentine
+
+
+    def test_sparse_clicks(self):
+        """ Few clicks per color, where the tours are searched and should be shorter """
+        shorter = 0
+        for seed in range(4):
+            ordered, serpentine = self.assert_ordered(sparse_image(80, 120, 150, 5, seed))
+            shorter += travel_distance(ordered) < travel_distance(serpentine)
+        self.assertGreater(shorter, 0)
+
+
+    def test_dense_images(self):
+        for block, seed in ((1, 4), (3, 5), (8, 6)):
+            self.assert_ordered(block_image(60, 90, block, 20, seed))
+
+
+    def test_large_brushes(self):
+        self.assert_ordered(block_image(120, 160, 20, 6, 7), True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.strokePlan import create_stroke_plan, range_min, bridge_runs, find_runs, FOOTPRINT_MARGIN
+from lib.ctrlArea import ctrl_size_footprints
+from lib.costModel import CostModel
+
+# The delays of the cost model that chooses between clicks, lines and the brush sizes
+COST_MODEL = CostModel(0.02, 0.03, 0.18, False)
+
+
+def block_image(height, width, block, colors, seed):
+    """ Returns:    A height x width array of random palette indices below colors, in block x block squares """
+    rng = numpy.random.RandomState(seed)
+    blocks = rng.randint(0, colors, ((height // block) + 1, (width // block) + 1)).astype(numpy.uint8)
+    return numpy.repeat(numpy.repeat(blocks, block, axis=0), block, axis=1)[:height, :width].copy()
+
+
+def disc_image(height, width, discs, colors, seed):
+    """ Returns:    A height x width array of random palette indices below colors, discs of random sizes drawn on
+                    top of each other
+    """
+    rng = numpy.random.RandomState(seed)
+    pixel_arr = numpy.zeros((height, width), dtype=numpy.uint8)
+    y, x = numpy.mgrid[:height, :width]
+    for _ in range(discs):
+        cy, cx, radius = rng.randint(0, height), rng.randint(0, width), rng.randint(3, 30)
+        pixel_arr[((y - cy) ** 2) + ((x - cx) ** 2) <= radius ** 2] = rng.randint(0, colors)
+    return pixel_arr
+
+
+def row_runs(row, img_colors, opaque_colors, run_color = 1):
+    """ Bridge the runs of a single row like create_stroke_plan does, with the painting order img_colors.
+    Returns:    A sorted list of (x0, x1, is_line) of the runs of run_color
+    """
+    pixel_arr = numpy.array([row], dtype=numpy.uint8)
+    color_rank = numpy.full(256, -1, dtype=numpy.int32)
+    color_rank[img_colors] = numpy.arange(len(img_colors))
+    is_opaque = numpy.zeros(256, dtype=bool)
+    is_opaque[list(opaque_colors)] = True
+    pixel_rank = numpy.where(is_opaque[pixel_arr], color_rank[pixel_arr], -1)
+
+    x0, x1, y, color = find_runs(pixel_arr)
+    is_painted = color_rank[color] >= 0
+    x0, x1, y, color = x0[is_painted], x1[is_painted], y[is_painted], color[is_painted]
+    x0, x1, _, color, _, is_line = bridge_runs(x0, x1, y, color, color_rank[color], pixel_rank, 3, COST_MODEL)
+    is_color = color == run_color
+    return sorted(zip(x0[is_color].tolist(), x1[is_color].tolist(), is_line[is_color].tolist()))
+
+
+class TestRangeMin(unittest.TestCase):
+
+    def test_brute_force(self):
+        rng = numpy.random.RandomState(0)
+        values = rng.randint(-1, 50, 300).astype(numpy.int32)
+        starts = rng.randint(0, 299, 2000)
+        stops = starts + 1 + (rng.randint(0, 300, 2000) % (300 - starts))
+        expected = [values[start:stop].min() for start, stop in zip(starts, stops)]
+        numpy.testing.assert_array_equal(range_min(values, starts, stops), expected)
+
+
+    def test_edges(self):
+        values = numpy.array([5, 3, 8, 1, 9, 2], dtype=numpy.int32)
+        starts = numpy.array([0, 5, 0, 4, 2])
+        stops = numpy.array([1, 6, 6, 6, 4])
+        numpy.testing.assert_array_equal(range_min(values, starts, stops), [5, 2, 1, 2, 1])
+        self.assertEqual(len(range_min(values, starts[:0], stops[:0])), 0)
+
+
+class TestBridgeRuns(unittest.TestCase):
+
+    def test_bridged(self):
+        """ Two runs of 1 around pixels of 2, which is opaque and painted later, become a single line """
+        row = [1] * 5 + [2] * 2 + [1] * 5
+        self.assertEqual(row_runs(row, [1, 2], (1, 2)), [(0, 11, True)])
+        self.assertEqual(row_runs(row, [1, 2], (1, 2), 2), [(5, 6, False)])
+
+
+    def test_translucent_gap(self):
+        """ 2 can not be painted over, the line of 1 would show through """
+        row = [1] * 5 + [2] * 2 + [1] * 5
+        self.assertEqual(row_runs(row, [1, 2], (1, )), [(0, 4, True), (7, 11, True)])
+
+        row = [1] * 5 + [2, 3, 2] + [1] * 5
+        self.assertEqual(row_runs(row, [1, 2, 3], (1, 2)), [(0, 4, True), (8, 12, True)])
+
+
+    def test_skipped_color(self):
+        """ 2 is not painted at all, the line of 1 would stay on the canvas """
+        row = [1] * 5 + [2] * 2 + [1] * 5
+        self.assertEqual(row_runs(row, [1], (1, 2)), [(0, 4, True), (7, 11, True)])
+
+
+    def test_hidden_pixel(self):
+        """ 2 is painted before 1, the line of 1 would hide it """
+        row = [1] * 5 + [2] * 2 + [1] * 5
+        self.assertEqual(row_runs(row, [2, 1], (1, 2)), [(0, 4, True), (7, 11, True)])
+
+        row = [1] * 5 + [2, 0, 2] + [1] * 5
+        self.assertEqual(row_runs(row, [2, 0, 1], (0, 1, 2)), [(0, 4, True), (8, 12, True)])
+
+
+    def test_chain_edges(self):
+        """ The pixels before the first and after the last run of a chain are never painted over """
+        row = [2] * 3 + [1] * 5 + [2] * 2 + [1] * 5 + [2] * 4
+        self.assertEqual(row_runs(row, [1, 2], (1, 2)), [(3, 14, True)])
+
+        row = [2] * 3 + [1] * 5 + [2] * 4
+        self.assertEqual(row_runs(row, [1, 2], (1, 2)), [(3, 7, True)])
+
+        row = [2] * 3 + [1, 1] + [2] * 4
+        self.assertEqual(row_runs(row, [1, 2], (1, 2)), [(3, 4, False)])
+
+
+class TestLargeBrushes(unittest.TestCase):
+
+    def assert_footprints_inside(self, quantized_img):
+        """ Every large brush stroke, grown by FOOTPRINT_MARGIN on every side, covers only pixels of its color """
+        img_colors = sorted(set(quantized_img.ravel().tolist()))
+        plan = create_stroke_plan(quantized_img, img_colors, 3, COST_MODEL, range(20), True)
+        is_large = plan.size > 0
+        self.assertTrue(is_large.any())
+
+        height, width = quantized_img.shape
+        for color, x0, y0, x1, y1, size in zip( plan.color[is_large], plan.x0[is_large], plan.y0[is_large],
+                                                plan.x1[is_large], plan.y1[is_large], plan.size[is_large]):
+            footprint = ctrl_size_footprints[size]
+            top = min(y0, y1) - (footprint // 2) - FOOTPRINT_MARGIN
+            left = min(x0, x1) - (footprint // 2) - FOOTPRINT_MARGIN
+            bottom = max(y0, y1) - (footprint // 2) + footprint + FOOTPRINT_MARGIN
+            right = max(x0, x1) - (footprint // 2) + footprint + FOOTPRINT_MARGIN
+            self.assertTrue(top >= 0 and left >= 0 and bottom <= height and right <= width)
+            self.assertTrue((quantized_img[top:bottom, left:right] == color).all())
+
+
+    def test_blocks(self):
+        for block, seed in ((12, 0), (20, 1), (33, 2)):
+            self.assert_footprints_inside(block_image(120, 160, block, 6, seed))
+
+
+    def test_discs(self):
+        for seed in range(3):
+            self.assert_footprints_inside(disc_image(120, 160, 8, 6, seed))
+
+
+    def test_thin_areas(self):
+        """ Stripes and an area that is one pixel too narrow for the margin of the largest brush """
+        quantized_img = numpy.zeros((100, 100), dtype=numpy.uint8)
+        quantized_img[:, 40:51] = 1
+        quantized_img[20:23, :] = 2
+        quantized_img[60:72, 60:] = 3
+        self.assert_footprints_inside(quantized_img)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import unittest
+import numpy
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.inputBackend import DroppingCanvasBackend
+from lib.verification import CanvasVerification, to_canvas_grid, mismatched_pixels, VERIFY_PASSES, VERIFY_TOLERANCE
+from lib.color_functions import rgb_to_hex
+from lib.strokePlan import create_stroke_plan
+from lib.costModel import CostModel
+from lib.painter import Painter
+
+CANVAS_AREA = (500, 300, 90, 60)
+CTRL_AREA = (1474, 175, 200, 576)
+
+# The canvas starts out in a color that is not in the images and is far from all of their colors
+BACKGROUND = 19
+
+# The delays of the cost model that chooses between clicks & lines
+COST_MODEL = CostModel(0.02, 0.03, 0.18, False)
+
+# Delays (seconds) that lose strokes and clicks on the painting controls on the backend, and delays that do not
+DROPPING_DELAYS = (0.005, 0.01, 0.03, False)
+SAFE_DELAYS = (0.02, 0.03, 0.18, False)
+THRESHOLDS = (0.01, 0.02, 0.05)
+
+
+def block_image(height, width, block, colors, seed):
+    """ Returns:    A height x width array of random palette indices below colors, in block x block squares """
+    rng = numpy.random.RandomState(seed)
+    blocks = rng.randint(0, colors, ((height // block) + 1, (width // block) + 1)).astype(numpy.uint8)
+    return numpy.repeat(numpy.repeat(blocks, block, axis=0), block, axis=1)[:height, :width].copy()
+
+
+class TestMismatchedPixels(unittest.TestCase):
+
+    def setUp(self):
+        backend = DroppingCanvasBackend(CANVAS_AREA, CTRL_AREA, False, BACKGROUND)
+        self.palette = [tuple(color) for color in backend.palette.tolist()]
+        self.target = block_image(20, 30, 2, BACKGROUND, 0)
+        self.canvas_rgb = numpy.array(self.palette, dtype=numpy.uint8)[self.target]
+
+
+    def test_to_canvas_grid(self):
+        self.assertIs(to_canvas_grid(self.canvas_rgb, 30, 20), self.canvas_rgb)
+        for scale in (2, 3):
+            shot = numpy.repeat(numpy.repeat(self.canvas_rgb, scale, axis=0), scale, axis=1)
+            numpy.testing.assert_array_equal(to_canvas_grid(shot, 30, 20), self.canvas_rgb)
+
+        # 150% display scaling, every canvas pixel is one or two screen pixels wide
+        scaled = numpy.repeat(numpy.repeat(self.canvas_rgb, [1, 2] * 10, axis=0), [1, 2] * 15, axis=1)
+        numpy.testing.assert_array_equal(to_canvas_grid(scaled, 30, 20), self.canvas_rgb)
+
+
+    def test_matching_canvas(self):
+        colors = sorted(set(self.target.ravel().tolist()))
+        self.assertFalse(mismatched_pixels(self.canvas_rgb, self.target, self.palette, colors).any())
+
+        # The colors of the screenshot are a bit off
+        noise = numpy.random.RandomState(1).randint(-6, 7, self.canvas_rgb.shape)
+        noisy = numpy.clip(self.canvas_rgb + noise, 0, 255).astype(numpy.uint8)
+        self.assertFalse(mismatched_pixels(noisy, self.target, self.palette, colors).any())
+
+
+    def test_wrong_pixels(self):
+        colors = sorted(set(self.target.ravel().tolist()))
+        canvas_rgb = self.canvas_rgb.copy()
+        canvas_rgb[3, 4] = self.palette[(self.target[3, 4] + 1) % BACKGROUND]
+        canvas_rgb[10, 20] = self.palette[BACKGROUND]
+        red = self.palette[self.target[15, 5]][0]
+        canvas_rgb[15, 5, 0] = red + VERIFY_TOLERANCE + 1 if red < 128 else red - VERIFY_TOLERANCE - 1
+        expected = numpy.zeros(self.target.shape, dtype=bool)
+        expected[3, 4] = expected[10, 20] = expected[15, 5] = True
+        numpy.testing.assert_array_equal(mismatched_pixels(canvas_rgb, self.target, self.palette, colors), expected)
+
+        # The pixels of the colors that are not painted are not compared
+        others = [color for color in colors if color != self.target[3, 4]]
+        self.assertFalse(mismatched_pixels(canvas_rgb, self.target, self.palette, others)[3, 4])
+
+
+class TestRepairs(unittest.TestCase):
+
+    def paint(self, quantized_img, skipped_color = None):
+        """ Paint quantized_img with DROPPING_DELAYS on a DroppingCanvasBackend, skipping skipped_color.
+        Returns:    The backend, the painter and the CanvasVerification of the painting
+        """
+        img_colors = sorted(set(quantized_img.ravel().tolist()))
+        plan = create_stroke_plan(quantized_img, img_colors, 3, COST_MODEL)
+        backend = DroppingCanvasBackend(CANVAS_AREA, CTRL_AREA, False, BACKGROUND, *THRESHOLDS)
+        painter = Painter(backend)
+        painter.set_ctrl_area(*CTRL_AREA, False)
+        painter.set_delays(*DROPPING_DELAYS)
+        palette = [tuple(color) for color in backend.palette.tolist()]
+        if skipped_color != None:
+            skipped_hex = rgb_to_hex(palette[skipped_color])
+            painter.log = lambda text: painter.skip_color() if text.endswith("Current color: " + skipped_hex) else None
+
+        self.assertTrue(painter.paint(plan, CANVAS_AREA, palette, 1))
+        self.assertGreater(backend.dropped, 0)
+        painter.log = lambda text: None
+        return backend, painter, CanvasVerification(backend.screenshot, CANVAS_AREA, quantized_img, palette, img_colors, 3)
+
+
+    def repair(self, painter, verification, skipped_colors = ()):
+        """ The repair passes of PaintWorker, with SAFE_DELAYS.
+        Returns:    The number of passes that repaired pixels
+        """
+        painter.set_delays(*SAFE_DELAYS)
+        for verify_pass in range(VERIFY_PASSES):
+            repair = verification.repair_plan(skipped_colors)
+            if len(repair) == 0: return verify_pass
+            self.assertFalse(numpy.isin(repair.color, skipped_colors).any())
+            self.assertTrue(painter.paint(repair, CANVAS_AREA, verification.palette, 1))
+        return VERIFY_PASSES
+
+
+    def test_repaired(self):
+        for block, seed in ((1, 2), (3, 3)):
+            quantized_img = block_image(60, 90, block, BACKGROUND, seed)
+            backend, painter, verification = self.paint(quantized_img)
+            self.assertTrue((backend.canvas != quantized_img).any())
+
+            self.assertEqual(self.repair(painter, verification), 1)
+            numpy.testing.assert_array_equal(backend.canvas, quantized_img)
+            self.assertEqual(len(verification.repair_plan()), 0)
+
+
+    def test_skipped_color(self):
+        """ The pixels of the skipped color keep the background, everything else is repaired """
+        quantized_img = block_image(60, 90, 3, BACKGROUND, 4)
+        skipped_color = 7
+        backend, painter, verification = self.paint(quantized_img, skipped_color)
+        self.assertEqual(painter.skipped_colors, [skipped_color])
+
+        self.assertEqual(self.repair(painter, verification, painter.skipped_colors), 1)
+        is_skipped = quantized_img == skipped_color
+        self.assertTrue(is_skipped.any())
+        self.assertTrue((backend.canvas[is_skipped] == BACKGROUND).all())
+        numpy.testing.assert_array_equal(backend.canvas[~is_skipped], quantized_img[~is_skipped])
+        self.assertTrue(verification.mismatched([skipped_color]).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
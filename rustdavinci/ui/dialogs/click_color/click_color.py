@@ -23,7 +23,7 @@ class Click_Color(QDialog):
         self.settings_window = parent
         self.main_window = self.settings_window.parent
         self.settings = QSettings()
-        self.main_window.rustDaVinci.use_hidden_colors = bool(self.settings.value("hidden_colors", default_settings["hidden_colors"]))
+        self.main_window.rustDaVinci.painter.use_hidden_colors = bool(self.settings.value("hidden_colors", default_settings["hidden_colors"]))
 
         self.color_index = 0
 
@@ -42,7 +42,8 @@ class Click_Color(QDialog):
         selected_color = self.ui.colors_ListWidget.currentItem().background().color()
         selected_color_rgb = (selected_color.red(), selected_color.green(), selected_color.blue())
         color = rust_palette.index(selected_color_rgb)
-        self.main_window.rustDaVinci.choose_painting_controls(0, brush_type, color)
+        self.main_window.rustDaVinci.painter.reset_painting_controls()
+        self.main_window.rustDaVinci.painter.choose_painting_controls(0, brush_type, color)
 
 
     def populate_list(self):
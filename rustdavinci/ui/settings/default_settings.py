@@ -29,5 +29,8 @@ default_settings = {
     "ctrl_area_delay": 180,
     "line_delay": 30,
     "minimum_line_width": 10,
-    "brush_type": 1
+    "brush_type": 1,
+    "large_brushes": 0,
+    "lab_colors": 0,
+    "verify_painting": 0
 }
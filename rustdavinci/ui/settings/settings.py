@@ -33,7 +33,7 @@ class Settings(QDialog):
         self.isColorsOpened = False
 
         if not (int(self.settings.value("ctrl_w", default_settings["ctrl_w"])) == 0 or int(self.settings.value("ctrl_h", default_settings["ctrl_h"])) == 0):
-            self.parent.rustDaVinci.calculate_ctrl_tools_positioning()
+            self.parent.rustDaVinci.calculate_ctrl_tools_positioning(self.parent.rustDaVinci.paint_config())
             self.ui.show_ctrl_PushButton.setEnabled(True)
             self.ui.click_color_PushButton.setEnabled(True)
         else:
@@ -74,6 +74,9 @@ class Settings(QDialog):
         self.ui.update_canvas_end_CheckBox.stateChanged.connect(self.enableApply)
         self.ui.draw_lines_CheckBox.stateChanged.connect(self.enableApply)
         self.ui.double_click_CheckBox.stateChanged.connect(self.enableApply)
+        self.ui.large_brushes_CheckBox.stateChanged.connect(self.enableApply)
+        self.ui.lab_colors_CheckBox.stateChanged.connect(self.enableApply)
+        self.ui.verify_painting_CheckBox.stateChanged.connect(self.enableApply)
         self.ui.show_info_CheckBox.stateChanged.connect(self.enableApply)
         self.ui.show_preview_CheckBox.stateChanged.connect(self.enableApply)
         self.ui.hide_preview_CheckBox.stateChanged.connect(self.enableApply)
@@ -115,6 +118,9 @@ class Settings(QDialog):
         self.setting_to_checkbox("update_canvas_end", self.ui.update_canvas_end_CheckBox, default_settings["update_canvas_end"])
         self.setting_to_checkbox("draw_lines", self.ui.draw_lines_CheckBox, default_settings["draw_lines"])
         self.setting_to_checkbox("double_click", self.ui.double_click_CheckBox, default_settings["double_click"])
+        self.setting_to_checkbox("large_brushes", self.ui.large_brushes_CheckBox, default_settings["large_brushes"])
+        self.setting_to_checkbox("lab_colors", self.ui.lab_colors_CheckBox, default_settings["lab_colors"])
+        self.setting_to_checkbox("verify_painting", self.ui.verify_painting_CheckBox, default_settings["verify_painting"])
         self.setting_to_checkbox("show_information", self.ui.show_info_CheckBox, default_settings["show_information"])
         self.setting_to_checkbox("show_preview_load", self.ui.show_preview_CheckBox, default_settings["show_preview_load"])
         self.setting_to_checkbox("hide_preview_paint", self.ui.hide_preview_CheckBox, default_settings["hide_preview_paint"])
@@ -193,6 +199,9 @@ class Settings(QDialog):
         self.checkbox_to_setting("update_canvas_end", self.ui.update_canvas_end_CheckBox.isChecked())
         self.checkbox_to_setting("draw_lines", self.ui.draw_lines_CheckBox.isChecked())
         self.checkbox_to_setting("double_click", self.ui.double_click_CheckBox.isChecked())
+        self.checkbox_to_setting("large_brushes", self.ui.large_brushes_CheckBox.isChecked())
+        self.checkbox_to_setting("lab_colors", self.ui.lab_colors_CheckBox.isChecked())
+        self.checkbox_to_setting("verify_painting", self.ui.verify_painting_CheckBox.isChecked())
         self.checkbox_to_setting("show_information", self.ui.show_info_CheckBox.isChecked())
         self.checkbox_to_setting("show_preview_load", self.ui.show_preview_CheckBox.isChecked())
         self.checkbox_to_setting("hide_preview_paint", self.ui.hide_preview_CheckBox.isChecked())
@@ -228,17 +237,18 @@ class Settings(QDialog):
             self.settings.setValue("skip_colors", [])
 
 
-        self.parent.rustDaVinci.update()
+        config = self.parent.rustDaVinci.paint_config()
+        self.parent.rustDaVinci.update(config)
 
         if self.parent.rustDaVinci.org_img != None:
-            self.parent.rustDaVinci.convert_transparency()
-            self.parent.rustDaVinci.create_pixmaps()
+            self.parent.rustDaVinci.convert_transparency(config)
+            self.parent.rustDaVinci.create_pixmaps(config)
         if self.parent.is_expanded:
             self.parent.label.hide()
             self.parent.expand_window()
 
         if not (int(self.settings.value("ctrl_w", default_settings["ctrl_w"])) == 0 or int(self.settings.value("ctrl_h", default_settings["ctrl_h"])) == 0):
-            self.parent.rustDaVinci.calculate_ctrl_tools_positioning()
+            self.parent.rustDaVinci.calculate_ctrl_tools_positioning(self.parent.rustDaVinci.paint_config())
             self.ui.show_ctrl_PushButton.setEnabled(True)
             self.ui.click_color_PushButton.setEnabled(True)
         else:
@@ -261,6 +271,9 @@ class Settings(QDialog):
         self.ui.update_canvas_end_CheckBox.setCheckState(Qt.Checked)
         self.ui.draw_lines_CheckBox.setCheckState(Qt.Checked)
         self.ui.double_click_CheckBox.setCheckState(Qt.Unchecked)
+        self.ui.large_brushes_CheckBox.setCheckState(Qt.Unchecked)
+        self.ui.lab_colors_CheckBox.setCheckState(Qt.Unchecked)
+        self.ui.verify_painting_CheckBox.setCheckState(Qt.Unchecked)
         self.ui.show_info_CheckBox.setCheckState(Qt.Checked)
         self.ui.show_preview_CheckBox.setCheckState(Qt.Unchecked)
         self.ui.hide_preview_CheckBox.setCheckState(Qt.Unchecked)
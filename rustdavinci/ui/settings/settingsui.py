@@ -263,6 +263,15 @@ class Ui_SettingsUI(object):
         self.double_click_CheckBox = QtWidgets.QCheckBox(self.experimentalTab)
         self.double_click_CheckBox.setGeometry(QtCore.QRect(20, 230, 341, 17))
         self.double_click_CheckBox.setObjectName("double_click_CheckBox")
+        self.large_brushes_CheckBox = QtWidgets.QCheckBox(self.experimentalTab)
+        self.large_brushes_CheckBox.setGeometry(QtCore.QRect(20, 250, 341, 17))
+        self.large_brushes_CheckBox.setObjectName("large_brushes_CheckBox")
+        self.lab_colors_CheckBox = QtWidgets.QCheckBox(self.experimentalTab)
+        self.lab_colors_CheckBox.setGeometry(QtCore.QRect(20, 270, 341, 17))
+        self.lab_colors_CheckBox.setObjectName("lab_colors_CheckBox")
+        self.verify_painting_CheckBox = QtWidgets.QCheckBox(self.experimentalTab)
+        self.verify_painting_CheckBox.setGeometry(QtCore.QRect(20, 290, 341, 17))
+        self.verify_painting_CheckBox.setObjectName("verify_painting_CheckBox")
         self.click_color_PushButton = QtWidgets.QPushButton(self.experimentalTab)
         self.click_color_PushButton.setGeometry(QtCore.QRect(220, 390, 141, 31))
         self.click_color_PushButton.setObjectName("click_color_PushButton")
@@ -442,6 +451,12 @@ class Ui_SettingsUI(object):
         self.label_23.setText(_translate("SettingsUI", "Painting brush type:"))
         self.double_click_CheckBox.setToolTip(_translate("SettingsUI", "This will automatically click the mouse button twice during the painting process eliminating any dead pixels"))
         self.double_click_CheckBox.setText(_translate("SettingsUI", "Double-click the mouse for improved painting accuracy"))
+        self.large_brushes_CheckBox.setToolTip(_translate("SettingsUI", "This will paint the inside of large areas with the larger brush sizes and only the edges with the smallest brush (speeds up painting)"))
+        self.large_brushes_CheckBox.setText(_translate("SettingsUI", "Paint large areas with the larger brush sizes"))
+        self.lab_colors_CheckBox.setToolTip(_translate("SettingsUI", "This will choose the palette colors that look the closest (CIELAB color distance) instead of the closest RGB values, for the normal quality"))
+        self.lab_colors_CheckBox.setText(_translate("SettingsUI", "Match the colors of the image perceptually (CIELAB)"))
+        self.verify_painting_CheckBox.setToolTip(_translate("SettingsUI", "This will take a screenshot of the canvas when the painting is completed and repaint the pixels that do not match the image"))
+        self.verify_painting_CheckBox.setText(_translate("SettingsUI", "Verify the painting and repair the missed pixels"))
         self.click_color_PushButton.setToolTip(_translate("SettingsUI", "Opens a dialog where you can select a color that the application will click in the in-game palette"))
         self.click_color_PushButton.setText(_translate("SettingsUI", "Click Color"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.experimentalTab), _translate("SettingsUI", "Experimental"))
@@ -29,8 +29,9 @@ class MainWindow(QMainWindow):
         # Setup rustDaVinci object
         self.rustDaVinci = rustDaVinci(self)
 
-        # Clear Image action
+        # Clear Image & Resume painting actions
         self.action_clearImage = None
+        self.action_resumePainting = None
 
         # Connect UI modules
         self.connectAll()
@@ -50,12 +51,15 @@ class MainWindow(QMainWindow):
         loadMenu.addAction("From URL...", self.load_image_URL_clicked)
         self.action_clearImage = loadMenu.addAction("Clear image", self.clear_image_clicked)
         self.action_clearImage.setEnabled(False)
+        self.action_resumePainting = loadMenu.addAction("Resume last painting", self.resume_painting_clicked)
+        self.action_resumePainting.setEnabled(self.rustDaVinci.checkpoint.exists())
         self.ui.load_image_PushButton.setMenu(loadMenu)
 
         # Add actions to the identifyAreasPushButton
         identifyMenu = QMenu()
         identifyMenu.addAction("Manually", self.locate_ctrl_manually_clicked)
         identifyMenu.addAction("Automatically", self.locate_ctrl_automatically_clicked)
+        identifyMenu.addAction("Calibrate delays...", self.calibrate_delays_clicked)
         self.ui.identify_ctrl_PushButton.setMenu(identifyMenu)
 
         self.ui.paint_image_PushButton.clicked.connect(self.paint_image_clicked)
@@ -106,11 +110,38 @@ class MainWindow(QMainWindow):
         self.rustDaVinci.locate_control_area_automatically()
 
 
+    def calibrate_delays_clicked(self):
+        """ Calibrate the painting delays """
+        self.rustDaVinci.calibrate_delays()
+
+
     def paint_image_clicked(self):
         """ Start the painting process """
         self.rustDaVinci.start_painting()
 
 
+    def resume_painting_clicked(self):
+        """ Resume the last painting """
+        self.rustDaVinci.resume_painting()
+
+
+    def painting_finished(self, completed):
+        """ The painting worker is done, a slot of the main window so that it runs on the GUI thread """
+        self.rustDaVinci.painting_finished(completed)
+        self.action_resumePainting.setEnabled(self.rustDaVinci.checkpoint.exists())
+
+
+    def calibration_finished(self, delays):
+        """ The calibration worker is done, a slot of the main window so that it runs on the GUI thread """
+        self.rustDaVinci.calibration_finished(delays)
+
+
+    def closeEvent(self, event):
+        """ Stop the painting before the window is closed """
+        self.rustDaVinci.abort_painting()
+        super(MainWindow, self).closeEvent(event)
+
+
     def settings_clicked(self):
         """ Create an instance of a settings window """
         settings = Settings(self)
@@ -150,13 +181,7 @@ class MainWindow(QMainWindow):
         self.label.setLineWidth(1)
         self.label.show()
 
-        if self.rustDaVinci.pixmap_on_display == 0:
-            pixmap = self.rustDaVinci.org_img_pixmap
-        elif self.rustDaVinci.pixmap_on_display == 1:
-            pixmap = self.rustDaVinci.quantized_img_pixmap_normal
-        elif self.rustDaVinci.pixmap_on_display == 2:
-            pixmap = self.rustDaVinci.quantized_img_pixmap_high
-
+        pixmap = self.rustDaVinci.preview_pixmap(self.rustDaVinci.pixmap_on_display)
         pixmap = pixmap.scaled(550, 380, Qt.KeepAspectRatio)
         self.label.setAlignment(Qt.AlignCenter)
         self.label.setPixmap(pixmap)
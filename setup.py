@@ -12,7 +12,8 @@ URL = "https://github.com/alexemanuelol/RustDaVinci"
 REQUIRED = [
     "Pillow==6.1.0",
     "PyAutoGUI==0.9.41",
-    "pypiwin32==223",
+    "pypiwin32==223; sys_platform == 'win32'",
+    "python-xlib==0.25; sys_platform == 'linux'",
     "colorama==0.4.1",
     "termcolor==1.1.0",
     "pynput==1.4.2",